@@ -0,0 +1,166 @@
+"""Spending trends, moving averages and month-end forecasts of one user, computed with NumPy"""
+import calendar
+from datetime import timedelta
+
+from django.db.models import CharField, FloatField, Sum
+from django.db.models.functions import Cast
+
+from .models import Kategori, RingkasanBulanan, RingkasanHarian, TipeTransaksi
+
+try:
+    import numpy as np
+except ImportError:  # Optional; api_analitik answers 503 without it
+    np = None
+
+# Days of history behind the weekday profile of the seasonal forecast
+HARI_PROFIL = 56
+
+
+def kolomHarian(user_id, dari, sampai):
+    """Daily income and spending of the user in [dari, sampai] as two NumPy series.
+
+    Rows come from values_list over the daily rollup, grouped per day and
+    tipe in SQL; dates and totals are cast to text and REAL there, so no
+    model, date or Decimal is built per row and NumPy parses the dates.
+    """
+    baris = list(
+        RingkasanHarian.objects.filter(user_id=user_id, tanggal__gte=dari, tanggal__lte=sampai)
+        .values_list(Cast('tanggal', CharField()), 'tipe')
+        .annotate(total=Cast(Sum('total'), FloatField()))
+        .order_by()
+    )
+    hari = (sampai - dari).days + 1
+    seri = {TipeTransaksi.PEMASUKAN: np.zeros(hari), TipeTransaksi.PENGELUARAN: np.zeros(hari)}
+    if baris:
+        tanggal, tipe, total = zip(*baris)
+        idx = (np.array(tanggal, dtype='datetime64[D]') - np.datetime64(dari, 'D')).astype(np.int64)
+        tipe, total = np.array(tipe), np.array(total, dtype=np.float64)
+        for nama, nilai in seri.items():
+            pilih = tipe == nama
+            nilai += np.bincount(idx[pilih], weights=total[pilih], minlength=hari)
+    return seri[TipeTransaksi.PEMASUKAN], seri[TipeTransaksi.PENGELUARAN]
+
+
+def kolomBulanan(user_id, dari, sampai):
+    """Monthly spending per kategori from the monthly rollup, as (bulan, kategori, total) columns"""
+    baris = list(
+        RingkasanBulanan.objects.filter(
+            user_id=user_id, bulan__gte=dari.replace(day=1), bulan__lte=sampai, tipe=TipeTransaksi.PENGELUARAN,
+        ).values_list(Cast('bulan', CharField()), 'kategori_id', Cast('total', FloatField()))
+    )
+    if not baris:
+        return np.empty(0, dtype='datetime64[M]'), np.empty(0, dtype=str), np.empty(0)
+    bulan, kategori, total = zip(*baris)
+    return (
+        np.array(bulan, dtype='datetime64[D]').astype('datetime64[M]'),
+        np.array([k or '' for k in kategori]),
+        np.array(total, dtype=np.float64),
+    )
+
+
+def rataBergerak(seri, jendela):
+    """Trailing mean over jendela points; the first points average what is available"""
+    n = len(seri)
+    kumulatif = np.concatenate(([0.0], np.cumsum(seri)))
+    akhir = np.arange(1, n + 1)
+    awal = np.maximum(akhir - jendela, 0)
+    return (kumulatif[akhir] - kumulatif[awal]) / (akhir - awal)
+
+
+def bulat(seri):
+    return np.round(seri, 2).tolist()
+
+
+class LayananAnalitik:
+    """Service class for vectorized spending analytics"""
+
+    @staticmethod
+    def tersedia():
+        return np is not None
+
+    @staticmethod
+    def analisis(user_id, sampai, hari=365):
+        """Daily and weekly series, moving averages, kategori shares and a month-end forecast"""
+        dari = sampai - timedelta(days=hari - 1)
+        pemasukan, pengeluaran = kolomHarian(user_id, dari, sampai)
+
+        # Calendar weeks, Monday first
+        geser = dari.weekday()
+        mingguan = np.bincount((np.arange(hari) + geser) // 7, weights=pengeluaran)
+
+        return {
+            'user_id': user_id,
+            'dari': dari.isoformat(),
+            'sampai': sampai.isoformat(),
+            'harian': {
+                'mulai': dari.isoformat(),
+                'pengeluaran': bulat(pengeluaran),
+                'pemasukan': bulat(pemasukan),
+                'rata_7': bulat(rataBergerak(pengeluaran, 7)),
+                'rata_30': bulat(rataBergerak(pengeluaran, 30)),
+            },
+            'mingguan': {
+                'mulai': (dari - timedelta(days=geser)).isoformat(),
+                'pengeluaran': bulat(mingguan),
+            },
+            'kategori': LayananAnalitik.porsiKategori(*kolomBulanan(user_id, dari, sampai)),
+            'prakiraan': LayananAnalitik.prakiraanAkhirBulan(dari, sampai, pengeluaran),
+        }
+
+    @staticmethod
+    def porsiKategori(bulan, kategori, total):
+        """Each kategori's share of every month's spending; months are whole calendar months"""
+        daftar_bulan, baris_bulan = np.unique(bulan, return_inverse=True)
+        kode, kode_baris = np.unique(kategori, return_inverse=True)
+        matriks = np.bincount(
+            baris_bulan * len(kode) + kode_baris, weights=total, minlength=len(daftar_bulan) * len(kode)
+        ).reshape(len(daftar_bulan), len(kode)).astype(float)
+        per_bulan = matriks.sum(axis=1, keepdims=True)
+        porsi = np.divide(matriks, per_bulan, out=np.zeros_like(matriks), where=per_bulan > 0)
+        nama = dict(Kategori.objects.filter(pk__in=[k for k in kode.tolist() if k]).values_list('pk', 'nama'))
+        return {
+            'bulan': [str(b) for b in daftar_bulan],
+            'kategori': [{'id': k or None, 'nama': nama.get(k, "Tanpa kategori")} for k in kode.tolist()],
+            'total': bulat(matriks),
+            'porsi': np.round(porsi, 4).tolist(),
+        }
+
+    @staticmethod
+    def prakiraanAkhirBulan(dari, sampai, pengeluaran):
+        """Forecast the month's total spending from the days so far.
+
+        'musiman' adds, for each remaining day, the mean spend of that weekday
+        over the last HARI_PROFIL days; 'linear' extrapolates the trend of the
+        complete months in the window (None with fewer than two).
+        """
+        hari = len(pengeluaran)
+        awal_bulan = sampai.replace(day=1)
+        sisa = calendar.monthrange(sampai.year, sampai.month)[1] - sampai.day
+        terpakai = float(pengeluaran[max((awal_bulan - dari).days, 0):].sum())
+
+        profil_dari = max(hari - HARI_PROFIL, 0)
+        hari_minggu = (np.arange(hari) + dari.weekday()) % 7
+        jumlah_hari = np.bincount(hari_minggu[profil_dari:], minlength=7)
+        profil = np.divide(
+            np.bincount(hari_minggu[profil_dari:], weights=pengeluaran[profil_dari:], minlength=7),
+            jumlah_hari, out=np.zeros(7), where=jumlah_hari > 0,
+        )
+        musiman = terpakai + float(profil[(sampai.weekday() + 1 + np.arange(sisa)) % 7].sum())
+
+        # Complete months only: the current one is partial and the first may be clipped by dari
+        bulan_hari = (np.datetime64(dari, 'D') + np.arange(hari)).astype('datetime64[M]')
+        bulan, kode = np.unique(bulan_hari, return_inverse=True)
+        per_bulan = np.bincount(kode, weights=pengeluaran)
+        lengkap = per_bulan[1:-1] if dari.day != 1 else per_bulan[:-1]
+        linear = None
+        if len(lengkap) >= 2:
+            kemiringan, titik_potong = np.polyfit(np.arange(len(lengkap)), lengkap, 1)
+            linear = max(float(kemiringan * len(lengkap) + titik_potong), terpakai)
+
+        return {
+            'bulan': awal_bulan.strftime('%Y-%m'),
+            'terpakai': round(terpakai, 2),
+            'sisa_hari': sisa,
+            'musiman': round(musiman, 2),
+            'linear': None if linear is None else round(linear, 2),
+        }
@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main'
+
+    def ready(self):
+        from .sqlite import terapkanPragma
+        connection_created.connect(terapkanPragma, dispatch_uid='main.sqlite.terapkanPragma')
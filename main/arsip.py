@@ -0,0 +1,182 @@
+"""Cold storage for old transactions: one archive table per year, outside the hot ledger"""
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q, prefetch_related_objects
+
+from .models import ArsipTahun, Kategori, PengelolaTransaksi, Transaksi, User
+
+KOLOM = [f.attname for f in Transaksi._meta.concrete_fields]
+
+
+def _tabelAda(model):
+    return model._meta.db_table in connection.introspection.table_names()
+
+
+def _buatTabel(model):
+    """CREATE TABLE and indexes of an archive model; plain DDL, so it also runs inside atomic()"""
+    editor = connection.schema_editor()
+    sql, params = editor.table_sql(model)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for indeks in model._meta.indexes:
+            cursor.execute(str(indeks.create_sql(model, editor)))
+
+
+def _pindahkan(sumber, tujuan):
+    """INSERT INTO tujuan ... SELECT the rows of the sumber queryset; returns how many moved"""
+    kolom = ', '.join(connection.ops.quote_name(k) for k in KOLOM)
+    sql, params = sumber.values_list(*KOLOM).query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {connection.ops.quote_name(tujuan._meta.db_table)} ({kolom}) {sql}", params)
+        return cursor.rowcount
+
+
+def _saring(model, user=None, dari=None, sampai=None, tipe=None, kategori=None):
+    """saringTransaksi for an archive table"""
+    baris = model.objects.all()
+    if user is not None:
+        baris = baris.filter(user_id=getattr(user, 'pk', user))
+    if dari is not None:
+        baris = baris.filter(tanggal__gte=dari)
+    if sampai is not None:
+        baris = baris.filter(tanggal__lte=sampai)
+    if tipe is not None:
+        baris = baris.filter(tipe=tipe)
+    if kategori is not None:
+        baris = baris.filter(kategori_id=getattr(kategori, 'pk', kategori))
+    return baris
+
+
+def _tahunRelevan(dari=None, sampai=None, **filter):
+    """Archive models of the years overlapping [dari, sampai], newest first"""
+    return [
+        model for model in ArsipTahun.semuaModel()
+        if (dari is None or model.TAHUN >= dari.year) and (sampai is None or model.TAHUN <= sampai.year)
+    ]
+
+
+class PengelolaArsip:
+    """Service class for moving old transactions to the archive and reading them back"""
+
+    @staticmethod
+    def arsipkan(sebelum):
+        """Move every transaction dated before sebelum into its year's archive table.
+
+        Each year moves in one transaction: INSERT ... SELECT into the
+        archive, then one DELETE from main_transaksi. Balances, rollups and
+        the transaction counter already include these rows and stay as they
+        are; the owners' versi_ledger moves because their lists change.
+        Returns {tahun: rows moved}.
+        """
+        hasil = {}
+        for awal_tahun in Transaksi.objects.filter(tanggal__lt=sebelum).dates('tanggal', 'year'):
+            tahun = awal_tahun.year
+            batas = min(sebelum, date(tahun + 1, 1, 1))
+            model = ArsipTahun.modelTahun(tahun)
+            with transaction.atomic():
+                if not _tabelAda(model):
+                    _buatTabel(model)
+                baris = Transaksi.objects.filter(tanggal__gte=date(tahun, 1, 1), tanggal__lt=batas)
+                User.objects.filter(pk__in=baris.values('user_id')).update(versi_ledger=F('versi_ledger') + 1)
+                banyak = _pindahkan(baris, model)
+                baris.delete()
+                arsip, baru = ArsipTahun.objects.select_for_update().get_or_create(
+                    tahun=tahun, defaults={'sampai': batas, 'jumlah_transaksi': banyak},
+                )
+                if not baru:
+                    ArsipTahun.objects.filter(pk=tahun).update(
+                        sampai=max(arsip.sampai, batas), jumlah_transaksi=F('jumlah_transaksi') + banyak,
+                    )
+            hasil[tahun] = banyak
+        return hasil
+
+    @staticmethod
+    def pulihkan(tahun):
+        """Move an archived year back into main_transaksi and drop its table; returns how many rows"""
+        model = ArsipTahun.modelTahun(tahun)
+        with transaction.atomic():
+            if not ArsipTahun.objects.select_for_update().filter(pk=tahun).exists():
+                return 0
+            User.objects.filter(pk__in=model.objects.values('user_id')).update(versi_ledger=F('versi_ledger') + 1)
+            try:
+                with transaction.atomic():
+                    banyak = _pindahkan(model.objects.filter(user_id__in=User.objects.values('pk')), Transaksi)
+            except IntegrityError:
+                raise ValidationError(f"Arsip {tahun} bentrok dengan transaksi yang sudah ada")
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(model._meta.db_table)}")
+            ArsipTahun.objects.filter(pk=tahun).delete()
+        return banyak
+
+    @staticmethod
+    def batasArsip():
+        """Every archived transaction is dated before this; None without an archive"""
+        return ArsipTahun.objects.order_by('-sampai').values_list('sampai', flat=True).first()
+
+    @staticmethod
+    def ambilHalaman(cursor=None, ukuran=50, kolom=None, **filter):
+        """ambilHalamanTransaksi over saringTransaksi(**filter), continuing into the archive.
+
+        Archive tables are read only when the hot page runs out or reaches
+        archived dates, so recent pages cost what they did before.
+        """
+        halaman = PengelolaTransaksi.ambilHalamanTransaksi(
+            cursor=cursor, ukuran=ukuran, transaksi=PengelolaTransaksi.saringTransaksi(**filter), kolom=kolom,
+        )
+        batas = PengelolaArsip.batasArsip()
+        baris = halaman['transaksi']
+        if batas is None:
+            return halaman
+        if halaman['cursor_berikutnya']:
+            terakhir = baris[-1]['tanggal'] if kolom is not None else baris[-1].tanggal
+            if terakhir >= batas:
+                return halaman
+
+        arsip = PengelolaArsip._halamanArsip(cursor, ukuran + 1, kolom, filter)
+        kunci = (lambda b: (b['tanggal'], b['id'])) if kolom is not None else (lambda b: (b.tanggal, b.id))
+        gabungan = sorted(baris + arsip, key=kunci, reverse=True)
+        lanjut = len(gabungan) > ukuran or halaman['cursor_berikutnya'] is not None
+        gabungan = gabungan[:ukuran]
+        return {
+            'transaksi': gabungan,
+            'cursor_berikutnya': PengelolaTransaksi.buatCursor(gabungan[-1]) if lanjut and gabungan else None,
+        }
+
+    @staticmethod
+    def _halamanArsip(cursor, ukuran, kolom, filter):
+        """Up to ukuran archived rows after the cursor, newest first"""
+        posisi = Q()
+        if cursor:
+            tanggal, id = PengelolaTransaksi.bacaCursor(cursor)
+            posisi = Q(tanggal__lt=tanggal) | Q(tanggal=tanggal, id__lt=id)
+        hasil = []
+        # Years are disjoint, so the newest years fill the page first
+        for model in _tahunRelevan(**filter):
+            baris = _saring(model, **filter).filter(posisi).order_by('-tanggal', '-id')
+            if kolom is not None:
+                hasil += list(baris.values(*dict.fromkeys([*kolom, 'tanggal', 'id']))[:ukuran - len(hasil)])
+            else:
+                hasil += [
+                    Transaksi.from_db(connection.alias, KOLOM, nilai)
+                    for nilai in baris.values_list(*KOLOM)[:ukuran - len(hasil)]
+                ]
+            if len(hasil) >= ukuran:
+                break
+        if kolom is None:
+            prefetch_related_objects(hasil, 'kategori')
+            # Read-only here: deleting or editing goes through main_transaksi only
+            for trx in hasil:
+                trx.diarsipkan = True
+        return hasil
+
+    @staticmethod
+    def barisArsip(filter, kolom, chunk_size=2000):
+        """Archived rows matching filter as tuples of kolom, oldest first; kategori__nama is looked up"""
+        nama = dict(Kategori.objects.values_list('pk', 'nama')) if 'kategori__nama' in kolom else {}
+        dibaca = [k for k in kolom if k != 'kategori__nama']
+        for model in reversed(_tahunRelevan(**filter)):
+            for nilai in _saring(model, **filter).order_by('tanggal', 'id').values_list(*dibaca).iterator(chunk_size):
+                data = dict(zip(dibaca, nilai))
+                yield tuple(nama.get(data['kategori_id']) if k == 'kategori__nama' else data[k] for k in kolom)
@@ -0,0 +1,87 @@
+"""Per-user cache for balance and summary figures.
+
+Figures are cached per scope (a user id, or SEMUA for figures across all
+users) and per period. Writes invalidate exactly the keys their rollup
+deltas touch: the owner's and the all-users figures for that day, month,
+kategori and the all-time per-tipe totals.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+SEMUA = 'semua'
+_KOSONG = object()
+_STATISTIK = ('hit', 'miss', 'invalidasi')
+
+
+class CacheRingkasan:
+    """Read-through cache around LayananRingkasan / PengelolaTransaksi results"""
+
+    @staticmethod
+    def cache():
+        return caches[getattr(settings, 'RINGKASAN_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def kunci(user_id, jenis, periode=''):
+        return f"ringkasan:{SEMUA if user_id is None else user_id}:{jenis}:{periode}"
+
+    @classmethod
+    def ambil(cls, kunci, hitung):
+        """Return the cached value of kunci, computing and storing it on a miss"""
+        cache = cls.cache()
+        nilai = cache.get(kunci, _KOSONG)
+        if nilai is not _KOSONG:
+            cls._hitung('hit')
+            return nilai
+        cls._hitung('miss')
+        nilai = hitung()
+        cache.set(kunci, nilai, getattr(settings, 'RINGKASAN_CACHE_TIMEOUT', 300))
+        return nilai
+
+    @classmethod
+    def kunciTerdampak(cls, user_id, tanggal, kategori_id):
+        """Keys whose figures change when a (user, tanggal, kategori) rollup row changes"""
+        kunci = set()
+        for scope in (user_id, None):
+            kunci.add(cls.kunci(scope, 'tipe'))
+            kunci.add(cls.kunci(scope, 'hari', tanggal.isoformat()))
+            kunci.add(cls.kunci(scope, 'bulan', f"{tanggal:%Y-%m}"))
+            kunci.add(cls.kunci(scope, 'kategori', kategori_id or ''))
+        kunci.add(cls.kunci(user_id, 'saldo'))
+        return kunci
+
+    @classmethod
+    def hapus(cls, kunci):
+        """Delete keys now and again once the surrounding transaction commits"""
+        kunci = list(kunci)
+        if not kunci:
+            return
+        cls.cache().delete_many(kunci)
+        cls._hitung('invalidasi', len(kunci))
+        # A reader may refill a key with pre-commit data in between
+        transaction.on_commit(lambda: cls.cache().delete_many(kunci))
+
+    @classmethod
+    def hapusSemua(cls):
+        """Clear the whole alias, now and again once the transaction commits"""
+        cls.cache().clear()
+        transaction.on_commit(lambda: cls.cache().clear())
+
+    @classmethod
+    def statistik(cls):
+        """Hit/miss/invalidation counters shared by every process using the cache"""
+        nilai = cls.cache().get_many([f"ringkasan:statistik:{nama}" for nama in _STATISTIK])
+        hasil = {nama: nilai.get(f"ringkasan:statistik:{nama}", 0) for nama in _STATISTIK}
+        baca = hasil['hit'] + hasil['miss']
+        hasil['rasio_hit'] = hasil['hit'] / baca if baca else None
+        return hasil
+
+    @classmethod
+    def _hitung(cls, nama, jumlah=1):
+        cache = cls.cache()
+        kunci = f"ringkasan:statistik:{nama}"
+        try:
+            cache.incr(kunci, jumlah)
+        except ValueError:
+            if not cache.add(kunci, jumlah, timeout=None):
+                cache.incr(kunci, jumlah)
@@ -0,0 +1,61 @@
+"""Streaming CSV/NDJSON export of the transaction ledger"""
+import csv
+import heapq
+import json
+from operator import itemgetter
+
+from .arsip import PengelolaArsip
+from .models import PengelolaTransaksi
+
+KOLOM = (
+    'id', 'user_id', 'tanggal', 'jumlah', 'tipe', 'kategori', 'kategori_nama',
+    'catatan', 'sumber_pemasukan', 'metode_pembayaran',
+)
+FORMAT_EKSPOR = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Gema:
+    """File-like object whose write() hands the line back to the caller"""
+    def write(self, value):
+        return value
+
+
+KOLOM_BACA = (
+    'id', 'user_id', 'tanggal', 'jumlah', 'tipe', 'kategori_id', 'kategori__nama',
+    'catatan', 'sumber_pemasukan', 'metode_pembayaran',
+)
+
+
+def barisTransaksi(filter, chunk_size=2000):
+    """Yield ledger rows as tuples in KOLOM order, one chunked server-side query.
+
+    Archived rows are merged in by (tanggal, id), so an export still covers
+    the whole ledger.
+    """
+    transaksi = PengelolaTransaksi.saringTransaksi(**filter).order_by('tanggal', 'id').values_list(*KOLOM_BACA)
+    if PengelolaArsip.batasArsip() is None:
+        return transaksi.iterator(chunk_size=chunk_size)
+    return heapq.merge(
+        PengelolaArsip.barisArsip(filter, KOLOM_BACA, chunk_size), transaksi.iterator(chunk_size=chunk_size),
+        key=itemgetter(2, 0),
+    )
+
+
+def eksporCsv(filter, chunk_size=2000):
+    """Yield CSV lines; the header is produced before the query runs"""
+    penulis = csv.writer(_Gema())
+    yield penulis.writerow(KOLOM)
+    for baris in barisTransaksi(filter, chunk_size):
+        yield penulis.writerow(['' if nilai is None else nilai for nilai in baris])
+
+
+def eksporNdjson(filter, chunk_size=2000):
+    """Yield one JSON object per line"""
+    for baris in barisTransaksi(filter, chunk_size):
+        data = dict(zip(KOLOM, baris))
+        data['tanggal'] = data['tanggal'].isoformat()
+        data['jumlah'] = str(data['jumlah'])
+        yield json.dumps(data) + '\n'
@@ -0,0 +1,193 @@
+"""Streaming bulk import of transactions from CSV or NDJSON files"""
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.db.models import Q
+
+from .models import User, Kategori, Transaksi, TipeTransaksi, PengelolaTransaksi, buatId
+
+FORMAT_DIDUKUNG = ('csv', 'ndjson')
+
+
+def tebakFormat(nama_berkas):
+    """Guess the import format from a file name, defaulting to CSV"""
+    nama = (nama_berkas or '').lower()
+    if nama.endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return 'csv'
+
+
+class ImporTransaksi:
+    """Parse, validate and insert transactions batch by batch in bounded memory"""
+    MAKS_GALAT = 100
+
+    def __init__(self, user_bawaan=None, batch_size=1000, batasi_user=False):
+        # With batasi_user every row belongs to user_bawaan; rows naming another user_id are rejected
+        if batasi_user and user_bawaan is None:
+            raise ValueError("batasi_user butuh user_bawaan")
+        self.user_bawaan = user_bawaan
+        self.batch_size = batch_size
+        self.batasi_user = batasi_user
+        self.hasil = {'dibaca': 0, 'ditambahkan': 0, 'duplikat': 0, 'gagal': 0, 'galat': []}
+
+    def dariBerkas(self, berkas, format='csv'):
+        """Import from a binary file object; returns the result counters.
+
+        A file that stops decoding as UTF-8 or parsing as CSV part way is
+        not read further: the rows before it are still imported and the
+        point where reading stopped is reported in galat.
+        """
+        teks = io.TextIOWrapper(berkas, encoding='utf-8-sig', newline='')
+        self._nomor = 0
+        batch = []
+        try:
+            try:
+                for item in self._baca(teks, format):
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        self._prosesBatch(batch)
+                        batch = []
+            except UnicodeDecodeError:
+                galat = "Berkas bukan UTF-8 yang valid; sisa berkas tidak dibaca"
+            except csv.Error as e:
+                galat = f"CSV tidak valid ({e}); sisa berkas tidak dibaca"
+            else:
+                galat = None
+            if batch:
+                self._prosesBatch(batch)
+            if galat:
+                self._catatGalat(self._nomor + 1, galat)
+        finally:
+            # Leave the underlying upload/file open for its owner
+            teks.detach()
+        return self.hasil
+
+    def _baca(self, teks, format):
+        if format == 'csv':
+            for nomor, data in enumerate(csv.DictReader(teks), start=2):
+                self._nomor = nomor
+                yield nomor, data
+        elif format == 'ndjson':
+            for nomor, line in enumerate(teks, start=1):
+                self._nomor = nomor
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    data = None
+                yield nomor, data
+        else:
+            raise ValueError(f"Format tidak didukung: {format}")
+
+    def _catatGalat(self, nomor, pesan, jumlah=1):
+        self.hasil['gagal'] += jumlah
+        if len(self.hasil['galat']) < self.MAKS_GALAT:
+            self.hasil['galat'].append({'baris': nomor, 'pesan': pesan})
+
+    def _prosesBatch(self, batch):
+        self.hasil['dibaca'] += len(batch)
+
+        # Resolve every referenced kategori and user with one query each
+        kategori_ids = {str(d.get('kategori')) for _, d in batch if isinstance(d, dict) and d.get('kategori')}
+        user_ids = {str(d.get('user_id')) for _, d in batch if isinstance(d, dict) and d.get('user_id')}
+        kategori_ada = set(Kategori.objects.filter(id__in=kategori_ids).values_list('id', flat=True))
+        user_ada = {str(pk) for pk in User.objects.filter(pk__in=[u for u in user_ids if u.isdigit()])
+                    .values_list('pk', flat=True)}
+
+        transaksi = {}
+        id_dipakai = set()
+        for nomor, data in batch:
+            try:
+                trx = self._buatTransaksi(data, kategori_ada, user_ada)
+            except ValidationError as e:
+                self._catatGalat(nomor, ' '.join(e.messages))
+                continue
+            trx.hash_konten = trx.hitungHashKonten()
+            if trx.hash_konten in transaksi or trx.id in id_dipakai:
+                self.hasil['duplikat'] += 1
+                continue
+            transaksi[trx.hash_konten] = trx
+            id_dipakai.add(trx.id)
+
+        for percobaan in range(2):
+            # Skip rows whose content hash or explicit id is already stored
+            sudah_ada = Transaksi.objects.filter(
+                Q(hash_konten__in=list(transaksi)) | Q(id__in=[trx.id for trx in transaksi.values()])
+            ).values_list('hash_konten', 'id')
+            hash_per_id = {trx.id: kunci for kunci, trx in transaksi.items()}
+            for hash_konten, id in sudah_ada:
+                for kunci in {hash_konten, hash_per_id.get(id)}:
+                    if kunci in transaksi:
+                        del transaksi[kunci]
+                        self.hasil['duplikat'] += 1
+            try:
+                PengelolaTransaksi.tambahTransaksiMassal(transaksi.values())
+            except IntegrityError:
+                # A concurrent import inserted some of these rows; filter again
+                if percobaan:
+                    raise
+                continue
+            except ValidationError as e:
+                self._catatGalat(batch[0][0], f"Batch ditolak: {' '.join(e.messages)}", len(transaksi))
+                return
+            break
+        self.hasil['ditambahkan'] += len(transaksi)
+
+    def _buatTransaksi(self, data, kategori_ada, user_ada):
+        if not isinstance(data, dict):
+            raise ValidationError("Baris bukan objek yang valid")
+
+        tipe = (data.get('tipe') or '').strip().upper()
+        if tipe not in TipeTransaksi.values:
+            raise ValidationError(f"Tipe tidak valid: {data.get('tipe')!r}")
+
+        try:
+            jumlah = Decimal(str(data.get('jumlah')).strip())
+        except (InvalidOperation, ValueError):
+            raise ValidationError(f"Jumlah tidak valid: {data.get('jumlah')!r}")
+        if not jumlah.is_finite() or jumlah <= 0:
+            raise ValidationError(f"Jumlah harus positif: {data.get('jumlah')!r}")
+
+        try:
+            tanggal = date.fromisoformat(str(data.get('tanggal')).strip())
+        except ValueError:
+            raise ValidationError(f"Tanggal tidak valid: {data.get('tanggal')!r}")
+
+        kategori_id = str(data['kategori']) if data.get('kategori') else None
+        if kategori_id is not None and kategori_id not in kategori_ada:
+            raise ValidationError(f"Kategori tidak ditemukan: {kategori_id}")
+
+        if data.get('user_id'):
+            user_id = str(data['user_id'])
+            if self.batasi_user and user_id != str(self.user_bawaan.pk):
+                raise ValidationError(f"Baris untuk user lain: {user_id}")
+            if user_id not in user_ada:
+                raise ValidationError(f"User tidak ditemukan: {user_id}")
+            user_id = int(user_id)
+        elif self.user_bawaan is not None:
+            user_id = self.user_bawaan.pk
+        else:
+            raise ValidationError("Baris tanpa user_id dan tidak ada user bawaan")
+
+        trx = Transaksi(
+            id=str(data['id']) if data.get('id') else buatId(),
+            jumlah=jumlah,
+            tanggal=tanggal,
+            tipe=tipe,
+            kategori_id=kategori_id,
+            user_id=user_id,
+            catatan=data.get('catatan') or None,
+            sumber_pemasukan=(data.get('sumber_pemasukan') or None) if tipe == TipeTransaksi.PEMASUKAN else None,
+            metode_pembayaran=(data.get('metode_pembayaran') or None) if tipe == TipeTransaksi.PENGELUARAN else None,
+        )
+        try:
+            trx.clean_fields(exclude=['user', 'kategori'])
+        except ValidationError as e:
+            raise ValidationError([f"{k}: {' '.join(v)}" for k, v in e.message_dict.items()])
+        return trx
@@ -0,0 +1,38 @@
+"""Helpers shared by the bench_* commands; the leading underscore keeps Django from listing it as a command"""
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from main.cache import CacheRingkasan
+from main.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def dibatalkan():
+    """Run the block in a transaction that is always rolled back.
+
+    The rollback never runs the on-commit cache invalidation, so summaries
+    cached from the bench data are dropped here, even if the block fails.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+    finally:
+        CacheRingkasan.cache().clear()
+
+
+def buatUserBench(jumlah, saldo):
+    """jumlah throwaway users with emails that cannot clash with real or earlier bench rows"""
+    awalan = time.time_ns()
+    return User.objects.bulk_create(
+        User(nama=f"Bench {i}", email=f"bench-{awalan}-{i}@example.com", saldo=saldo)
+        for i in range(jumlah)
+    )
@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from main.arsip import PengelolaArsip
+
+
+def awalBulanLalu(bulan, hari_ini=None):
+    """First day of the month that lies bulan months before hari_ini's"""
+    hari_ini = hari_ini or date.today()
+    indeks = hari_ini.year * 12 + hari_ini.month - 1 - bulan
+    return date(indeks // 12, indeks % 12 + 1, 1)
+
+
+class Command(BaseCommand):
+    help = ("Move transactions dated before a cutoff into per-year archive tables; "
+            "balances and monthly rollups keep counting them")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sebelum', help="Archive transactions dated before this, YYYY-MM-DD "
+                                              "(default: ARSIP_BULAN_PANAS months ago)")
+        parser.add_argument('--pulihkan', type=int, metavar='TAHUN',
+                            help="Move an archived year back into the ledger instead")
+
+    def handle(self, *args, **options):
+        if options['pulihkan'] is not None:
+            try:
+                banyak = PengelolaArsip.pulihkan(options['pulihkan'])
+            except ValidationError as e:
+                raise CommandError(e.messages[0])
+            self.stdout.write(self.style.SUCCESS(f"{banyak} transaksi dipulihkan dari arsip {options['pulihkan']}"))
+            return
+
+        try:
+            sebelum = (date.fromisoformat(options['sebelum']) if options['sebelum']
+                       else awalBulanLalu(getattr(settings, 'ARSIP_BULAN_PANAS', 24)))
+        except ValueError:
+            raise CommandError("--sebelum harus berformat YYYY-MM-DD")
+        hasil = PengelolaArsip.arsipkan(sebelum)
+        for tahun, banyak in sorted(hasil.items()):
+            self.stdout.write(f"{tahun}: {banyak} transaksi diarsipkan")
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(hasil.values())} transaksi sebelum {sebelum.isoformat()} diarsipkan"
+        ))
@@ -0,0 +1,433 @@
+import inspect
+import json
+import platform
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, get_resolver
+
+from main.cache import CacheRingkasan
+from main.models import (
+    User, Kategori, Transaksi, TipeTransaksi, TransaksiPengeluaran,
+    PengelolaKategori, PengelolaTransaksi, PengelolaSaldo, PengelolaAnggaran, PengelolaBerulang, LayananRingkasan, buatId,
+)
+from main.sintetis import buatLedgerSintetis
+from reports.models import PengelolaLaporan
+
+from ._bench import dibatalkan
+
+LAYANAN = (
+    PengelolaKategori, PengelolaTransaksi, PengelolaSaldo, PengelolaAnggaran, PengelolaBerulang, LayananRingkasan,
+)
+
+
+def persentil(nilai, p):
+    """Linear-interpolated percentile of a sorted list"""
+    if len(nilai) == 1:
+        return nilai[0]
+    posisi = (len(nilai) - 1) * p / 100
+    bawah = int(posisi)
+    atas = min(bawah + 1, len(nilai) - 1)
+    return nilai[bawah] + (nilai[atas] - nilai[bawah]) * (posisi - bawah)
+
+
+def ruteBernama(pola_daftar, awalan='', namespace=''):
+    """(name, route, has parameters) of every named route outside the admin"""
+    for pola in pola_daftar:
+        if isinstance(pola, URLPattern):
+            if pola.name:
+                yield f"{namespace}{pola.name}", f"{awalan}{pola.pattern}", bool(pola.pattern.converters)
+        elif pola.namespace != 'admin':
+            ns = f"{namespace}{pola.namespace}:" if pola.namespace else namespace
+            yield from ruteBernama(pola.url_patterns, f"{awalan}{pola.pattern}", ns)
+
+
+class Skenario:
+    """One timed target: siapkan(i) runs untimed and its result is passed to jalankan"""
+
+    def __init__(self, nama, jalankan, siapkan=None, ulang=None):
+        self.nama = nama
+        self.jalankan = jalankan
+        self.siapkan = siapkan or (lambda i: None)
+        self.ulang = ulang
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic ledger, then time every URL and service method and report "
+        "latency percentiles and query counts (rolled back afterwards)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=20, help="Synthetic users to seed")
+        parser.add_argument('--kategori', type=int, default=10, help="Synthetic kategori to seed")
+        parser.add_argument('--transaksi', type=int, default=20000, help="Synthetic transactions to seed")
+        parser.add_argument('--hari', type=int, default=730, help="Days of history to spread them over")
+        parser.add_argument('--ulang', type=int, default=30, help="Timed runs per target")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--saring', help="Only run targets whose name contains this text")
+        parser.add_argument('--cache-hangat', action='store_true',
+                            help="Keep the summary cache between runs instead of clearing it before each one")
+        parser.add_argument('--output', help="Write the results as JSON to this path")
+        parser.add_argument('--bandingkan', help="Baseline JSON from an earlier --output to compare against")
+        parser.add_argument('--ambang', type=float, default=0.25,
+                            help="Relative p95 slowdown that counts as a regression")
+        parser.add_argument('--lantai', type=float, default=1.0,
+                            help="Ignore p95 differences smaller than this many milliseconds")
+
+    def handle(self, *args, **options):
+        with dibatalkan():
+            hasil = self.jalankan(options)
+
+        if options['output']:
+            with open(options['output'], 'w') as berkas:
+                json.dump(hasil, berkas, indent=2)
+            self.stdout.write(f"Hasil ditulis ke {options['output']}")
+
+        if options['bandingkan']:
+            with open(options['bandingkan']) as berkas:
+                dasar = json.load(berkas)['hasil']
+            if options['saring']:
+                dasar = {nama: h for nama, h in dasar.items() if options['saring'] in nama}
+            regresi = self.bandingkan(dasar, hasil['hasil'], options['ambang'], options['lantai'])
+            if regresi:
+                raise CommandError(f"{len(regresi)} regresi: {', '.join(regresi)}")
+
+    def jalankan(self, options):
+        mulai = time.perf_counter()
+        users, kategori = buatLedgerSintetis(
+            jumlah_user=options['user'], jumlah_kategori=options['kategori'],
+            jumlah_transaksi=options['transaksi'], hari=options['hari'], seed=options['seed'],
+        )
+        durasi_seed = time.perf_counter() - mulai
+        self.stdout.write(
+            f"Seed: {options['user']} user, {options['kategori']} kategori, "
+            f"{options['transaksi']} transaksi dalam {durasi_seed:.2f} s"
+        )
+
+        skenario = self.skenarioUrl(users, kategori) + self.skenarioLayanan(users, kategori)
+        if options['saring']:
+            skenario = [s for s in skenario if options['saring'] in s.nama]
+
+        hasil = {}
+        self.stdout.write(f"{'target':<58}{'p50':>9}{'p95':>9}{'p99':>9}{'kueri':>7}")
+        for s in skenario:
+            hasil[s.nama] = self.ukur(s, s.ulang or options['ulang'], options['cache_hangat'])
+            h = hasil[s.nama]
+            self.stdout.write(
+                f"{s.nama:<58}{h['p50_ms']:>9.2f}{h['p95_ms']:>9.2f}{h['p99_ms']:>9.2f}{h['kueri']:>7}"
+                + (f"  status {h['status']}" if h.get('status', 200) >= 400 else '')
+            )
+
+        return {
+            'meta': {
+                'waktu': datetime.now().isoformat(timespec='seconds'),
+                'vendor': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'seed_detik': round(durasi_seed, 3),
+                **{k: options[k] for k in ('user', 'kategori', 'transaksi', 'hari', 'ulang', 'seed', 'cache_hangat')},
+            },
+            'hasil': hasil,
+        }
+
+    def ukur(self, skenario, ulang, cache_hangat):
+        durasi, kueri, status = [], [], None
+        jumlah = [0]
+
+        def hitungKueri(execute, sql, params, many, context):
+            jumlah[0] += 1
+            return execute(sql, params, many, context)
+
+        for i in range(ulang):
+            if not cache_hangat:
+                CacheRingkasan.cache().clear()
+            data = skenario.siapkan(i)
+            jumlah[0] = 0
+            with connection.execute_wrapper(hitungKueri):
+                mulai = time.perf_counter()
+                keluaran = skenario.jalankan(data)
+                durasi.append((time.perf_counter() - mulai) * 1000)
+            kueri.append(jumlah[0])
+            if hasattr(keluaran, 'status_code'):
+                status = max(status or 0, keluaran.status_code)
+
+        durasi.sort()
+        hasil = {
+            'ulang': ulang,
+            'p50_ms': round(persentil(durasi, 50), 3),
+            'p95_ms': round(persentil(durasi, 95), 3),
+            'p99_ms': round(persentil(durasi, 99), 3),
+            'maks_ms': round(durasi[-1], 3),
+            'rata_ms': round(sum(durasi) / len(durasi), 3),
+            'kueri': max(kueri),
+        }
+        if status is not None:
+            hasil['status'] = status
+        return hasil
+
+    def skenarioUrl(self, users, kategori):
+        """One scenario per named route, so new routes are never silently left out"""
+        client = Client(SERVER_NAME='localhost')
+        hari_ini = date.today()
+        bulan_lalu = hari_ini.replace(day=1) - timedelta(days=1)
+
+        def get(path, **query):
+            def jalankan(_):
+                respons = client.get(path, query)
+                if respons.streaming:
+                    b''.join(respons.streaming_content)
+                return respons
+            return jalankan
+
+        def transaksiSementara(i):
+            trx = TransaksiPengeluaran(
+                id=buatId(), jumlah=Decimal('1.00'), tanggal=hari_ini,
+                kategori=kategori[0] if kategori else None, user=users[0],
+            )
+            trx.save()
+            return trx.pk
+
+        def kategoriSementara(i):
+            return Kategori.objects.create(id=f"bench-hapus-{buatId()}", nama="Bench").pk
+
+        def etagApi(i):
+            return client.get('/api/transaksi/', {'user': users[0].pk})['ETag']
+
+        def laporanSelesai(i):
+            pekerjaan = PengelolaLaporan.ajukan(users[0], bulan_lalu.month, bulan_lalu.year)
+            PengelolaLaporan.jalankan(pekerjaan)
+            return pekerjaan.pk
+
+        halaman_kedua = PengelolaTransaksi.ambilHalamanTransaksi()['cursor_berikutnya']
+        ekspor = {'user': users[0].pk, 'dari': bulan_lalu.replace(day=1).isoformat(), 'sampai': hari_ini.isoformat()}
+        berkas_impor = (
+            "id,tipe,jumlah,tanggal,kategori,user_id\n"
+            + ''.join(
+                f"{{id}}-{n},PENGELUARAN,1000.00,{hari_ini},{kategori[0].pk if kategori else ''},{users[0].pk}\n"
+                for n in range(100)
+            )
+        )
+
+        def impor(_):
+            from django.core.files.uploadedfile import SimpleUploadedFile
+            isi = berkas_impor.replace('{id}', buatId()).encode()
+            return client.post(
+                '/transaksi/import/', {'berkas': SimpleUploadedFile('bench.csv', isi)},
+                HTTP_ACCEPT='application/json',
+            )
+
+        varian = {
+            'show_main': [('', get('/'))],
+            'kategori_list': [('', get('/kategori/'))],
+            'kategori_create': [
+                ('GET', get('/kategori/create/')),
+                ('POST', lambda _: client.post(
+                    '/kategori/create/', {'id': f"bench-{buatId()}", 'nama': "Bench", 'ikon': '', 'warna': '#000000'})),
+            ],
+            'kategori_delete': [('', lambda pk: client.get(f'/kategori/delete/{pk}/'), kategoriSementara)],
+            'transaksi_list': [
+                ('halaman pertama', get('/transaksi/')),
+                ('halaman kedua', get('/transaksi/', cursor=halaman_kedua or '')),
+            ],
+            'transaksi_delete': [('', lambda pk: client.get(f'/transaksi/delete/{pk}/'), transaksiSementara)],
+            'transaksi_create': [
+                ('GET', get('/transaksi/create/')),
+                ('POST', lambda _: client.post('/transaksi/create/', {
+                    'id': buatId(), 'jumlah': '1000.00', 'tanggal': hari_ini.isoformat(),
+                    'tipe': TipeTransaksi.PEMASUKAN, 'sumber_pemasukan': 'Bench',
+                })),
+            ],
+            'transaksi_import': [('GET', get('/transaksi/import/')), ('POST 100 baris', impor)],
+            'transaksi_export': [
+                ('csv satu user sebulan', get('/transaksi/export/', **ekspor)),
+                ('ndjson satu user sebulan', get('/transaksi/export/', format='ndjson', **ekspor)),
+            ],
+            'summary': [
+                ('', get('/summary/', bulan=bulan_lalu.month, tahun=bulan_lalu.year)),
+                ('detail', get('/summary/', bulan=bulan_lalu.month, tahun=bulan_lalu.year, detail=1)),
+            ],
+            'api_test': [('', get('/api/test/'))],
+            'api_cache_stats': [('', get('/api/cache/stats/'))],
+            'saldo': [('', get('/saldo/'))],
+            'transactions:transaksi_koleksi': [
+                ('GET', get('/api/transaksi/', user=users[0].pk)),
+                ('GET fields', get('/api/transaksi/', user=users[0].pk, fields='id,jumlah,tanggal')),
+                ('GET 304', lambda etag: client.get(
+                    '/api/transaksi/', {'user': users[0].pk}, HTTP_IF_NONE_MATCH=etag), etagApi),
+                ('POST', lambda _: client.post(f'/api/transaksi/?user={users[0].pk}', json.dumps({
+                    'jumlah': '1.00', 'tanggal': hari_ini.isoformat(), 'tipe': TipeTransaksi.PEMASUKAN,
+                }), content_type='application/json')),
+            ],
+            'transactions:transaksi_cari': [
+                ('umum', get('/api/transaksi/cari/', user=users[0].pk, q='belanja')),
+                ('jarang', get('/api/transaksi/cari/', user=users[0].pk, q='belanja 123')),
+            ],
+            'transactions:transaksi_item': [
+                ('GET', lambda pk: client.get(f'/api/transaksi/{pk}/', {'user': users[0].pk}), transaksiSementara),
+                ('DELETE', lambda pk: client.delete(f'/api/transaksi/{pk}/?user={users[0].pk}'), transaksiSementara),
+            ],
+            'reports:ajukan_laporan': [('', lambda _: client.post(f'/reports/bulanan/?user={users[0].pk}', {
+                'bulan': bulan_lalu.month, 'tahun': bulan_lalu.year}))],
+            'reports:status_pekerjaan': [(
+                '', lambda pk: client.get(f'/reports/pekerjaan/{pk}/', {'user': users[0].pk}), laporanSelesai,
+            )],
+            'reports:laporan_bulanan': [(
+                '', get(f'/reports/bulanan/{bulan_lalu.year}/{bulan_lalu.month}/', user=users[0].pk), laporanSelesai,
+            )],
+        }
+
+        skenario = []
+        for nama_rute, rute, berparameter in ruteBernama(get_resolver().url_patterns):
+            if nama_rute not in varian:
+                if berparameter:
+                    self.stderr.write(f"Rute {nama_rute} butuh parameter dan belum punya skenario; dilewati")
+                    continue
+                varian[nama_rute] = [('', get(f"/{rute}"))]
+            for label, jalankan, *siapkan in varian[nama_rute]:
+                nama = f"url:{nama_rute}" + (f" [{label}]" if label else '')
+                skenario.append(Skenario(nama, jalankan, *siapkan))
+        return skenario
+
+    def skenarioLayanan(self, users, kategori):
+        """One or more scenarios per public service method"""
+        hari_ini = date.today()
+        bulan_lalu = hari_ini.replace(day=1) - timedelta(days=1)
+        user = users[0]
+        kat = kategori[0] if kategori else None
+
+        def pengeluaran(i=None, jumlah='1.00'):
+            return TransaksiPengeluaran(id=buatId(), jumlah=Decimal(jumlah), tanggal=hari_ini, kategori=kat, user=user)
+
+        def tersimpan(i):
+            trx = pengeluaran()
+            trx.save()
+            return trx
+
+        def kategoriBaru(i):
+            return Kategori(id=f"bench-{buatId()}", nama="Bench")
+
+        def kategoriTersimpan(i):
+            return Kategori.objects.create(id=f"bench-{buatId()}", nama="Bench")
+
+        def segar(i):
+            return User.objects.get(pk=user.pk)
+
+        def anggaranTerpasang(i):
+            PengelolaAnggaran.aturAnggaran(user, kat, '1000000000.00')
+            return [(user.pk, hari_ini, TipeTransaksi.PENGELUARAN, kat.pk, Decimal('1.00'), 1)]
+
+        def aturanTertunda(i):
+            # 100 monthly rules a year behind, so each run catches up 1200 occurrences
+            awal = (hari_ini - timedelta(days=365)).replace(day=1)
+            for n in range(100):
+                PengelolaBerulang.buatAturan(pengeluaran(jumlah='0.01'), hari_bulan=n % 28 + 1, mulai=awal,
+                                             berakhir=hari_ini - timedelta(days=1))
+
+        def transfer(jumlah):
+            def siapkan(i):
+                return [(users[n % len(users)], users[(n + 1) % len(users)], Decimal('1.00')) for n in range(jumlah)]
+            return siapkan
+
+        daftar = [
+            ('PengelolaKategori.ambilSemuaKategori', lambda _: PengelolaKategori.ambilSemuaKategori()),
+            ('PengelolaKategori.tambahKategori', PengelolaKategori.tambahKategori, kategoriBaru),
+            ('PengelolaKategori.perbaruiKategori', PengelolaKategori.perbaruiKategori, kategoriTersimpan),
+            ('PengelolaKategori.hapusKategori', lambda k: PengelolaKategori.hapusKategori(k.pk), kategoriTersimpan),
+
+            ('PengelolaTransaksi.tambahTransaksi', PengelolaTransaksi.tambahTransaksi, pengeluaran),
+            ('PengelolaTransaksi.tambahTransaksiMassal [100]', PengelolaTransaksi.tambahTransaksiMassal,
+             lambda i: [pengeluaran() for _ in range(100)]),
+            ('PengelolaTransaksi.hapusTransaksi', lambda trx: PengelolaTransaksi.hapusTransaksi(trx.pk), tersimpan),
+            ('PengelolaTransaksi.perbaruiTransaksi', PengelolaTransaksi.perbaruiTransaksi, tersimpan),
+            ('PengelolaTransaksi.ambilTransaksiBerdasarkanTanggal',
+             lambda _: list(PengelolaTransaksi.ambilTransaksiBerdasarkanTanggal(bulan_lalu))),
+            ('PengelolaTransaksi.ambilTransaksiBerdasarkanBulan',
+             lambda _: list(PengelolaTransaksi.ambilTransaksiBerdasarkanBulan(bulan_lalu.month, bulan_lalu.year))),
+            ('PengelolaTransaksi.ambilTransaksiBerdasarkanKategori',
+             lambda _: list(PengelolaTransaksi.ambilTransaksiBerdasarkanKategori(kat)[:500])),
+            ('PengelolaTransaksi.saringTransaksi',
+             lambda _: list(PengelolaTransaksi.saringTransaksi(
+                 user=user, dari=bulan_lalu.replace(day=1), sampai=bulan_lalu, tipe=TipeTransaksi.PENGELUARAN))),
+            ('PengelolaTransaksi.ambilHalamanTransaksi', lambda _: PengelolaTransaksi.ambilHalamanTransaksi()),
+            ('PengelolaTransaksi.buatCursor', PengelolaTransaksi.buatCursor, lambda i: Transaksi.objects.first()),
+            ('PengelolaTransaksi.bacaCursor', PengelolaTransaksi.bacaCursor,
+             lambda i: PengelolaTransaksi.buatCursor(Transaksi.objects.first())),
+            ('PengelolaTransaksi.hitungTotalBerdasarkanTipe',
+             lambda _: PengelolaTransaksi.hitungTotalBerdasarkanTipe(TipeTransaksi.PENGELUARAN)),
+
+            ('PengelolaSaldo.depositSaldo', lambda u: PengelolaSaldo.depositSaldo(u, Decimal('1.00')), segar),
+            ('PengelolaSaldo.cekSaldoUser', PengelolaSaldo.cekSaldoUser, segar),
+            ('PengelolaSaldo.transferSaldo', lambda t: PengelolaSaldo.transferSaldo(*t[0]), transfer(1)),
+            ('PengelolaSaldo.transferMassal [100]', PengelolaSaldo.transferMassal, transfer(100)),
+
+            ('PengelolaAnggaran.aturAnggaran', lambda _: PengelolaAnggaran.aturAnggaran(user, kat, '1000000000.00')),
+            ('PengelolaAnggaran.hapusAnggaran', lambda _: PengelolaAnggaran.hapusAnggaran(user, kat),
+             lambda i: PengelolaAnggaran.aturAnggaran(user, kat, '1000000000.00')),
+            ('PengelolaAnggaran.periksaAnggaran', PengelolaAnggaran.periksaAnggaran, anggaranTerpasang),
+            ('PengelolaAnggaran.statusAnggaran',
+             lambda _: PengelolaAnggaran.statusAnggaran(user, bulan_lalu.month, bulan_lalu.year)),
+
+            ('PengelolaBerulang.buatAturan', PengelolaBerulang.buatAturan, tersimpan),
+            ('PengelolaBerulang.jalankanJatuhTempo [100 aturan]',
+             lambda _: PengelolaBerulang.jalankanJatuhTempo(hari_ini), aturanTertunda),
+
+            ('LayananRingkasan.catatPerubahan', LayananRingkasan.catatPerubahan,
+             lambda i: [(user.pk, hari_ini, TipeTransaksi.PENGELUARAN, kat and kat.pk, Decimal('0.00'), 0)]),
+            ('LayananRingkasan.invalidasiKategori', LayananRingkasan.invalidasiKategori, lambda i: kat and kat.pk),
+            ('LayananRingkasan.hitungTotalBerdasarkanTanggal',
+             lambda _: LayananRingkasan.hitungTotalBerdasarkanTanggal(bulan_lalu)),
+            ('LayananRingkasan.hitungTotalBerdasarkanBulan',
+             lambda _: LayananRingkasan.hitungTotalBerdasarkanBulan(bulan_lalu.month, bulan_lalu.year)),
+            ('LayananRingkasan.hitungTotalPerTipe', lambda _: LayananRingkasan.hitungTotalPerTipe()),
+            ('LayananRingkasan.ringkasanBulanan',
+             lambda _: LayananRingkasan.ringkasanBulanan(bulan_lalu.month, bulan_lalu.year)),
+            ('LayananRingkasan.hitungTotalBerdasarkanKategori',
+             lambda _: LayananRingkasan.hitungTotalBerdasarkanKategori(kat)),
+            ('LayananRingkasan.ringkasanSaldoUser', LayananRingkasan.ringkasanSaldoUser, segar),
+            ('LayananRingkasan.hitungPemasukanBerdasarkanBulan',
+             lambda _: LayananRingkasan.hitungPemasukanBerdasarkanBulan(bulan_lalu.month, bulan_lalu.year)),
+            ('LayananRingkasan.hitungPengeluaranBerdasarkanBulan',
+             lambda _: LayananRingkasan.hitungPengeluaranBerdasarkanBulan(bulan_lalu.month, bulan_lalu.year)),
+        ]
+        skenario = [Skenario(*item) for item in daftar]
+        # Rebuilding every rollup is far slower than anything else; a few runs are enough
+        skenario.append(Skenario('LayananRingkasan.bangunUlangRingkasan',
+                                 lambda _: LayananRingkasan.bangunUlangRingkasan(), ulang=3))
+
+        tercakup = {s.nama.split(' ')[0] for s in skenario}
+        for kelas in LAYANAN:
+            for nama, _ in inspect.getmembers(kelas, inspect.isfunction):
+                if not nama.startswith('_') and f"{kelas.__name__}.{nama}" not in tercakup:
+                    self.stderr.write(f"{kelas.__name__}.{nama} belum punya skenario")
+        return skenario
+
+    def bandingkan(self, dasar, baru, ambang, lantai):
+        """Print a comparison table and return the names of regressed targets"""
+        regresi = []
+        self.stdout.write(f"\n{'target':<58}{'p95 dasar':>11}{'p95 baru':>11}{'ubah':>8}{'kueri':>10}")
+        for nama in sorted(set(dasar) | set(baru)):
+            if nama not in baru:
+                self.stdout.write(f"{nama:<58}{'hilang':>11}")
+                continue
+            if nama not in dasar:
+                self.stdout.write(f"{nama:<58}{'baru':>11}")
+                continue
+            lama, kini = dasar[nama], baru[nama]
+            ubah = (kini['p95_ms'] - lama['p95_ms']) / lama['p95_ms'] if lama['p95_ms'] else 0.0
+            lebih_lambat = ubah > ambang and kini['p95_ms'] - lama['p95_ms'] > lantai
+            kueri_naik = kini['kueri'] > lama['kueri']
+            penanda = ''
+            if lebih_lambat or kueri_naik:
+                regresi.append(nama)
+                penanda = '  REGRESI'
+            self.stdout.write(
+                f"{nama:<58}{lama['p95_ms']:>11.2f}{kini['p95_ms']:>11.2f}{ubah:>+8.0%}"
+                f"{lama['kueri']:>5}->{kini['kueri']:<4}{penanda}"
+            )
+        return regresi
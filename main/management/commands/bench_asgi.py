@@ -0,0 +1,112 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from main.management.commands.bench import persentil
+
+JALUR_BAWAAN = ['/', '/saldo/', '/summary/', '/api/test/']
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the read-heavy pages through the ASGI and the WSGI handler in-process, "
+        "at a fixed concurrency, against the current database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('jalur', nargs='*', default=JALUR_BAWAAN, help="Paths to request, round-robin")
+        parser.add_argument('--konkurensi', type=int, default=32, help="Requests in flight at once")
+        parser.add_argument('--permintaan', type=int, default=2000, help="Requests per handler")
+        parser.add_argument('--pemanasan', type=int, default=50, help="Untimed requests before each run")
+
+    def handle(self, *args, **options):
+        jalur = options['jalur']
+        self.stdout.write(
+            f"{len(jalur)} jalur, {options['permintaan']} permintaan, konkurensi {options['konkurensi']}\n"
+            f"{'handler':<8}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'maks':>9}{'galat':>7}"
+        )
+        for nama, jalankan in (('wsgi', self.jalankanWsgi), ('asgi', self.jalankanAsgi)):
+            jalankan(jalur, options['pemanasan'], options['konkurensi'])
+            mulai = time.perf_counter()
+            durasi, galat = jalankan(jalur, options['permintaan'], options['konkurensi'])
+            total = time.perf_counter() - mulai
+            durasi.sort()
+            self.stdout.write(
+                f"{nama:<8}{len(durasi) / total:>10.0f}{persentil(durasi, 50):>9.1f}{persentil(durasi, 95):>9.1f}"
+                f"{persentil(durasi, 99):>9.1f}{durasi[-1]:>9.1f}{galat:>7}"
+            )
+
+    def jalankanWsgi(self, jalur, jumlah, konkurensi):
+        """Like a threaded WSGI server: one thread per request in flight"""
+        aplikasi = get_wsgi_application()
+
+        def satu(i):
+            bagian = urlsplit(jalur[i % len(jalur)])
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': bagian.path, 'QUERY_STRING': bagian.query,
+                'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'REMOTE_ADDR': '127.0.0.1',
+                'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http',
+                'wsgi.input': BytesIO(), 'wsgi.errors': BytesIO(),
+                'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+            }
+            status = []
+            mulai = time.perf_counter()
+            respons = aplikasi(environ, lambda s, h, exc_info=None: status.append(s))
+            try:
+                for _ in respons:
+                    pass
+            finally:
+                respons.close()
+            return (time.perf_counter() - mulai) * 1000, not status[0].startswith('2')
+
+        with ThreadPoolExecutor(konkurensi) as pool:
+            hasil = list(pool.map(satu, range(jumlah)))
+        return [d for d, _ in hasil], sum(g for _, g in hasil)
+
+    def jalankanAsgi(self, jalur, jumlah, konkurensi):
+        """Like an ASGI server: one event loop, konkurensi requests in flight"""
+        aplikasi = get_asgi_application()
+
+        async def satu(i):
+            bagian = urlsplit(jalur[i % len(jalur)])
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': bagian.path, 'raw_path': bagian.path.encode(),
+                'query_string': bagian.query.encode(), 'root_path': '',
+                'headers': [(b'host', b'localhost')], 'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+            }
+            terkirim = asyncio.Event()
+            status = []
+
+            async def terima():
+                if not terkirim.is_set():
+                    terkirim.set()
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # The client never disconnects early
+                await asyncio.Future()
+
+            async def kirim(pesan):
+                if pesan['type'] == 'http.response.start':
+                    status.append(pesan['status'])
+
+            mulai = time.perf_counter()
+            await aplikasi(scope, terima, kirim)
+            return (time.perf_counter() - mulai) * 1000, not 200 <= status[0] < 300
+
+        async def semua():
+            batas = asyncio.Semaphore(konkurensi)
+
+            async def dibatasi(i):
+                async with batas:
+                    return await satu(i)
+
+            return await asyncio.gather(*(dibatasi(i) for i in range(jumlah)))
+
+        hasil = asyncio.run(semua())
+        return [d for d, _ in hasil], sum(g for _, g in hasil)
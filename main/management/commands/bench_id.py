@@ -0,0 +1,91 @@
+import os
+import random
+import sqlite3
+import string
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.sqlite import pernyataanPragma
+from main.ulid import buatId
+
+
+def idAcak6(acak):
+    """The old form ids: six random letters and digits"""
+    return ''.join(acak.choices(string.ascii_letters + string.digits, k=6))
+
+
+SKEMA = {
+    'acak6': idAcak6,
+    'uuid4': lambda acak: uuid.uuid4().hex,
+    'ulid': lambda acak: buatId(),
+}
+
+
+class Command(BaseCommand):
+    help = ("Compare insert throughput and primary key index size of the id schemes "
+            "in a scratch SQLite database laid out like main_transaksi")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jumlah', type=int, default=200000, help="Rows to insert per scheme")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per committed transaction")
+        parser.add_argument('--skema', nargs='+', choices=list(SKEMA), default=list(SKEMA))
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'skema':<8}{'baris/detik':>14}{'10% akhir':>14}{'tabrakan':>10}"
+                          f"{'indeks KB':>12}{'halaman':>10}{'isi daun':>10}")
+        with tempfile.TemporaryDirectory() as direktori:
+            for nama in options['skema']:
+                hasil = self.ukur(os.path.join(direktori, f"{nama}.sqlite3"), SKEMA[nama], options)
+                self.stdout.write(
+                    f"{nama:<8}{hasil['laju']:>14,.0f}{hasil['laju_akhir']:>14,.0f}{hasil['tabrakan']:>10}"
+                    f"{hasil['indeks_kb']:>12,.0f}{hasil['halaman']:>10}{hasil['isi_daun']:>10.0%}"
+                )
+
+    def ukur(self, berkas, buat, options):
+        acak = random.Random(options['seed'])
+        jumlah, batch = options['jumlah'], options['batch_size']
+        koneksi = sqlite3.connect(berkas, isolation_level=None)
+        for pernyataan in pernyataanPragma(getattr(settings, 'SQLITE_PRAGMA', {})):
+            koneksi.execute(pernyataan)
+        # Same shape as main_transaksi: a rowid table with a text primary key, i.e. a separate unique index
+        koneksi.execute("CREATE TABLE transaksi (id varchar(255) NOT NULL PRIMARY KEY, jumlah decimal, "
+                        "tanggal date, catatan text)")
+        awal = date(2020, 1, 1)
+        durasi, durasi_akhir, baris_akhir, ditulis = 0.0, 0.0, 0, 0
+        for mulai in range(0, jumlah, batch):
+            baris = [
+                (buat(acak), acak.randint(100, 500000) / 100, (awal + timedelta(days=acak.randint(0, 1825))).isoformat(),
+                 "Belanja")
+                for _ in range(min(batch, jumlah - mulai))
+            ]
+            waktu = time.perf_counter()
+            koneksi.execute("BEGIN")
+            kursor = koneksi.executemany("INSERT OR IGNORE INTO transaksi VALUES (?, ?, ?, ?)", baris)
+            koneksi.execute("COMMIT")
+            lama = time.perf_counter() - waktu
+            durasi += lama
+            if mulai >= jumlah * 0.9:
+                durasi_akhir += lama
+                baris_akhir += len(baris)
+            ditulis += kursor.rowcount
+
+        ukuran, halaman, isi = koneksi.execute(
+            "SELECT SUM(pgsize), COUNT(*), SUM(pgsize - unused) FILTER (WHERE pagetype = 'leaf') * 1.0 "
+            "/ SUM(pgsize) FILTER (WHERE pagetype = 'leaf') "
+            "FROM dbstat WHERE name = 'sqlite_autoindex_transaksi_1'"
+        ).fetchone()
+        koneksi.close()
+        return {
+            'laju': jumlah / durasi,
+            'laju_akhir': baris_akhir / durasi_akhir if durasi_akhir else 0.0,
+            'tabrakan': jumlah - ditulis,
+            'indeks_kb': ukuran / 1024,
+            'halaman': halaman,
+            'isi_daun': isi,
+        }
@@ -0,0 +1,85 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from main.models import (
+    Kategori, Transaksi, TransaksiPemasukan, TransaksiPengeluaran, PengelolaTransaksi, TipeTransaksi
+)
+
+from ._bench import buatUserBench, dibatalkan
+
+
+class Command(BaseCommand):
+    help = "Measure transaction insert and list throughput of the current storage layout (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jumlah', type=int, default=5000, help="Number of transactions to insert")
+        parser.add_argument('--ukuran-halaman', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with dibatalkan():
+            self.jalankan(options)
+
+    def jalankan(self, options):
+        acak = random.Random(options['seed'])
+        jumlah = options['jumlah']
+        user, = buatUserBench(1, Decimal('1000000000.00'))
+        kategori = [Kategori.objects.create(id=f"bench-{i}", nama=f"Bench {i}") for i in range(10)]
+        awal = date(2020, 1, 1)
+
+        mulai = time.perf_counter()
+        for i in range(jumlah):
+            model = TransaksiPemasukan if i % 3 == 0 else TransaksiPengeluaran
+            detail = {'sumber_pemasukan': "Gaji"} if model is TransaksiPemasukan else {'metode_pembayaran': "Tunai"}
+            model(
+                id=f"bench-{i:08d}",
+                jumlah=Decimal(acak.randint(1, 500000)) / 100,
+                tanggal=awal + timedelta(days=acak.randint(0, 5 * 365)),
+                kategori=acak.choice(kategori),
+                user=user,
+                **detail,
+            ).save()
+        durasi_insert = time.perf_counter() - mulai
+
+        # Raw storage cost without the balance/rollup side effects of save()
+        mulai = time.perf_counter()
+        Transaksi.objects.bulk_create(
+            (
+                Transaksi(
+                    id=f"bulk-{i:08d}",
+                    jumlah=Decimal(acak.randint(1, 500000)) / 100,
+                    tanggal=awal + timedelta(days=acak.randint(0, 5 * 365)),
+                    kategori=acak.choice(kategori),
+                    user=user,
+                    tipe=TipeTransaksi.PENGELUARAN,
+                    metode_pembayaran="Tunai",
+                )
+                for i in range(jumlah)
+            ),
+            batch_size=500,
+        )
+        durasi_bulk = time.perf_counter() - mulai
+
+        mulai = time.perf_counter()
+        baris = 0
+        cursor = None
+        while True:
+            halaman = PengelolaTransaksi.ambilHalamanTransaksi(cursor=cursor, ukuran=options['ukuran_halaman'])
+            for trx in halaman['transaksi']:
+                trx.kategori, trx.sumber_pemasukan, trx.metode_pembayaran
+                baris += 1
+            cursor = halaman['cursor_berikutnya']
+            if not cursor:
+                break
+        durasi_list = time.perf_counter() - mulai
+
+        self.stdout.write(f"vendor           : {connection.vendor}")
+        self.stdout.write(f"transaksi        : {jumlah}")
+        self.stdout.write(f"insert           : {jumlah / durasi_insert:,.0f} baris/detik ({durasi_insert:.2f} s)")
+        self.stdout.write(f"insert (bulk)    : {jumlah / durasi_bulk:,.0f} baris/detik ({durasi_bulk:.2f} s)")
+        self.stdout.write(f"list (keyset)    : {baris / durasi_list:,.0f} baris/detik ({durasi_list:.2f} s)")
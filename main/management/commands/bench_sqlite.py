@@ -0,0 +1,125 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.db.models import Sum
+from django.test.utils import override_settings
+
+from main.management.commands.bench import persentil
+from main.models import User, Kategori, TransaksiPengeluaran, PengelolaTransaksi, RingkasanBulanan, buatId
+
+# journal_mode is stored in the database file, so the baseline sets it back explicitly
+PROFIL = {
+    'bawaan': ({'journal_mode': 'DELETE', 'synchronous': 'FULL'}, False),
+    'pragma': (None, False),
+    'pragma+persisten': (None, True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare read/write throughput of the SQLite profiles under mixed concurrent load, "
+        "each on a fresh copy of the database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pembaca', type=int, default=4, help="Reader threads")
+        parser.add_argument('--penulis', type=int, default=2, help="Writer threads")
+        parser.add_argument('--detik', type=float, default=10, help="Duration per profile")
+        parser.add_argument('--profil', nargs='*', choices=list(PROFIL), default=list(PROFIL))
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("bench_sqlite hanya untuk database SQLite")
+        sumber = connection.settings_dict['NAME']
+        users = list(User.objects.filter(saldo__gt=1000).values_list('pk', flat=True)[:50])
+        if not users:
+            raise CommandError("Butuh user dengan saldo; isi database dulu, misalnya dengan manage.py bench")
+        kategori = list(Kategori.objects.values_list('pk', flat=True)[:20]) or [None]
+
+        self.stdout.write(
+            f"{options['pembaca']} pembaca, {options['penulis']} penulis, {options['detik']:.0f} s per profil\n"
+            f"{'profil':<18}{'baca/s':>9}{'tulis/s':>9}{'baca p99':>10}{'tulis p99':>10}{'terkunci':>10}"
+        )
+        with tempfile.TemporaryDirectory() as direktori:
+            for nama in options['profil']:
+                salinan = os.path.join(direktori, f"{nama}.sqlite3")
+                self.salin(sumber, salinan)
+                hasil = self.jalankan(salinan, *PROFIL[nama], users, kategori, options)
+                baca, tulis, terkunci = hasil
+                self.stdout.write(
+                    f"{nama:<18}{len(baca) / options['detik']:>9.0f}{len(tulis) / options['detik']:>9.0f}"
+                    f"{persentil(sorted(baca), 99) if baca else 0:>10.1f}"
+                    f"{persentil(sorted(tulis), 99) if tulis else 0:>10.1f}{terkunci:>10}"
+                )
+
+    def salin(self, sumber, tujuan):
+        connections.close_all()
+        with sqlite3.connect(sumber) as asal, sqlite3.connect(tujuan) as salinan:
+            asal.backup(salinan)
+
+    def jalankan(self, nama_db, pragma, persisten, users, kategori, options):
+        connections.close_all()
+        pengaturan = connections['default'].settings_dict
+        nama_asli = pengaturan['NAME']
+        pengaturan['NAME'] = nama_db
+        berhenti = threading.Event()
+        kunci = threading.Lock()
+        baca, tulis, terkunci = [], [], [0]
+        dari = date.today() - timedelta(days=60)
+
+        def pekerja(operasi, catatan, seed):
+            acak = random.Random(seed)
+            try:
+                while not berhenti.is_set():
+                    mulai = time.perf_counter()
+                    try:
+                        operasi(acak)
+                    except OperationalError:
+                        with kunci:
+                            terkunci[0] += 1
+                        continue
+                    finally:
+                        if not persisten:
+                            connection.close()
+                    with kunci:
+                        catatan.append((time.perf_counter() - mulai) * 1000)
+            finally:
+                connection.close()
+
+        def bacaan(acak):
+            user_id = acak.choice(users)
+            PengelolaTransaksi.ambilHalamanTransaksi(transaksi=PengelolaTransaksi.saringTransaksi(user=user_id, dari=dari))
+            RingkasanBulanan.objects.filter(user_id=user_id).aggregate(total=Sum('total'))
+
+        def tulisan(acak):
+            TransaksiPengeluaran(
+                id=buatId(), jumlah=Decimal(acak.randint(100, 5000)) / 100, tanggal=date.today(),
+                kategori_id=acak.choice(kategori), user_id=acak.choice(users), metode_pembayaran="Bench",
+            ).save()
+
+        try:
+            with override_settings(SQLITE_PRAGMA=settings.SQLITE_PRAGMA if pragma is None else pragma):
+                thread = [
+                    threading.Thread(target=pekerja, args=(bacaan, baca, i)) for i in range(options['pembaca'])
+                ] + [
+                    threading.Thread(target=pekerja, args=(tulisan, tulis, 1000 + i)) for i in range(options['penulis'])
+                ]
+                for t in thread:
+                    t.start()
+                time.sleep(options['detik'])
+                berhenti.set()
+                for t in thread:
+                    t.join()
+        finally:
+            connections.close_all()
+            pengaturan['NAME'] = nama_asli
+        return baca, tulis, terkunci[0]
@@ -0,0 +1,56 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from main.models import PengelolaSaldo
+
+from ._bench import buatUserBench, dibatalkan
+
+
+class Command(BaseCommand):
+    help = "Measure batch transfer throughput against one-by-one transfers (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jumlah', type=int, default=10000, help="Transfers in the batch")
+        parser.add_argument('--user', type=int, default=100, help="Users taking part")
+        parser.add_argument('--sampel', type=int, default=200, help="One-by-one transfers to time for comparison")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with dibatalkan():
+            self.jalankan(options)
+
+    def jalankan(self, options):
+        acak = random.Random(options['seed'])
+        user = buatUserBench(options['user'], Decimal('1000000.00'))
+
+        def buat(jumlah):
+            daftar = []
+            for _ in range(jumlah):
+                pengirim, penerima = acak.sample(user, 2)
+                daftar.append((pengirim, penerima, Decimal(acak.randint(100, 10000)) / 100))
+            return daftar
+
+        sampel = buat(options['sampel'])
+        mulai = time.perf_counter()
+        for pengirim, penerima, jumlah in sampel:
+            PengelolaSaldo.transferSaldo(pengirim, penerima, jumlah)
+        durasi_satu = time.perf_counter() - mulai
+
+        batch = buat(options['jumlah'])
+        mulai = time.perf_counter()
+        PengelolaSaldo.transferMassal(batch)
+        durasi_batch = time.perf_counter() - mulai
+
+        self.stdout.write(f"vendor            : {connection.vendor}")
+        self.stdout.write(
+            f"satu per satu     : {len(sampel) / durasi_satu:,.0f} transfer/detik "
+            f"({len(sampel)} transfer, {durasi_satu:.2f} s)"
+        )
+        self.stdout.write(
+            f"transferMassal    : {len(batch) / durasi_batch:,.0f} transfer/detik "
+            f"({len(batch)} transfer, {durasi_batch:.2f} s)"
+        )
@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.impor import FORMAT_DIDUKUNG, ImporTransaksi, tebakFormat
+from main.models import User
+
+
+class Command(BaseCommand):
+    help = "Stream-import transactions from a CSV or NDJSON file ('-' reads stdin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('berkas')
+        parser.add_argument('--format', choices=FORMAT_DIDUKUNG)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--user', type=int, help="User id for rows without a user_id column")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user'] is not None:
+            try:
+                user = User.objects.get(pk=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} tidak ditemukan")
+
+        format = options['format'] or tebakFormat(options['berkas'])
+        impor = ImporTransaksi(user_bawaan=user, batch_size=options['batch_size'])
+        if options['berkas'] == '-':
+            hasil = impor.dariBerkas(sys.stdin.buffer, format)
+        else:
+            try:
+                berkas = open(options['berkas'], 'rb')
+            except OSError as e:
+                raise CommandError(str(e))
+            with berkas:
+                hasil = impor.dariBerkas(berkas, format)
+
+        for galat in hasil['galat']:
+            self.stderr.write(f"baris {galat['baris']}: {galat['pesan']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{hasil['dibaca']} dibaca, {hasil['ditambahkan']} ditambahkan, "
+            f"{hasil['duplikat']} duplikat, {hasil['gagal']} gagal"
+        ))
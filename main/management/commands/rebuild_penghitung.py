@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from main.models import Penghitung
+
+
+class Command(BaseCommand):
+    help = "Recount the dashboard counters from the User, Kategori and Transaksi tables"
+
+    def handle(self, *args, **options):
+        lama = Penghitung.baca()
+        baru = Penghitung.bangunUlang()
+        for nama, nilai in baru.items():
+            catatan = "" if lama[nama] == nilai else f" (sebelumnya {lama[nama]})"
+            self.stdout.write(f"{nama}: {nilai}{catatan}")
+        self.stdout.write(self.style.SUCCESS("Penghitung dibangun ulang"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from main.models import LayananRingkasan, RingkasanBulanan, RingkasanHarian
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily and monthly rollup tables from the Transaksi ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        LayananRingkasan.bangunUlangRingkasan(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Ringkasan dibangun ulang: {RingkasanHarian.objects.count()} baris harian, "
+            f"{RingkasanBulanan.objects.count()} baris bulanan"
+        ))
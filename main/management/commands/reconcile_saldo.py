@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.rekonsiliasi import RekonsiliasiSaldo
+
+
+class Command(BaseCommand):
+    help = (
+        "Check every User.saldo against income minus expense in the ledger. Runs incrementally "
+        "from the last watermark unless --penuh is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help="Worker processes; 1 runs inline")
+        parser.add_argument('--chunk', type=int, default=1000, help="User ids per query")
+        parser.add_argument('--penuh', action='store_true', help="Check every user, ignoring the watermark")
+        parser.add_argument('--perbaiki', action='store_true', help="Set mismatched saldo to the ledger balance")
+
+    def handle(self, *args, **options):
+        rekonsiliasi = RekonsiliasiSaldo(workers=options['workers'], ukuran_chunk=options['chunk'])
+        riwayat, selisih = rekonsiliasi.jalankan(penuh=options['penuh'], perbaiki=options['perbaiki'])
+
+        for user_id, nama, saldo, ledger in selisih:
+            self.stdout.write(
+                f"user {user_id} ({nama}): saldo {saldo}, ledger {ledger}, selisih {saldo - ledger}"
+                + (" -> diperbaiki" if options['perbaiki'] else '')
+            )
+        ringkasan = (
+            f"{'Penuh' if riwayat.penuh else 'Inkremental'}: {riwayat.user_diperiksa} user diperiksa, "
+            f"{riwayat.selisih_ditemukan} selisih dalam {(riwayat.selesai - riwayat.mulai).total_seconds():.2f} s"
+        )
+        if selisih and not options['perbaiki']:
+            raise CommandError(ringkasan)
+        self.stdout.write(self.style.SUCCESS(ringkasan))
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.models import PengelolaBerulang
+
+
+class Command(BaseCommand):
+    help = "Write every recurring transaction occurrence due up to a date (today by default)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sampai', help="Last due date, YYYY-MM-DD")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            sampai = date.fromisoformat(options['sampai']) if options['sampai'] else None
+        except ValueError:
+            raise CommandError("--sampai harus berformat YYYY-MM-DD")
+        hasil = PengelolaBerulang.jalankanJatuhTempo(sampai, batch_size=options['batch_size'])
+        for user_id, pesan in hasil['gagal'].items():
+            self.stderr.write(f"User {user_id} dilewati: {pesan}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{hasil['transaksi']} transaksi ditulis dari {hasil['aturan']} aturan berulang"
+        ))
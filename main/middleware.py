@@ -0,0 +1,252 @@
+"""Per-request SQL, render and total timing.
+
+Enabled with INSTRUMENTASI_AKTIF. Every request gets a Server-Timing
+header with its SQL time and query count, template render time and total
+time. Requests slower than INSTRUMENTASI_AMBANG_LAMBAT_MS are logged with
+their most expensive statements and where in the project they were issued,
+and each view keeps a rolling window of timings for /api/instrumentasi/.
+"""
+import contextvars
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template as TemplateDjango
+
+logger = logging.getLogger('main.instrumentasi')
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+BATAS_HISTOGRAM = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_catatan_aktif = contextvars.ContextVar('instrumentasi', default=None)
+
+
+class CatatanPermintaan:
+    """Timings gathered while one request is being served"""
+
+    def __init__(self, tumpukan):
+        self.tumpukan = tumpukan
+        self._kunci = threading.Lock()
+        self.mulai = time.perf_counter()
+        self.kueri = []
+        self.sql_ms = 0.0
+        self.render_ms = 0.0
+        self.kedalaman_render = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        mulai = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            durasi = (time.perf_counter() - mulai) * 1000
+            tumpukan = _tumpukanProyek() if self.tumpukan else ()
+            # Reads awaited together run on several threads at once
+            with self._kunci:
+                self.sql_ms += durasi
+                self.kueri.append((sql, durasi, tumpukan))
+
+    def terberat(self, jumlah=5):
+        """Statements grouped by SQL text, most total time first"""
+        grup = {}
+        for sql, durasi, tumpukan in self.kueri:
+            g = grup.setdefault(sql, {'sql': sql, 'kali': 0, 'ms': 0.0, 'tumpukan': tumpukan})
+            g['kali'] += 1
+            g['ms'] += durasi
+        return sorted(grup.values(), key=lambda g: g['ms'], reverse=True)[:jumlah]
+
+
+def _tumpukanProyek(batas=6):
+    """Project frames (file:line in function) of the current call site, innermost first"""
+    akar = str(settings.BASE_DIR)
+    hasil = []
+    frame = sys._getframe(2)
+    while frame is not None and len(hasil) < batas:
+        nama_berkas = frame.f_code.co_filename
+        if nama_berkas.startswith(akar) and 'site-packages' not in nama_berkas and nama_berkas != __file__:
+            hasil.append(f"{nama_berkas[len(akar) + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    return tuple(hasil)
+
+
+def _eksekusiTerukur(execute, sql, params, many, context):
+    """Execute wrapper installed once per connection; charges the statement to the active request, if any.
+
+    The request is found through a context variable rather than by wrapping
+    connections per request, because async views run their queries on
+    other threads, whose connections the middleware cannot reach.
+    """
+    catatan = _catatan_aktif.get()
+    if catatan is None:
+        return execute(sql, params, many, context)
+    return catatan(execute, sql, params, many, context)
+
+
+def _pasangPembungkus(koneksi):
+    if _eksekusiTerukur not in koneksi.execute_wrappers:
+        koneksi.execute_wrappers.append(_eksekusiTerukur)
+
+
+def _pasangDiKoneksiThread(**kwargs):
+    """request_started runs on the thread that serves the request's sync code, async views included"""
+    for koneksi in connections.all(initialized_only=True):
+        _pasangPembungkus(koneksi)
+
+
+def _pasangDiKoneksiBaru(connection, **kwargs):
+    _pasangPembungkus(connection)
+
+
+class TemplateTerukur(TemplateDjango):
+    """Template that charges the outermost render to the active request, minus its SQL"""
+
+    def render(self, context=None, request=None):
+        catatan = _catatan_aktif.get()
+        if catatan is None or catatan.kedalaman_render:
+            return super().render(context, request)
+        catatan.kedalaman_render += 1
+        mulai, sql_awal = time.perf_counter(), catatan.sql_ms
+        try:
+            return super().render(context, request)
+        finally:
+            catatan.kedalaman_render -= 1
+            catatan.render_ms += (time.perf_counter() - mulai) * 1000 - (catatan.sql_ms - sql_awal)
+
+
+class DjangoTemplatesTerukur(DjangoTemplates):
+    """DjangoTemplates backend whose templates report their render time to InstrumentasiMiddleware.
+
+    Configured in TEMPLATES, so render timing needs no patching of Django's
+    Template class; outside an instrumented request it only adds a context
+    variable lookup per render.
+    """
+
+    def from_string(self, template_code):
+        return TemplateTerukur(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TemplateTerukur(super().get_template(template_name).template, self)
+
+
+class StatistikView:
+    """Rolling per-view timing windows shared by the threads of this process"""
+    _kunci = threading.Lock()
+    _jendela = defaultdict(deque)
+    _total = defaultdict(int)
+
+    @classmethod
+    def catat(cls, view, total_ms, sql_ms, render_ms, kueri):
+        ukuran = getattr(settings, 'INSTRUMENTASI_JENDELA', 1000)
+        with cls._kunci:
+            jendela = cls._jendela[view]
+            if jendela.maxlen != ukuran:
+                jendela = cls._jendela[view] = deque(jendela, maxlen=ukuran)
+            jendela.append((total_ms, sql_ms, render_ms, kueri))
+            cls._total[view] += 1
+
+    @classmethod
+    def ringkasan(cls):
+        with cls._kunci:
+            salinan = {view: (list(jendela), cls._total[view]) for view, jendela in cls._jendela.items()}
+        hasil = {}
+        for view, (jendela, total) in sorted(salinan.items()):
+            durasi = sorted(j[0] for j in jendela)
+            histogram = [0] * (len(BATAS_HISTOGRAM) + 1)
+            for d in durasi:
+                histogram[next((i for i, batas in enumerate(BATAS_HISTOGRAM) if d <= batas), len(BATAS_HISTOGRAM))] += 1
+            hasil[view] = {
+                'permintaan': total,
+                'jendela': len(jendela),
+                'p50_ms': round(durasi[len(durasi) // 2], 2),
+                'p95_ms': round(durasi[min(len(durasi) - 1, int(len(durasi) * 0.95))], 2),
+                'p99_ms': round(durasi[min(len(durasi) - 1, int(len(durasi) * 0.99))], 2),
+                'rata_sql_ms': round(sum(j[1] for j in jendela) / len(jendela), 2),
+                'rata_render_ms': round(sum(j[2] for j in jendela) / len(jendela), 2),
+                'rata_kueri': round(sum(j[3] for j in jendela) / len(jendela), 2),
+                'histogram': {
+                    **{f"<={batas}ms": n for batas, n in zip(BATAS_HISTOGRAM, histogram)},
+                    f">{BATAS_HISTOGRAM[-1]}ms": histogram[-1],
+                },
+            }
+        return hasil
+
+    @classmethod
+    def reset(cls):
+        with cls._kunci:
+            cls._jendela.clear()
+            cls._total.clear()
+
+
+class InstrumentasiMiddleware:
+    """Measure SQL, render and total time per request; unloaded entirely when disabled.
+
+    Sync and async capable, so under ASGI the async views stay async
+    instead of being pushed back onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTASI_AKTIF', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.asinkron = iscoroutinefunction(get_response)
+        if self.asinkron:
+            markcoroutinefunction(self)
+        self.ambang_ms = getattr(settings, 'INSTRUMENTASI_AMBANG_LAMBAT_MS', 500)
+        self.tumpukan = getattr(settings, 'INSTRUMENTASI_TUMPUKAN', True)
+        request_started.connect(_pasangDiKoneksiThread, dispatch_uid='instrumentasi')
+        connection_created.connect(_pasangDiKoneksiBaru, dispatch_uid='instrumentasi')
+
+    def __call__(self, request):
+        if self.asinkron:
+            return self.__acall__(request)
+        catatan = CatatanPermintaan(self.tumpukan)
+        token = _catatan_aktif.set(catatan)
+        try:
+            response = self.get_response(request)
+        finally:
+            _catatan_aktif.reset(token)
+        return self.selesai(request, response, catatan)
+
+    async def __acall__(self, request):
+        catatan = CatatanPermintaan(self.tumpukan)
+        token = _catatan_aktif.set(catatan)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _catatan_aktif.reset(token)
+        return self.selesai(request, response, catatan)
+
+    def selesai(self, request, response, catatan):
+        """Add the Server-Timing header, record the view's timings and log a slow request"""
+        total_ms = (time.perf_counter() - catatan.mulai) * 1000
+
+        response['Server-Timing'] = ', '.join((
+            f'sql;dur={catatan.sql_ms:.1f};desc="{len(catatan.kueri)} kueri"',
+            f'render;dur={catatan.render_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ))
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<tanpa-rute>'
+        StatistikView.catat(view, total_ms, catatan.sql_ms, catatan.render_ms, len(catatan.kueri))
+
+        if total_ms >= self.ambang_ms:
+            baris = [
+                f"Permintaan lambat {request.method} {request.get_full_path()} ({view}): "
+                f"{total_ms:.0f} ms total, {catatan.sql_ms:.0f} ms SQL dalam {len(catatan.kueri)} kueri, "
+                f"{catatan.render_ms:.0f} ms render"
+            ]
+            for g in catatan.terberat():
+                baris.append(f"  {g['ms']:.1f} ms / {g['kali']}x: {g['sql'][:300]}")
+                baris.extend(f"      {frame}" for frame in g['tumpukan'])
+            logger.warning('\n'.join(baris))
+        return response
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:43
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+
+def isi_ringkasan(apps, schema_editor):
+    Transaksi = apps.get_model('main', 'Transaksi')
+    for nama, kolom, periode in (
+        ('RingkasanHarian', 'tanggal', F('tanggal')),
+        ('RingkasanBulanan', 'bulan', TruncMonth('tanggal')),
+    ):
+        model = apps.get_model('main', nama)
+        baris = (
+            Transaksi.objects
+            .values('user_id', 'tipe', 'kategori_id', periode=periode)
+            .annotate(total=Sum('jumlah'), jumlah_transaksi=Count('id'))
+            .order_by()
+        )
+        model.objects.bulk_create(
+            (
+                model(
+                    user_id=r['user_id'],
+                    tipe=r['tipe'],
+                    kategori_id=r['kategori_id'],
+                    total=r['total'],
+                    jumlah_transaksi=r['jumlah_transaksi'],
+                    **{kolom: r['periode']},
+                )
+                for r in baris.iterator(chunk_size=1000)
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_user_saldo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RingkasanBulanan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipe', models.CharField(choices=[('PEMASUKAN', 'Pemasukan'), ('PENGELUARAN', 'Pengeluaran')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=25)),
+                ('jumlah_transaksi', models.IntegerField(default=0)),
+                ('bulan', models.DateField()),
+                ('kategori', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='main.kategori')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.user')),
+            ],
+            options={
+                'verbose_name_plural': 'Ringkasan Bulanan',
+                'indexes': [models.Index(fields=['bulan', 'tipe'], name='ringkasan_bulanan_bln_idx'), models.Index(fields=['tipe'], name='ringkasan_bulanan_tipe_idx'), models.Index(fields=['kategori'], name='ringkasan_bulanan_kat_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'bulan', 'tipe', 'kategori'), name='unik_ringkasan_bulanan')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RingkasanHarian',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipe', models.CharField(choices=[('PEMASUKAN', 'Pemasukan'), ('PENGELUARAN', 'Pengeluaran')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=25)),
+                ('jumlah_transaksi', models.IntegerField(default=0)),
+                ('tanggal', models.DateField()),
+                ('kategori', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='main.kategori')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.user')),
+            ],
+            options={
+                'verbose_name_plural': 'Ringkasan Harian',
+                'indexes': [models.Index(fields=['tanggal', 'tipe'], name='ringkasan_harian_tgl_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'tanggal', 'tipe', 'kategori'), name='unik_ringkasan_harian')],
+            },
+        ),
+        migrations.RunPython(isi_ringkasan, migrations.RunPython.noop),
+    ]
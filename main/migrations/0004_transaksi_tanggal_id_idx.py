@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_ringkasan'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaksi',
+            index=models.Index(fields=['tanggal', 'id'], name='transaksi_tanggal_id_idx'),
+        ),
+    ]
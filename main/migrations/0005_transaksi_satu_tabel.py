@@ -0,0 +1,96 @@
+# Moves TransaksiPemasukan / TransaksiPengeluaran from multi-table inheritance
+# to proxy models whose subtype fields live on the main_transaksi row.
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+SUBTIPE = (
+    ('TransaksiPemasukan', 'PEMASUKAN', 'sumber_pemasukan'),
+    ('TransaksiPengeluaran', 'PENGELUARAN', 'metode_pembayaran'),
+)
+
+
+def salin_ke_transaksi(apps, schema_editor):
+    Transaksi = apps.get_model('main', 'Transaksi')
+    for nama, tipe, kolom in SUBTIPE:
+        Subtipe = apps.get_model('main', nama)
+        Transaksi.objects.filter(tipe=tipe).update(**{
+            kolom: Subquery(
+                Subtipe.objects.filter(transaksi_ptr_id=OuterRef('pk')).values(f'{kolom}_lama')[:1]
+            ),
+        })
+
+
+def salin_ke_subtipe(apps, schema_editor):
+    Transaksi = apps.get_model('main', 'Transaksi')
+    qn = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for nama, tipe, kolom in SUBTIPE:
+            Subtipe = apps.get_model('main', nama)
+            cursor.execute(
+                f"INSERT INTO {qn(Subtipe._meta.db_table)} ({qn('transaksi_ptr_id')}, {qn(kolom + '_lama')}) "
+                f"SELECT {qn('id')}, {qn(kolom)} FROM {qn(Transaksi._meta.db_table)} WHERE {qn('tipe')} = %s",
+                [tipe],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_transaksi_tanggal_id_idx'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='transaksipemasukan',
+            old_name='sumber_pemasukan',
+            new_name='sumber_pemasukan_lama',
+        ),
+        migrations.RenameField(
+            model_name='transaksipengeluaran',
+            old_name='metode_pembayaran',
+            new_name='metode_pembayaran_lama',
+        ),
+        migrations.AddField(
+            model_name='transaksi',
+            name='metode_pembayaran',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaksi',
+            name='sumber_pemasukan',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.RunPython(salin_ke_transaksi, salin_ke_subtipe),
+        migrations.DeleteModel(
+            name='TransaksiPemasukan',
+        ),
+        migrations.DeleteModel(
+            name='TransaksiPengeluaran',
+        ),
+        migrations.CreateModel(
+            name='TransaksiPemasukan',
+            fields=[
+            ],
+            options={
+                'verbose_name_plural': 'Transaksi Pemasukan',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('main.transaksi',),
+        ),
+        migrations.CreateModel(
+            name='TransaksiPengeluaran',
+            fields=[
+            ],
+            options={
+                'verbose_name_plural': 'Transaksi Pengeluaran',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('main.transaksi',),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_transaksi_satu_tabel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaksi',
+            name='hash_konten',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_transaksi_hash_konten'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaksi',
+            name='kategori',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='main.kategori'),
+        ),
+        migrations.AlterField(
+            model_name='transaksi',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='main.user'),
+        ),
+        migrations.AddIndex(
+            model_name='transaksi',
+            index=models.Index(fields=['user', 'tanggal'], name='transaksi_user_tanggal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaksi',
+            index=models.Index(fields=['user', 'tipe', 'tanggal'], name='transaksi_user_tipe_tgl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaksi',
+            index=models.Index(fields=['kategori', 'tanggal'], name='transaksi_kategori_tgl_idx'),
+        ),
+    ]
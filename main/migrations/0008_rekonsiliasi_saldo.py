@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_transaksi_indeks_komposit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiwayatRekonsiliasi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mulai', models.DateTimeField()),
+                ('selesai', models.DateTimeField()),
+                ('watermark', models.DateTimeField(null=True)),
+                ('penuh', models.BooleanField(default=False)),
+                ('perbaiki', models.BooleanField(default=False)),
+                ('user_diperiksa', models.IntegerField(default=0)),
+                ('selisih_ditemukan', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Riwayat Rekonsiliasi',
+            },
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='diubah_pada',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_rekonsiliasi_saldo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='versi_ledger',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:28
+
+from django.db import migrations, models
+
+
+def hitung_awal(apps, schema_editor):
+    Penghitung = apps.get_model('main', 'Penghitung')
+    for nama, model in (('user', 'User'), ('kategori', 'Kategori'), ('transaksi', 'Transaksi')):
+        Penghitung.objects.create(nama=nama, nilai=apps.get_model('main', model).objects.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_user_versi_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Penghitung',
+            fields=[
+                ('nama', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('nilai', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Penghitung',
+            },
+        ),
+        migrations.RunPython(hitung_awal, migrations.RunPython.noop),
+    ]
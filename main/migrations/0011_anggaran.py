@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_penghitung'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Anggaran',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batas', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('blokir', models.BooleanField(default=False)),
+                ('kategori', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.kategori')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.user')),
+            ],
+            options={
+                'verbose_name_plural': 'Anggaran',
+                'constraints': [models.UniqueConstraint(fields=('user', 'kategori'), name='unik_anggaran')],
+            },
+        ),
+    ]
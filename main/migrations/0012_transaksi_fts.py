@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# The SQL is spelled out here rather than imported from main.pencarian, so
+# later changes to that module cannot rewrite what this migration did.
+# pasangIndeks/lepasIndeks reinstall or remove the same objects.
+BUAT = [
+    """CREATE VIEW IF NOT EXISTS main_transaksi_fts_isi AS
+        SELECT rowid AS baris, catatan, sumber_pemasukan, metode_pembayaran, 'u' || user_id AS pemilik
+        FROM main_transaksi""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS main_transaksi_fts USING fts5(
+        catatan, sumber_pemasukan, metode_pembayaran, pemilik,
+        content='main_transaksi_fts_isi', content_rowid='baris',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS main_transaksi_fts_ai AFTER INSERT ON main_transaksi BEGIN
+        INSERT INTO main_transaksi_fts(rowid, catatan, sumber_pemasukan, metode_pembayaran, pemilik)
+        VALUES (new.rowid, new.catatan, new.sumber_pemasukan, new.metode_pembayaran, 'u' || new.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS main_transaksi_fts_ad AFTER DELETE ON main_transaksi BEGIN
+        INSERT INTO main_transaksi_fts(main_transaksi_fts, rowid, catatan, sumber_pemasukan, metode_pembayaran, pemilik)
+        VALUES ('delete', old.rowid, old.catatan, old.sumber_pemasukan, old.metode_pembayaran, 'u' || old.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS main_transaksi_fts_au
+        AFTER UPDATE OF catatan, sumber_pemasukan, metode_pembayaran, user_id ON main_transaksi BEGIN
+        INSERT INTO main_transaksi_fts(main_transaksi_fts, rowid, catatan, sumber_pemasukan, metode_pembayaran, pemilik)
+        VALUES ('delete', old.rowid, old.catatan, old.sumber_pemasukan, old.metode_pembayaran, 'u' || old.user_id);
+        INSERT INTO main_transaksi_fts(rowid, catatan, sumber_pemasukan, metode_pembayaran, pemilik)
+        VALUES (new.rowid, new.catatan, new.sumber_pemasukan, new.metode_pembayaran, 'u' || new.user_id);
+    END""",
+    "INSERT INTO main_transaksi_fts(main_transaksi_fts) VALUES ('rebuild')",
+]
+HAPUS = [
+    "DROP TRIGGER IF EXISTS main_transaksi_fts_ai",
+    "DROP TRIGGER IF EXISTS main_transaksi_fts_ad",
+    "DROP TRIGGER IF EXISTS main_transaksi_fts_au",
+    "DROP TABLE IF EXISTS main_transaksi_fts",
+    "DROP VIEW IF EXISTS main_transaksi_fts_isi",
+]
+
+
+def jalankan(daftar):
+    def operasi(apps, schema_editor):
+        # FTS5 is SQLite-only; other databases search with icontains
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for pernyataan in daftar:
+                cursor.execute(pernyataan)
+    return operasi
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_anggaran'),
+    ]
+
+    operations = [
+        migrations.RunPython(jalankan(BUAT), jalankan(HAPUS)),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_transaksi_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransaksiBerulang',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipe', models.CharField(choices=[('PEMASUKAN', 'Pemasukan'), ('PENGELUARAN', 'Pengeluaran')], max_length=20)),
+                ('jumlah', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('catatan', models.TextField(blank=True, null=True)),
+                ('sumber_pemasukan', models.CharField(blank=True, max_length=255, null=True)),
+                ('metode_pembayaran', models.CharField(blank=True, max_length=255, null=True)),
+                ('interval_bulan', models.PositiveSmallIntegerField(default=1)),
+                ('hari_bulan', models.PositiveSmallIntegerField()),
+                ('mulai', models.DateField()),
+                ('berakhir', models.DateField(blank=True, null=True)),
+                ('terakhir', models.DateField(blank=True, null=True)),
+                ('aktif', models.BooleanField(default=True)),
+                ('kategori', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='main.kategori')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.user')),
+            ],
+            options={
+                'verbose_name_plural': 'Transaksi Berulang',
+                'indexes': [models.Index(fields=['aktif', 'terakhir'], name='berulang_aktif_terakhir_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.db.models import F
+
+from main.ulid import adalahId, buatId
+
+UKURAN_CHUNK = 5000
+
+
+def ulidkan(apps, schema_editor):
+    """Give every non-ULID transaction a ULID stamped with its tanggal.
+
+    The random part is derived from the old id, so the rewrite is
+    deterministic, and a recurring occurrence (REC_<aturan>_<YYYYMMDD>)
+    gets exactly the id PengelolaBerulang now generates for it.
+    """
+    Transaksi = apps.get_model('main', 'Transaksi')
+    User = apps.get_model('main', 'User')
+    koneksi = schema_editor.connection
+    tabel = koneksi.ops.quote_name(Transaksi._meta.db_table)
+    terakhir, diubah = '', 0
+    while True:
+        chunk = list(
+            Transaksi.objects.filter(id__gt=terakhir).order_by('id').values_list('id', 'tanggal')[:UKURAN_CHUNK]
+        )
+        if not chunk:
+            break
+        terakhir = chunk[-1][0]
+        # Rows renamed earlier may sort after the position; they are already ULIDs
+        pasangan = [(buatId(tanggal, kunci=id), id) for id, tanggal in chunk if not adalahId(id)]
+        with koneksi.cursor() as cursor:
+            cursor.executemany(f"UPDATE {tabel} SET id = %s WHERE id = %s", pasangan)
+        diubah += len(pasangan)
+    if diubah:
+        # Cached API responses and ETags carry the old ids
+        User.objects.update(versi_ledger=F('versi_ledger') + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_transaksi_berulang'),
+    ]
+
+    operations = [
+        migrations.RunPython(ulidkan, migrations.RunPython.noop),
+    ]
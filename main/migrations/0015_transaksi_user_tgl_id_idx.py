@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_transaksi_ulid'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaksi',
+            name='transaksi_user_tanggal_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaksi',
+            index=models.Index(fields=['user', 'tanggal', 'id'], name='transaksi_user_tgl_id_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_transaksi_user_tgl_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArsipTahun',
+            fields=[
+                ('tahun', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('sampai', models.DateField()),
+                ('jumlah_transaksi', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Arsip Tahun',
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# Every change to a user's ledger rows or saldo moves main_user.diubah_pada,
+# whichever path made it: the models, queryset update()/delete(),
+# bulk_create or raw SQL. reconcile_saldo's incremental run rechecks the
+# users whose diubah_pada moved after its watermark, so it sees drift
+# written around the models too. Same text format Django stores (UTC).
+SEKARANG = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+BUAT = [
+    f"""CREATE TRIGGER IF NOT EXISTS main_ledger_diubah_ai AFTER INSERT ON main_transaksi BEGIN
+        UPDATE main_user SET diubah_pada = {SEKARANG} WHERE id = new.user_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS main_ledger_diubah_ad AFTER DELETE ON main_transaksi BEGIN
+        UPDATE main_user SET diubah_pada = {SEKARANG} WHERE id = old.user_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS main_ledger_diubah_au
+        AFTER UPDATE OF jumlah, tipe, user_id ON main_transaksi BEGIN
+        UPDATE main_user SET diubah_pada = {SEKARANG} WHERE id IN (old.user_id, new.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS main_ledger_diubah_saldo AFTER UPDATE OF saldo ON main_user BEGIN
+        UPDATE main_user SET diubah_pada = {SEKARANG} WHERE id = new.id;
+    END""",
+]
+HAPUS = [
+    "DROP TRIGGER IF EXISTS main_ledger_diubah_ai",
+    "DROP TRIGGER IF EXISTS main_ledger_diubah_ad",
+    "DROP TRIGGER IF EXISTS main_ledger_diubah_au",
+    "DROP TRIGGER IF EXISTS main_ledger_diubah_saldo",
+]
+
+
+def jalankan(daftar):
+    def operasi(apps, schema_editor):
+        # Elsewhere only the model write paths move diubah_pada
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for pernyataan in daftar:
+                cursor.execute(pernyataan)
+    return operasi
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_arsip_tahun'),
+    ]
+
+    operations = [
+        migrations.RunPython(jalankan(BUAT), jalankan(HAPUS)),
+    ]
@@ -0,0 +1,69 @@
+from importlib import import_module
+
+from django.db import migrations
+
+# Re-keys the search index on main_transaksi_fts_kunci, a stable integer
+# per transaction id, instead of the implicit rowid of main_transaksi that
+# VACUUM and table remakes renumber. Spelled out like 0012; pasangIndeks
+# reinstalls the same objects.
+fts_lama = import_module('main.migrations.0012_transaksi_fts')
+
+BUAT = [
+    *fts_lama.HAPUS,
+    """CREATE TABLE IF NOT EXISTS main_transaksi_fts_kunci (
+        baris INTEGER PRIMARY KEY AUTOINCREMENT,
+        transaksi_id varchar(255) NOT NULL UNIQUE
+    )""",
+    """INSERT INTO main_transaksi_fts_kunci(transaksi_id) SELECT id FROM main_transaksi ORDER BY id""",
+    """CREATE VIEW IF NOT EXISTS main_transaksi_fts_isi AS
+        SELECT k.baris, t.catatan, t.sumber_pemasukan, t.metode_pembayaran, 'u' || t.user_id AS pemilik
+        FROM main_transaksi_fts_kunci k JOIN main_transaksi t ON t.id = k.transaksi_id""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS main_transaksi_fts USING fts5(
+        catatan, sumber_pemasukan, metode_pembayaran, pemilik,
+        content='main_transaksi_fts_isi', content_rowid='baris',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS main_transaksi_fts_ai AFTER INSERT ON main_transaksi BEGIN
+        INSERT OR IGNORE INTO main_transaksi_fts_kunci(transaksi_id) VALUES (new.id);
+        INSERT INTO main_transaksi_fts(rowid, catatan, sumber_pemasukan, metode_pembayaran, pemilik)
+            SELECT baris, new.catatan, new.sumber_pemasukan, new.metode_pembayaran, 'u' || new.user_id
+            FROM main_transaksi_fts_kunci WHERE transaksi_id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS main_transaksi_fts_ad AFTER DELETE ON main_transaksi BEGIN
+        INSERT INTO main_transaksi_fts(main_transaksi_fts, rowid, catatan, sumber_pemasukan, metode_pembayaran, pemilik)
+            SELECT 'delete', baris, old.catatan, old.sumber_pemasukan, old.metode_pembayaran, 'u' || old.user_id
+            FROM main_transaksi_fts_kunci WHERE transaksi_id = old.id;
+        DELETE FROM main_transaksi_fts_kunci WHERE transaksi_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS main_transaksi_fts_au
+        AFTER UPDATE OF id, catatan, sumber_pemasukan, metode_pembayaran, user_id ON main_transaksi BEGIN
+        INSERT INTO main_transaksi_fts(main_transaksi_fts, rowid, catatan, sumber_pemasukan, metode_pembayaran, pemilik)
+            SELECT 'delete', baris, old.catatan, old.sumber_pemasukan, old.metode_pembayaran, 'u' || old.user_id
+            FROM main_transaksi_fts_kunci WHERE transaksi_id = old.id;
+        UPDATE main_transaksi_fts_kunci SET transaksi_id = new.id WHERE transaksi_id = old.id AND old.id <> new.id;
+        INSERT INTO main_transaksi_fts(rowid, catatan, sumber_pemasukan, metode_pembayaran, pemilik)
+            SELECT baris, new.catatan, new.sumber_pemasukan, new.metode_pembayaran, 'u' || new.user_id
+            FROM main_transaksi_fts_kunci WHERE transaksi_id = new.id;
+    END""",
+    "INSERT INTO main_transaksi_fts(main_transaksi_fts) VALUES ('rebuild')",
+]
+HAPUS = [
+    "DROP TRIGGER IF EXISTS main_transaksi_fts_ai",
+    "DROP TRIGGER IF EXISTS main_transaksi_fts_ad",
+    "DROP TRIGGER IF EXISTS main_transaksi_fts_au",
+    "DROP TABLE IF EXISTS main_transaksi_fts",
+    "DROP VIEW IF EXISTS main_transaksi_fts_isi",
+    "DROP TABLE IF EXISTS main_transaksi_fts_kunci",
+    *fts_lama.BUAT,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_ledger_diubah_trigger'),
+    ]
+
+    operations = [
+        migrations.RunPython(fts_lama.jalankan(BUAT), fts_lama.jalankan(HAPUS)),
+    ]
@@ -1,17 +1,69 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth.models import AbstractUser
-from django.db.models import Sum
+from django.db.models import Sum, Count, F, Q, Case, When, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import defaultdict
+from datetime import date, timedelta
 from decimal import Decimal
+import calendar
+import hashlib
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from .cache import CacheRingkasan
+from .ulid import buatId
+
+def rentangBulan(bulan, tahun):
+    """Half-open [awal, akhir) date range of a month, usable by an index on tanggal"""
+    awal = date(tahun, bulan, 1)
+    akhir = date(tahun + 1, 1, 1) if bulan == 12 else date(tahun, bulan + 1, 1)
+    return awal, akhir
+
+class ManagerTerhitung(models.Manager):
+    """Manager that keeps the model's Penghitung row in step with bulk_create"""
+
+    def __init__(self, penghitung):
+        super().__init__()
+        self.penghitung = penghitung
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # Rows skipped by ignore_conflicts are still counted; rebuild_penghitung corrects that
+        with transaction.atomic():
+            hasil = super().bulk_create(objs, *args, **kwargs)
+            Penghitung.tambah({self.penghitung: len(hasil)})
+        return hasil
 
 class User(models.Model):
     nama = models.CharField(max_length=255)
     email = models.EmailField(unique=True)
     saldo = models.DecimalField(max_digits=25, decimal_places=2, default=Decimal('0.00'))
+    # Last time saldo or this user's ledger rows moved, by any write path (SQLite
+    # triggers from migration 0017); lets reconcile_saldo recheck only these users
+    diubah_pada = models.DateTimeField(auto_now=True, db_index=True)
+    # Bumped by every write to this user's ledger; the API derives ETags from it
+    versi_ledger = models.PositiveBigIntegerField(default=0)
+
+    objects = ManagerTerhitung('user')
+
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                Penghitung.tambah({Penghitung.USER: 1})
+
+    def delete(self, *args, **kwargs):
+        """Delete the user and, by cascade, their transactions, keeping the counters in step"""
+        with transaction.atomic():
+            banyak = Transaksi.objects.filter(user_id=self.pk).count() + ArsipTahun.hapusUser(self.pk)
+            hasil = super().delete(*args, **kwargs)
+            Penghitung.tambah({Penghitung.USER: -1, Penghitung.TRANSAKSI: -banyak})
+            return hasil
 
     def setName(self, nama):
         self.nama = nama
-        self.save()
+        # Never write back a possibly stale in-memory saldo
+        self.save(update_fields=['nama'])
 
     def getName(self):
         return self.nama
@@ -25,16 +77,43 @@ class User(models.Model):
     
     def tambahSaldo(self, jumlah):
         """Add amount to balance"""
-        self.saldo += jumlah
-        self.save()
+        return self.ubahSaldo(jumlah)
     
     def kurangiSaldo(self, jumlah):
         """Subtract amount from balance"""
-        if self.saldo >= jumlah:
-            self.saldo -= jumlah
-            self.save()
-            return True
-        return False
+        return self.ubahSaldo(-jumlah)
+
+    def ubahSaldo(self, selisih):
+        """Apply a balance delta atomically; returns False instead of going negative"""
+        if not User.terapkanSelisihSaldo({self.pk: selisih}):
+            return False
+        self.saldo += selisih
+        return True
+
+    @staticmethod
+    def terapkanSelisihSaldo(selisih_per_user):
+        """Apply {user_id: delta} as one conditional UPDATE per user.
+
+        The insufficient-funds check is part of the WHERE clause, so concurrent
+        writers can neither lose an update nor push a balance below zero.
+        Returns False as soon as one user lacks funds; callers run this inside
+        transaction.atomic so earlier updates are rolled back with them.
+        Every ledger write passes through here, so it also bumps versi_ledger,
+        including for users whose delta is zero.
+        """
+        sekarang = timezone.now()
+        # Deterministic order so concurrent batches lock users the same way
+        for user_id, selisih in sorted(selisih_per_user.items()):
+            baris = User.objects.filter(pk=user_id)
+            if not selisih:
+                # Edits that leave the balance alone still change the ledger
+                baris.update(versi_ledger=F('versi_ledger') + 1)
+                continue
+            if selisih < 0:
+                baris = baris.filter(saldo__gte=-selisih)
+            if not baris.update(saldo=F('saldo') + selisih, diubah_pada=sekarang, versi_ledger=F('versi_ledger') + 1):
+                return False
+        return True
     
     def cekSaldoCukup(self, jumlah):
         """Check if balance is sufficient"""
@@ -49,6 +128,8 @@ class Kategori(models.Model):
     ikon = models.CharField(max_length=50, blank=True, null=True)
     warna = models.CharField(max_length=7, blank=True, null=True)  # Hex color code
 
+    objects = ManagerTerhitung('kategori')
+
     def getNama(self):
         return self.nama
 
@@ -70,6 +151,34 @@ class Kategori(models.Model):
         self.warna = warna
         self.save()
 
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Cached month summaries carry the kategori's name, icon and colour
+            if not is_new:
+                LayananRingkasan.invalidasiKategori(self.pk)
+            else:
+                Penghitung.tambah({Penghitung.KATEGORI: 1})
+
+    def delete(self, *args, **kwargs):
+        """Move rollup rows of this kategori to the uncategorised bucket, then delete"""
+        with transaction.atomic():
+            LayananRingkasan.invalidasiKategori(self.pk)
+            # Their transactions lose the kategori, which changes those ledgers
+            User.objects.filter(
+                pk__in=Transaksi.objects.filter(kategori_id=self.pk).values('user_id')
+            ).update(versi_ledger=F('versi_ledger') + 1)
+            for model in ArsipTahun.semuaModel():
+                arsip = model.objects.filter(kategori_id=self.pk)
+                User.objects.filter(pk__in=arsip.values('user_id')).update(versi_ledger=F('versi_ledger') + 1)
+                arsip.update(kategori_id=None)
+            RingkasanHarian.lepaskanKategori(self.pk)
+            RingkasanBulanan.lepaskanKategori(self.pk)
+            hasil = super().delete(*args, **kwargs)
+            Penghitung.tambah({Penghitung.KATEGORI: -1})
+            return hasil
+
     def __str__(self):
         return self.nama
 
@@ -80,14 +189,47 @@ class TipeTransaksi(models.TextChoices):
     PEMASUKAN = 'PEMASUKAN', 'Pemasukan'
     PENGELUARAN = 'PENGELUARAN', 'Pengeluaran'
 
+class TransaksiQuerySet(models.QuerySet):
+    def milik(self, user):
+        """Rows of one user; every per-user index on Transaksi starts with user_id"""
+        return self.filter(user_id=getattr(user, 'pk', user))
+
 class Transaksi(models.Model):
     id = models.CharField(max_length=255, primary_key=True)
     jumlah = models.DecimalField(max_digits=15, decimal_places=2)
     tanggal = models.DateField()
-    kategori = models.ForeignKey(Kategori, on_delete=models.SET_NULL, null=True, blank=True)
+    # Single-column FK indexes are redundant with the composite indexes in Meta
+    kategori = models.ForeignKey(Kategori, on_delete=models.SET_NULL, null=True, blank=True, db_index=False)
     catatan = models.TextField(blank=True, null=True)
     tipe = models.CharField(max_length=20, choices=TipeTransaksi.choices)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    # Subtype fields live on the same row; see TransaksiPemasukan / TransaksiPengeluaran
+    sumber_pemasukan = models.CharField(max_length=100, blank=True, null=True)
+    metode_pembayaran = models.CharField(max_length=100, blank=True, null=True)
+    # Set by the bulk import; duplicate imported rows are skipped on this hash
+    hash_konten = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+
+    objects = TransaksiQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Column values as loaded, so save() only validates what changed
+        instance._nilai_awal = dict(zip(field_names, values))
+        return instance
+
+    def _kolomTanpaValidasi(self):
+        """Fields save() can skip: unchanged since loading, or FKs to an object already read from the database"""
+        awal = getattr(self, '_nilai_awal', {})
+        lewati = []
+        for field in self._meta.concrete_fields:
+            if field.attname in awal and getattr(self, field.attname) == awal[field.attname]:
+                lewati.append(field.name)
+            elif field.is_relation and field.is_cached(self):
+                terkait = field.get_cached_value(self)
+                if terkait is not None and not terkait._state.adding and terkait.pk == getattr(self, field.attname):
+                    lewati.append(field.name)
+        return lewati
 
     def getJumlah(self):
         return self.jumlah
@@ -130,55 +272,115 @@ class Transaksi(models.Model):
             if not self.user.cekSaldoCukup(self.jumlah):
                 raise ValidationError(f"Saldo tidak mencukupi. Saldo saat ini: {self.user.getSaldo()}")
 
+    def hitungHashKonten(self):
+        """SHA-256 over the fields that identify a transaction's content"""
+        bagian = [
+            self.user_id, self.tanggal.isoformat(), self.tipe,
+            Decimal(self.jumlah).quantize(Decimal('0.01')), self.kategori_id,
+            self.catatan, self.sumber_pemasukan, self.metode_pembayaran,
+        ]
+        teks = '\x1f'.join('' if b is None else str(b) for b in bagian)
+        return hashlib.sha256(teks.encode()).hexdigest()
+
+    def kunciRingkasan(self):
+        """Rollup key (user_id, tanggal, tipe, kategori_id) of this transaction"""
+        return (self.user_id, self.tanggal, self.tipe, self.kategori_id)
+
+    def efekSaldo(self):
+        """Signed effect of this transaction on the owner's balance"""
+        if self.tipe == TipeTransaksi.PEMASUKAN:
+            return Decimal(self.jumlah)
+        if self.tipe == TipeTransaksi.PENGELUARAN:
+            return -Decimal(self.jumlah)
+        return Decimal('0.00')
+
+    def _terapkanSaldo(self, selisih_per_user, pesan):
+        """Apply balance deltas, keeping the cached owner's saldo in step"""
+        if not User.terapkanSelisihSaldo(selisih_per_user):
+            raise ValidationError(pesan)
+        if Transaksi.user.is_cached(self) and self.user_id in selisih_per_user:
+            self.user.saldo += selisih_per_user[self.user_id]
+
     def save(self, *args, **kwargs):
         # Check if this is a new transaction or an update
-        is_new = self.pk is None
-        old_amount = None
-        old_type = None
-        
-        if not is_new:
-            # Get the old values before updating
-            old_transaksi = Transaksi.objects.get(pk=self.pk)
-            old_amount = old_transaksi.jumlah
-            old_type = old_transaksi.tipe
+        is_new = self._state.adding
         
-        # Validate the transaction
-        self.full_clean()
+        # Validate changed field values; the balance check is folded into the saldo UPDATE
+        self.clean_fields(exclude=self._kolomTanpaValidasi())
         
-        # If updating an existing transaction, reverse the old transaction effect
-        if not is_new:
-            if old_type == TipeTransaksi.PEMASUKAN:
-                self.user.kurangiSaldo(old_amount)
-            elif old_type == TipeTransaksi.PENGELUARAN:
-                self.user.tambahSaldo(old_amount)
-        
-        # Apply the new transaction effect
-        if self.tipe == TipeTransaksi.PEMASUKAN:
-            self.user.tambahSaldo(self.jumlah)
-        elif self.tipe == TipeTransaksi.PENGELUARAN:
-            if not self.user.kurangiSaldo(self.jumlah):
-                raise ValidationError("Saldo tidak mencukupi untuk transaksi pengeluaran")
-        
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            selisih = defaultdict(Decimal)
+            selisih[self.user_id] += self.efekSaldo()
+            perubahan = [(*self.kunciRingkasan(), Decimal(self.jumlah), 1)]
+
+            if not is_new:
+                # Reverse the effect of the stored row, read under the write lock
+                lama = Transaksi.objects.select_for_update().get(pk=self.pk)
+                selisih[lama.user_id] -= lama.efekSaldo()
+                perubahan.append((*lama.kunciRingkasan(), -lama.jumlah, -1))
+            
+            self._terapkanSaldo(selisih, "Saldo tidak mencukupi untuk transaksi pengeluaran")
+            
+            if is_new:
+                kwargs['force_insert'] = True
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+            except IntegrityError:
+                raise ValidationError({'id': "Transaksi dengan ID ini sudah ada"})
+
+            # Keep the daily/monthly rollups and the row count in step with the ledger
+            LayananRingkasan.catatPerubahan(perubahan)
+            self.peringatan_anggaran = PengelolaAnggaran.periksaAnggaran(perubahan)
+            if is_new:
+                Penghitung.tambah({Penghitung.TRANSAKSI: 1})
+        tertunda = self.get_deferred_fields()
+        self._nilai_awal = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields if field.attname not in tertunda
+        }
 
     def delete(self, *args, **kwargs):
         """Override delete to update user balance"""
-        # Reverse the transaction effect when deleting
-        if self.tipe == TipeTransaksi.PEMASUKAN:
-            self.user.kurangiSaldo(self.jumlah)
-        elif self.tipe == TipeTransaksi.PENGELUARAN:
-            self.user.tambahSaldo(self.jumlah)
-        
-        super().delete(*args, **kwargs)
+        with transaction.atomic():
+            # Reverse the effect of the row as stored, not of a possibly stale instance
+            lama = Transaksi.objects.select_for_update().filter(pk=self.pk).first()
+            if lama is None:
+                return 0, {}
+            self._terapkanSaldo(
+                {lama.user_id: -lama.efekSaldo()},
+                "Saldo tidak mencukupi untuk menghapus pemasukan ini"
+            )
+            
+            LayananRingkasan.catatPerubahan([(*lama.kunciRingkasan(), -lama.jumlah, -1)])
+            hasil = super().delete(*args, **kwargs)
+            Penghitung.tambah({Penghitung.TRANSAKSI: -1})
+            return hasil
 
     def __str__(self):
         return f"{self.get_tipe_display()} - {self.jumlah} - {self.tanggal}"
 
     class Meta:
         verbose_name_plural = "Transaksi"
+        indexes = [
+            # Keyset pagination order for the transaction list
+            models.Index(fields=['tanggal', 'id'], name='transaksi_tanggal_id_idx'),
+            # Per-user history in keyset order, and per-user/per-type period queries
+            models.Index(fields=['user', 'tanggal', 'id'], name='transaksi_user_tgl_id_idx'),
+            models.Index(fields=['user', 'tipe', 'tanggal'], name='transaksi_user_tipe_tgl_idx'),
+            models.Index(fields=['kategori', 'tanggal'], name='transaksi_kategori_tgl_idx'),
+        ]
+
+class TransaksiPemasukanManager(models.Manager.from_queryset(TransaksiQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().filter(tipe=TipeTransaksi.PEMASUKAN)
+
+class TransaksiPengeluaranManager(models.Manager.from_queryset(TransaksiQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().filter(tipe=TipeTransaksi.PENGELUARAN)
 
 class TransaksiPemasukan(Transaksi):
-    sumber_pemasukan = models.CharField(max_length=100, blank=True, null=True)
+    objects = TransaksiPemasukanManager()
 
     def getSumberPemasukan(self):
         return self.sumber_pemasukan
@@ -192,10 +394,11 @@ class TransaksiPemasukan(Transaksi):
         super().save(*args, **kwargs)
 
     class Meta:
+        proxy = True
         verbose_name_plural = "Transaksi Pemasukan"
 
 class TransaksiPengeluaran(Transaksi):
-    metode_pembayaran = models.CharField(max_length=100, blank=True, null=True)
+    objects = TransaksiPengeluaranManager()
 
     def getMetodePembayaran(self):
         return self.metode_pembayaran
@@ -209,8 +412,387 @@ class TransaksiPengeluaran(Transaksi):
         super().save(*args, **kwargs)
 
     class Meta:
+        proxy = True
         verbose_name_plural = "Transaksi Pengeluaran"
 
+class TransaksiArsipDasar(models.Model):
+    """Columns of an archived transaction; owner and kategori are plain ids without constraints"""
+    id = models.CharField(max_length=255, primary_key=True)
+    jumlah = models.DecimalField(max_digits=15, decimal_places=2)
+    tanggal = models.DateField()
+    kategori_id = models.CharField(max_length=255, null=True, blank=True)
+    catatan = models.TextField(blank=True, null=True)
+    tipe = models.CharField(max_length=20, choices=TipeTransaksi.choices)
+    user_id = models.BigIntegerField()
+    sumber_pemasukan = models.CharField(max_length=100, blank=True, null=True)
+    metode_pembayaran = models.CharField(max_length=100, blank=True, null=True)
+    hash_konten = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+class ArsipTahun(models.Model):
+    """One year of transactions moved out of main_transaksi into its own table.
+
+    Archived rows keep counting everywhere the ledger is summarised: their
+    balances and rollups stay as they are, and the counters include them.
+    """
+    tahun = models.PositiveSmallIntegerField(primary_key=True)
+    # Upper bound (exclusive) of the dates archived so far
+    sampai = models.DateField()
+    jumlah_transaksi = models.PositiveBigIntegerField(default=0)
+
+    _model = {}
+
+    @staticmethod
+    def modelTahun(tahun):
+        """Unmanaged model over main_transaksi_arsip_<tahun>, built once per process"""
+        model = ArsipTahun._model.get(tahun)
+        if model is None:
+            meta = type('Meta', (), {
+                'app_label': 'main',
+                'db_table': f'main_transaksi_arsip_{tahun}',
+                'managed': False,
+                'indexes': [
+                    models.Index(fields=['user_id', 'tanggal', 'id'], name=f'arsip_{tahun}_user_tgl_idx'),
+                    models.Index(fields=['tanggal', 'id'], name=f'arsip_{tahun}_tgl_id_idx'),
+                ],
+            })
+            model = type(f'TransaksiArsip{tahun}', (TransaksiArsipDasar,), {
+                '__module__': __name__, 'Meta': meta, 'TAHUN': tahun,
+            })
+            ArsipTahun._model[tahun] = model
+        return model
+
+    @staticmethod
+    def semuaModel():
+        """Archive models of every archived year, newest first"""
+        return [ArsipTahun.modelTahun(t) for t in ArsipTahun.objects.order_by('-tahun').values_list('tahun', flat=True)]
+
+    @staticmethod
+    def hapusUser(user_id):
+        """Delete a user's archived rows, which no foreign key cascades to; returns how many"""
+        banyak = 0
+        for model in ArsipTahun.semuaModel():
+            n = model.objects.filter(user_id=user_id).delete()[0]
+            if n:
+                ArsipTahun.objects.filter(tahun=model.TAHUN).update(jumlah_transaksi=F('jumlah_transaksi') - n)
+                banyak += n
+        return banyak
+
+    class Meta:
+        verbose_name_plural = "Arsip Tahun"
+
+class Ringkasan(models.Model):
+    """Base rollup: running total and count per (user, periode, tipe, kategori).
+
+    Each concrete rollup names its period column in KOLOM_PERIODE and maps
+    a transaction date onto it with a periode(tanggal) staticmethod.
+    """
+    KOLOM_PERIODE = None
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    tipe = models.CharField(max_length=20, choices=TipeTransaksi.choices)
+    kategori = models.ForeignKey(Kategori, on_delete=models.CASCADE, null=True, blank=True)
+    total = models.DecimalField(max_digits=25, decimal_places=2, default=Decimal('0.00'))
+    jumlah_transaksi = models.IntegerField(default=0)
+
+    # Above this many keys deltas are applied a chunk at a time instead of per key
+    BATAS_PER_KUNCI = 20
+    UKURAN_CHUNK = 500
+
+    @classmethod
+    def terapkanPerubahan(cls, perubahan):
+        """Apply {(user_id, periode, tipe, kategori_id): (total, jumlah_transaksi)} deltas"""
+        perubahan = {kunci: nilai for kunci, nilai in perubahan.items() if nilai[0] or nilai[1]}
+        if len(perubahan) <= cls.BATAS_PER_KUNCI:
+            cls._terapkanPerKunci(perubahan)
+            return
+        daftar = list(perubahan)
+        for i in range(0, len(daftar), cls.UKURAN_CHUNK):
+            cls._terapkanChunk({kunci: perubahan[kunci] for kunci in daftar[i:i + cls.UKURAN_CHUNK]})
+
+    @classmethod
+    def _terapkanChunk(cls, perubahan):
+        """Apply a chunk of deltas with one SELECT, one UPDATE and one bulk INSERT.
+
+        Existing rows are still incremented with F() in the UPDATE, so
+        concurrent writers cannot lose each other's deltas.
+        """
+        ada = {}
+        for pk, *kunci in cls.objects.filter(
+            user_id__in={k[0] for k in perubahan},
+            tipe__in={k[2] for k in perubahan},
+            **{f'{cls.KOLOM_PERIODE}__in': {k[1] for k in perubahan}},
+        ).values_list('pk', 'user_id', cls.KOLOM_PERIODE, 'tipe', 'kategori_id'):
+            if tuple(kunci) in perubahan:
+                ada[tuple(kunci)] = pk
+        if ada:
+            desimal = models.DecimalField(max_digits=25, decimal_places=2)
+            cls.objects.filter(pk__in=ada.values()).update(
+                total=F('total') + Case(
+                    *(When(pk=pk, then=Value(perubahan[k][0], output_field=desimal)) for k, pk in ada.items()),
+                    output_field=desimal,
+                ),
+                jumlah_transaksi=F('jumlah_transaksi') + Case(
+                    *(When(pk=pk, then=Value(perubahan[k][1])) for k, pk in ada.items()),
+                    output_field=models.IntegerField(),
+                ),
+            )
+        baru = {k: v for k, v in perubahan.items() if k not in ada}
+        if not baru:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create(
+                    cls(
+                        user_id=user_id, tipe=tipe, kategori_id=kategori_id, total=total,
+                        jumlah_transaksi=banyak, **{cls.KOLOM_PERIODE: periode},
+                    )
+                    for (user_id, periode, tipe, kategori_id), (total, banyak) in baru.items()
+                )
+        except IntegrityError:
+            # Another writer created some of these rows first
+            cls._terapkanPerKunci(baru)
+
+    @classmethod
+    def _terapkanPerKunci(cls, perubahan):
+        for (user_id, periode, tipe, kategori_id), (total, banyak) in perubahan.items():
+            kunci = {
+                'user_id': user_id,
+                cls.KOLOM_PERIODE: periode,
+                'tipe': tipe,
+                'kategori_id': kategori_id,
+            }
+            baris = cls.objects.filter(**kunci)
+            if baris.update(total=F('total') + total, jumlah_transaksi=F('jumlah_transaksi') + banyak):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(total=total, jumlah_transaksi=banyak, **kunci)
+            except IntegrityError:
+                # Another writer created the row first
+                baris.update(total=F('total') + total, jumlah_transaksi=F('jumlah_transaksi') + banyak)
+
+    @classmethod
+    def catat(cls, daftar):
+        """Fold (user_id, tanggal, tipe, kategori_id, total, jumlah_transaksi) entries into the rollup"""
+        perubahan = defaultdict(lambda: [Decimal('0.00'), 0])
+        for user_id, tanggal, tipe, kategori_id, total, banyak in daftar:
+            nilai = perubahan[(user_id, cls.periode(tanggal), tipe, kategori_id)]
+            nilai[0] += total
+            nilai[1] += banyak
+        cls.terapkanPerubahan(perubahan)
+
+    @classmethod
+    def lepaskanKategori(cls, kategori_id):
+        """Merge the rows of a kategori into the uncategorised bucket"""
+        baris = cls.objects.filter(kategori_id=kategori_id)
+        perubahan = defaultdict(lambda: [Decimal('0.00'), 0])
+        for r in baris:
+            nilai = perubahan[(r.user_id, getattr(r, cls.KOLOM_PERIODE), r.tipe, None)]
+            nilai[0] += r.total
+            nilai[1] += r.jumlah_transaksi
+        baris.delete()
+        cls.terapkanPerubahan(perubahan)
+
+    class Meta:
+        abstract = True
+
+class RingkasanHarian(Ringkasan):
+    KOLOM_PERIODE = 'tanggal'
+
+    tanggal = models.DateField()
+
+    @staticmethod
+    def periode(tanggal):
+        return tanggal
+
+    class Meta:
+        verbose_name_plural = "Ringkasan Harian"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'tanggal', 'tipe', 'kategori'],
+                name='unik_ringkasan_harian',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tanggal', 'tipe'], name='ringkasan_harian_tgl_idx'),
+        ]
+
+class RingkasanBulanan(Ringkasan):
+    KOLOM_PERIODE = 'bulan'
+
+    # First day of the month
+    bulan = models.DateField()
+
+    @staticmethod
+    def periode(tanggal):
+        return tanggal.replace(day=1)
+
+    class Meta:
+        verbose_name_plural = "Ringkasan Bulanan"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'bulan', 'tipe', 'kategori'],
+                name='unik_ringkasan_bulanan',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['bulan', 'tipe'], name='ringkasan_bulanan_bln_idx'),
+            models.Index(fields=['tipe'], name='ringkasan_bulanan_tipe_idx'),
+            models.Index(fields=['kategori'], name='ringkasan_bulanan_kat_idx'),
+        ]
+
+class RiwayatRekonsiliasi(models.Model):
+    """One reconcile_saldo run; the latest watermark bounds the next incremental run"""
+    mulai = models.DateTimeField()
+    selesai = models.DateTimeField()
+    # Users whose saldo or ledger moved after this are rechecked next time; null forces a full run
+    watermark = models.DateTimeField(null=True)
+    penuh = models.BooleanField(default=False)
+    perbaiki = models.BooleanField(default=False)
+    user_diperiksa = models.IntegerField(default=0)
+    selisih_ditemukan = models.IntegerField(default=0)
+
+    @staticmethod
+    def watermarkTerakhir():
+        terakhir = RiwayatRekonsiliasi.objects.order_by('-selesai').first()
+        return terakhir.watermark if terakhir else None
+
+    class Meta:
+        verbose_name_plural = "Riwayat Rekonsiliasi"
+
+class Penghitung(models.Model):
+    """Row counts kept up to date by the writes themselves, so the dashboard never scans"""
+    USER = 'user'
+    KATEGORI = 'kategori'
+    TRANSAKSI = 'transaksi'
+
+    nama = models.CharField(max_length=50, primary_key=True)
+    nilai = models.BigIntegerField(default=0)
+
+    @staticmethod
+    def tambah(perubahan):
+        """Apply {nama: delta}; callers run this in the transaction that made the change"""
+        for nama, selisih in sorted(perubahan.items()):
+            if not selisih:
+                continue
+            baris = Penghitung.objects.filter(nama=nama)
+            if baris.update(nilai=F('nilai') + selisih):
+                continue
+            try:
+                with transaction.atomic():
+                    Penghitung.objects.create(nama=nama, nilai=selisih)
+            except IntegrityError:
+                # Another writer created the row first
+                baris.update(nilai=F('nilai') + selisih)
+
+    @staticmethod
+    def baca():
+        """Every counter in one query, as {nama: nilai}"""
+        nilai = dict.fromkeys((Penghitung.USER, Penghitung.KATEGORI, Penghitung.TRANSAKSI), 0)
+        nilai.update(Penghitung.objects.values_list('nama', 'nilai'))
+        return nilai
+
+    @staticmethod
+    def bangunUlang():
+        """Recount every counter from its table; returns the new values"""
+        with transaction.atomic():
+            nilai = {
+                Penghitung.USER: User.objects.count(),
+                Penghitung.KATEGORI: Kategori.objects.count(),
+                Penghitung.TRANSAKSI: Transaksi.objects.count() + (
+                    ArsipTahun.objects.aggregate(n=Sum('jumlah_transaksi'))['n'] or 0),
+            }
+            for nama, banyak in nilai.items():
+                Penghitung.objects.update_or_create(nama=nama, defaults={'nilai': banyak})
+        return nilai
+
+    class Meta:
+        verbose_name_plural = "Penghitung"
+
+class Anggaran(models.Model):
+    """Monthly spending limit of one user for one kategori"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kategori = models.ForeignKey(Kategori, on_delete=models.CASCADE)
+    batas = models.DecimalField(max_digits=15, decimal_places=2)
+    # Reject spending past the limit instead of only warning
+    blokir = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.user} - {self.kategori} - {self.batas}"
+
+    class Meta:
+        verbose_name_plural = "Anggaran"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'kategori'], name='unik_anggaran'),
+        ]
+
+class TransaksiBerulang(models.Model):
+    """A recurring transaction: a template plus a monthly schedule"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    tipe = models.CharField(max_length=20, choices=TipeTransaksi.choices)
+    jumlah = models.DecimalField(max_digits=15, decimal_places=2)
+    kategori = models.ForeignKey(Kategori, on_delete=models.SET_NULL, null=True, blank=True)
+    catatan = models.TextField(blank=True, null=True)
+    sumber_pemasukan = models.CharField(max_length=255, blank=True, null=True)
+    metode_pembayaran = models.CharField(max_length=255, blank=True, null=True)
+    # Every interval_bulan months on hari_bulan (clamped to short months), from mulai until berakhir
+    interval_bulan = models.PositiveSmallIntegerField(default=1)
+    hari_bulan = models.PositiveSmallIntegerField()
+    mulai = models.DateField()
+    berakhir = models.DateField(null=True, blank=True)
+    # Latest occurrence already written to the ledger
+    terakhir = models.DateField(null=True, blank=True)
+    aktif = models.BooleanField(default=True)
+
+    def clean(self):
+        if not 1 <= self.hari_bulan <= 31:
+            raise ValidationError("Hari bulan harus antara 1 dan 31")
+        if self.interval_bulan < 1:
+            raise ValidationError("Interval minimal satu bulan")
+
+    def jadwal(self, sampai):
+        """Occurrence dates after terakhir, up to sampai and berakhir"""
+        batas = min(sampai, self.berakhir) if self.berakhir else sampai
+        bulan = self.mulai.year * 12 + self.mulai.month - 1
+        if self.terakhir:
+            # Skip straight to the interval containing the last occurrence
+            lewat = self.terakhir.year * 12 + self.terakhir.month - 1 - bulan
+            bulan += max(lewat, 0) // self.interval_bulan * self.interval_bulan
+        while True:
+            tahun, indeks = divmod(bulan, 12)
+            tanggal = date(tahun, indeks + 1, min(self.hari_bulan, calendar.monthrange(tahun, indeks + 1)[1]))
+            if tanggal > batas:
+                return
+            if tanggal >= self.mulai and (self.terakhir is None or tanggal > self.terakhir):
+                yield tanggal
+            bulan += self.interval_bulan
+
+    def buatTransaksi(self, tanggal):
+        """The ledger row of one occurrence; its id is derived from the rule and date"""
+        return Transaksi(
+            id=buatId(tanggal, kunci=f"REC_{self.pk}_{tanggal:%Y%m%d}"),
+            jumlah=self.jumlah,
+            tanggal=tanggal,
+            tipe=self.tipe,
+            kategori_id=self.kategori_id,
+            catatan=self.catatan,
+            user_id=self.user_id,
+            sumber_pemasukan=self.sumber_pemasukan,
+            metode_pembayaran=self.metode_pembayaran,
+        )
+
+    def __str__(self):
+        return f"{self.get_tipe_display()} - {self.jumlah} - tiap {self.interval_bulan} bulan"
+
+    class Meta:
+        verbose_name_plural = "Transaksi Berulang"
+        indexes = [
+            models.Index(fields=['aktif', 'terakhir'], name='berulang_aktif_terakhir_idx'),
+        ]
+
 class PengelolaKategori:
     """Service class for managing Kategori operations"""
     
@@ -253,6 +835,30 @@ class PengelolaTransaksi:
         except ValidationError as e:
             raise e
 
+    @staticmethod
+    def tambahTransaksiMassal(daftar_transaksi, batch_size=None):
+        """Insert validated, unsaved transactions in bulk.
+
+        Balance deltas are applied once per user and rollup deltas once per
+        key, all in one database transaction; if any user lacks funds for the
+        batch's net effect nothing is written and ValidationError is raised.
+        """
+        daftar_transaksi = list(daftar_transaksi)
+        if not daftar_transaksi:
+            return daftar_transaksi
+        selisih = defaultdict(Decimal)
+        for trx in daftar_transaksi:
+            selisih[trx.user_id] += trx.efekSaldo()
+        with transaction.atomic():
+            if not User.terapkanSelisihSaldo(selisih):
+                raise ValidationError("Saldo tidak mencukupi untuk batch transaksi ini")
+            Transaksi.objects.bulk_create(daftar_transaksi, batch_size=batch_size)
+            perubahan = [(*trx.kunciRingkasan(), Decimal(trx.jumlah), 1) for trx in daftar_transaksi]
+            LayananRingkasan.catatPerubahan(perubahan)
+            PengelolaAnggaran.periksaAnggaran(perubahan)
+            Penghitung.tambah({Penghitung.TRANSAKSI: len(daftar_transaksi)})
+        return daftar_transaksi
+
     @staticmethod
     def hapusTransaksi(id):
         """Delete transaksi by id"""
@@ -273,20 +879,92 @@ class PengelolaTransaksi:
             raise e
 
     @staticmethod
-    def ambilTransaksiBerdasarkanTanggal(tanggal):
-        """Get transactions by date"""
-        return list(Transaksi.objects.filter(tanggal=tanggal))
+    def ambilTransaksiBerdasarkanTanggal(tanggal, user=None):
+        """Get transactions by date, of one user when given"""
+        return list(PengelolaTransaksi.saringTransaksi(user, dari=tanggal, sampai=tanggal))
+
+    @staticmethod
+    def ambilTransaksiBerdasarkanBulan(bulan, tahun, user=None):
+        """Get transactions of a month as an index-friendly date range, of one user when given"""
+        awal, akhir = rentangBulan(bulan, tahun)
+        return PengelolaTransaksi.saringTransaksi(user, dari=awal, sampai=akhir - timedelta(days=1))
 
     @staticmethod
-    def ambilTransaksiBerdasarkanKategori(kategori):
-        """Get transactions by category"""
-        return list(Transaksi.objects.filter(kategori=kategori))
+    def ambilTransaksiBerdasarkanKategori(kategori, user=None):
+        """Get transactions by category, of one user when given"""
+        return list(PengelolaTransaksi.saringTransaksi(user, kategori=kategori))
+
+    @staticmethod
+    def saringTransaksi(user=None, dari=None, sampai=None, tipe=None, kategori=None):
+        """Transactions filtered by owner, inclusive date range, tipe and kategori.
+
+        Pass user wherever a page acts for one user: the filter then runs on
+        an index starting with user_id and its cost follows that user's ledger.
+        """
+        transaksi = Transaksi.objects.all()
+        if user is not None:
+            transaksi = transaksi.milik(user)
+        if dari is not None:
+            transaksi = transaksi.filter(tanggal__gte=dari)
+        if sampai is not None:
+            transaksi = transaksi.filter(tanggal__lt=sampai + timedelta(days=1))
+        if tipe is not None:
+            transaksi = transaksi.filter(tipe=tipe)
+        if kategori is not None:
+            transaksi = transaksi.filter(kategori=kategori)
+        return transaksi
+
+    @staticmethod
+    def ambilHalamanTransaksi(cursor=None, ukuran=50, transaksi=None, kolom=None):
+        """Get one page of transactions, newest first, after a keyset cursor.
+
+        With kolom the page holds dicts of just those columns (plus tanggal
+        and id for the cursor) instead of model instances.
+        """
+        if transaksi is None:
+            transaksi = Transaksi.objects.all()
+        transaksi = transaksi.order_by('-tanggal', '-id')
+        if kolom is None:
+            transaksi = transaksi.select_related('kategori')
+        if cursor:
+            tanggal, id = PengelolaTransaksi.bacaCursor(cursor)
+            transaksi = transaksi.filter(
+                Q(tanggal__lt=tanggal) | Q(tanggal=tanggal, id__lt=id)
+            )
+        if kolom is not None:
+            transaksi = transaksi.values(*dict.fromkeys([*kolom, 'tanggal', 'id']))
+        # Fetch one extra row to know whether a next page exists
+        halaman = list(transaksi[:ukuran + 1])
+        cursor_berikutnya = None
+        if len(halaman) > ukuran:
+            halaman = halaman[:ukuran]
+            cursor_berikutnya = PengelolaTransaksi.buatCursor(halaman[-1])
+        return {'transaksi': halaman, 'cursor_berikutnya': cursor_berikutnya}
 
     @staticmethod
-    def hitungTotalBerdasarkanTipe(tipe):
-        """Calculate total amount by transaction type"""
-        result = Transaksi.objects.filter(tipe=tipe).aggregate(total=Sum('jumlah'))
-        return result['total'] or Decimal('0.00')
+    def buatCursor(transaksi):
+        """Encode the (tanggal, id) position of a transaction or values() row as an opaque cursor"""
+        if isinstance(transaksi, dict):
+            posisi = f"{transaksi['tanggal'].isoformat()}|{transaksi['id']}"
+        else:
+            posisi = f"{transaksi.tanggal.isoformat()}|{transaksi.id}"
+        return urlsafe_b64encode(posisi.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def bacaCursor(cursor):
+        """Decode a cursor made by buatCursor, raising ValidationError when malformed"""
+        try:
+            posisi = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            tanggal, id = posisi.split('|', 1)
+            return date.fromisoformat(tanggal), id
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError("Cursor tidak valid")
+
+    @staticmethod
+    def hitungTotalBerdasarkanTipe(tipe, user=None):
+        """Calculate total amount by transaction type, of one user when given"""
+        pemasukan, pengeluaran = LayananRingkasan.hitungTotalPerTipe(user)
+        return pemasukan if tipe == TipeTransaksi.PEMASUKAN else pengeluaran
 
 class PengelolaSaldo:
     """Service class for managing user balance operations"""
@@ -298,7 +976,7 @@ class PengelolaSaldo:
         
         # Create income transaction for deposit
         transaksi_deposit = TransaksiPemasukan(
-            id=f"DEP_{user.id}_{date.today().strftime('%Y%m%d')}_{int(user.saldo * 100)}",
+            id=buatId(),
             jumlah=jumlah,
             tanggal=date.today(),
             user=user,
@@ -320,74 +998,422 @@ class PengelolaSaldo:
     @staticmethod
     def transferSaldo(user_pengirim, user_penerima, jumlah, catatan="Transfer Saldo"):
         """Transfer balance between users"""
-        from datetime import date
-        
-        if not user_pengirim.cekSaldoCukup(jumlah):
-            raise ValidationError("Saldo pengirim tidak mencukupi")
-        
-        try:
-            # Create expense transaction for sender
-            transaksi_keluar = TransaksiPengeluaran(
-                id=f"TRF_OUT_{user_pengirim.id}_{date.today().strftime('%Y%m%d')}_{int(jumlah * 100)}",
-                jumlah=jumlah,
-                tanggal=date.today(),
-                user=user_pengirim,
-                catatan=f"{catatan} - ke {user_penerima.nama}",
-                metode_pembayaran="Transfer"
-            )
-            transaksi_keluar.save()
-            
-            # Create income transaction for receiver
-            transaksi_masuk = TransaksiPemasukan(
-                id=f"TRF_IN_{user_penerima.id}_{date.today().strftime('%Y%m%d')}_{int(jumlah * 100)}",
-                jumlah=jumlah,
-                tanggal=date.today(),
-                user=user_penerima,
-                catatan=f"{catatan} - dari {user_pengirim.nama}",
-                sumber_pemasukan="Transfer"
+        hasil = PengelolaSaldo.transferMassal([(user_pengirim, user_penerima, jumlah, catatan)])[0]
+        # Reflect the new balances on the caller's instances
+        user_pengirim.saldo -= hasil['keluar'].jumlah
+        user_penerima.saldo += hasil['masuk'].jumlah
+        return hasil
+
+    @staticmethod
+    def transferMassal(daftar_transfer, tanggal=None):
+        """Execute many transfers atomically in one database transaction.
+
+        Each transfer is (pengirim, penerima, jumlah[, catatan]) with users
+        given as instances or ids. Affected users are locked in id order,
+        both ledger legs of every transfer are bulk-inserted and each user's
+        balance moves once by its net delta. If any user would end up
+        overdrawn nothing is written and ValidationError is raised.
+        """
+        tanggal = tanggal or date.today()
+        transfer = []
+        for item in daftar_transfer:
+            pengirim, penerima, jumlah = item[:3]
+            catatan = item[3] if len(item) > 3 else "Transfer Saldo"
+            pengirim_id = getattr(pengirim, 'pk', pengirim)
+            penerima_id = getattr(penerima, 'pk', penerima)
+            jumlah = Decimal(jumlah)
+            if jumlah <= 0:
+                raise ValidationError("Jumlah transfer harus positif")
+            if pengirim_id == penerima_id:
+                raise ValidationError("Pengirim dan penerima tidak boleh sama")
+            transfer.append((pengirim_id, penerima_id, jumlah, catatan))
+        if not transfer:
+            return []
+
+        with transaction.atomic():
+            # Lock every affected user in a deterministic order to avoid deadlocks
+            user_ids = sorted({t[0] for t in transfer} | {t[1] for t in transfer})
+            nama = dict(
+                User.objects.select_for_update().filter(pk__in=user_ids)
+                .order_by('pk').values_list('pk', 'nama')
             )
-            transaksi_masuk.save()
-            
-            return {"keluar": transaksi_keluar, "masuk": transaksi_masuk}
-        except ValidationError as e:
-            raise e
+            if len(nama) != len(user_ids):
+                raise ValidationError("User transfer tidak ditemukan")
+
+            hasil = []
+            legs = []
+            for pengirim_id, penerima_id, jumlah, catatan in transfer:
+                keluar = Transaksi(
+                    id=buatId(),
+                    jumlah=jumlah,
+                    tanggal=tanggal,
+                    tipe=TipeTransaksi.PENGELUARAN,
+                    user_id=pengirim_id,
+                    catatan=f"{catatan} - ke {nama[penerima_id]}",
+                    metode_pembayaran="Transfer"
+                )
+                masuk = Transaksi(
+                    id=buatId(),
+                    jumlah=jumlah,
+                    tanggal=tanggal,
+                    tipe=TipeTransaksi.PEMASUKAN,
+                    user_id=penerima_id,
+                    catatan=f"{catatan} - dari {nama[pengirim_id]}",
+                    sumber_pemasukan="Transfer"
+                )
+                legs += [keluar, masuk]
+                hasil.append({"keluar": keluar, "masuk": masuk})
+
+            try:
+                PengelolaTransaksi.tambahTransaksiMassal(legs, batch_size=500)
+            except ValidationError:
+                raise ValidationError("Saldo pengirim tidak mencukupi")
+        return hasil
+
+class PengelolaAnggaran:
+    """Service class for per-kategori monthly budgets"""
+
+    @staticmethod
+    def aturAnggaran(user, kategori, batas, blokir=False):
+        """Set or replace the monthly budget of user for kategori"""
+        batas = Decimal(batas)
+        if batas < 0:
+            raise ValidationError("Batas anggaran tidak boleh negatif")
+        anggaran, _ = Anggaran.objects.update_or_create(
+            user=user, kategori=kategori, defaults={'batas': batas, 'blokir': blokir},
+        )
+        return anggaran
+
+    @staticmethod
+    def hapusAnggaran(user, kategori):
+        """Remove a budget; returns whether one existed"""
+        return Anggaran.objects.filter(user=user, kategori=kategori).delete()[0] > 0
+
+    @staticmethod
+    def periksaAnggaran(daftar):
+        """Check the rollup deltas of a write against the budgets they raise.
+
+        Runs after catatPerubahan in the same transaction, so the month's
+        spent total is read from RingkasanBulanan rather than summed from the
+        ledger: two indexed lookups whatever its size. Raises ValidationError
+        if a blocking budget is exceeded; returns warnings for the others.
+        """
+        naik = defaultdict(Decimal)
+        for user_id, tanggal, tipe, kategori_id, total, banyak in daftar:
+            if tipe == TipeTransaksi.PENGELUARAN and kategori_id is not None:
+                naik[(user_id, kategori_id, RingkasanBulanan.periode(tanggal))] += total
+        # Edits and deletes that lower spending never trip a budget
+        naik = {kunci for kunci, total in naik.items() if total > 0}
+        if not naik:
+            return []
+        anggaran = {
+            (a.user_id, a.kategori_id): a
+            for a in Anggaran.objects.filter(
+                user_id__in={k[0] for k in naik}, kategori_id__in={k[1] for k in naik}
+            ).select_related('kategori')
+        }
+        naik = sorted(k for k in naik if k[:2] in anggaran)
+        if not naik:
+            return []
+        terpakai = {
+            (user_id, kategori_id, bulan): total
+            for user_id, kategori_id, bulan, total in RingkasanBulanan.objects.filter(
+                user_id__in={k[0] for k in naik}, kategori_id__in={k[1] for k in naik},
+                bulan__in={k[2] for k in naik}, tipe=TipeTransaksi.PENGELUARAN,
+            ).values_list('user_id', 'kategori_id', 'bulan', 'total')
+        }
+        peringatan, ditolak = [], []
+        for kunci in naik:
+            a = anggaran[kunci[:2]]
+            total = terpakai.get(kunci, Decimal('0.00'))
+            if total > a.batas:
+                pesan = f"Anggaran {a.kategori.nama} {kunci[2]:%m/%Y} terlampaui: {total} dari {a.batas}"
+                (ditolak if a.blokir else peringatan).append(pesan)
+        if ditolak:
+            raise ValidationError(ditolak)
+        return peringatan
+
+    @staticmethod
+    def statusAnggaran(user, bulan, tahun):
+        """Every kategori with the user's budget and month's spend, in one query"""
+        awal, _ = rentangBulan(bulan, tahun)
+        anggaran = Anggaran.objects.filter(user=user, kategori=OuterRef('pk'))
+        baris = Kategori.objects.annotate(
+            batas=Subquery(anggaran.values('batas')[:1]),
+            blokir=Subquery(anggaran.values('blokir')[:1]),
+            terpakai=Coalesce(
+                Subquery(
+                    RingkasanBulanan.objects.filter(
+                        user=user, bulan=awal, tipe=TipeTransaksi.PENGELUARAN, kategori=OuterRef('pk'),
+                    ).values('total')[:1]
+                ),
+                Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=25, decimal_places=2),
+            ),
+        ).order_by('nama').values('id', 'nama', 'ikon', 'warna', 'batas', 'blokir', 'terpakai')
+        status = []
+        for b in baris:
+            b['sisa'] = None if b['batas'] is None else b['batas'] - b['terpakai']
+            b['terlampaui'] = b['sisa'] is not None and b['sisa'] < 0
+            status.append(b)
+        return status
+
+class PengelolaBerulang:
+    """Service class for recurring transactions"""
+
+    @staticmethod
+    def buatAturan(templat, interval_bulan=1, hari_bulan=None, mulai=None, berakhir=None):
+        """Create a rule repeating a TransaksiPemasukan/TransaksiPengeluaran template.
+
+        The schedule defaults to the template's date. A template already in
+        the ledger counts as the first occurrence and is not written again.
+        """
+        # Unsaved proxies only set their tipe in save()
+        tipe = {TransaksiPemasukan: TipeTransaksi.PEMASUKAN, TransaksiPengeluaran: TipeTransaksi.PENGELUARAN}.get(
+            type(templat), templat.tipe)
+        aturan = TransaksiBerulang(
+            user_id=templat.user_id,
+            tipe=tipe,
+            jumlah=templat.jumlah,
+            kategori_id=templat.kategori_id,
+            catatan=templat.catatan,
+            sumber_pemasukan=templat.sumber_pemasukan,
+            metode_pembayaran=templat.metode_pembayaran,
+            interval_bulan=interval_bulan,
+            hari_bulan=hari_bulan or templat.tanggal.day,
+            mulai=mulai or templat.tanggal,
+            berakhir=berakhir,
+            terakhir=None if templat._state.adding else templat.tanggal,
+        )
+        aturan.full_clean()
+        aturan.save()
+        return aturan
+
+    @staticmethod
+    def jalankanJatuhTempo(sampai=None, batch_size=1000):
+        """Write every occurrence due up to sampai that earlier runs have not written.
+
+        All occurrences go through tambahTransaksiMassal in one transaction,
+        so balances move once per user and rollups once per key. If a user
+        lacks funds or hits a blocking budget, only that user's rules are
+        held back. Each rule's terakhir advances in the same transaction and
+        occurrence ids are derived from rule and date, so re-running, or
+        running concurrently, never duplicates an occurrence.
+        """
+        sampai = sampai or date.today()
+        hasil = {'aturan': 0, 'transaksi': 0, 'gagal': {}}
+        with transaction.atomic():
+            per_user = defaultdict(list)
+            for aturan in (
+                TransaksiBerulang.objects.filter(aktif=True, mulai__lte=sampai)
+                .exclude(terakhir__gte=sampai).order_by('user_id', 'pk')
+            ):
+                kejadian = [aturan.buatTransaksi(tanggal) for tanggal in aturan.jadwal(sampai)]
+                if kejadian:
+                    per_user[aturan.user_id].append((aturan, kejadian))
+            if not per_user:
+                return hasil
+
+            berhasil = []
+            try:
+                with transaction.atomic():
+                    PengelolaTransaksi.tambahTransaksiMassal(
+                        [trx for kelompok in per_user.values() for _, kejadian in kelompok for trx in kejadian],
+                        batch_size=batch_size,
+                    )
+                berhasil = [item for kelompok in per_user.values() for item in kelompok]
+            except ValidationError:
+                # Retry user by user so one shortfall does not hold up everyone else
+                for user_id, kelompok in per_user.items():
+                    try:
+                        with transaction.atomic():
+                            PengelolaTransaksi.tambahTransaksiMassal(
+                                [trx for _, kejadian in kelompok for trx in kejadian], batch_size=batch_size,
+                            )
+                        berhasil += kelompok
+                    except ValidationError as e:
+                        hasil['gagal'][user_id] = ' '.join(e.messages)
+
+            for aturan, kejadian in berhasil:
+                aturan.terakhir = kejadian[-1].tanggal
+            TransaksiBerulang.objects.bulk_update([aturan for aturan, _ in berhasil], ['terakhir'], batch_size=batch_size)
+            hasil['aturan'] = len(berhasil)
+            hasil['transaksi'] = sum(len(kejadian) for _, kejadian in berhasil)
+        return hasil
 
 class LayananRingkasan:
-    """Service class for summary calculations"""
+    """Service class for summary calculations, served from the rollup tables"""
+
+    @staticmethod
+    def catatPerubahan(daftar):
+        """Record (user_id, tanggal, tipe, kategori_id, total, jumlah_transaksi) deltas in both rollups"""
+        daftar = list(daftar)
+        RingkasanHarian.catat(daftar)
+        RingkasanBulanan.catat(daftar)
+        kunci = set()
+        for user_id, tanggal, tipe, kategori_id, total, banyak in daftar:
+            kunci |= CacheRingkasan.kunciTerdampak(user_id, tanggal, kategori_id)
+        CacheRingkasan.hapus(kunci)
+
+    @staticmethod
+    def invalidasiKategori(kategori_id):
+        """Drop cached figures that show a kategori's totals or details"""
+        kunci = {CacheRingkasan.kunci(None, 'kategori', kategori_id)}
+        for user_id, bulan in (
+            RingkasanBulanan.objects.filter(kategori_id=kategori_id)
+            .values_list('user_id', 'bulan').distinct()
+        ):
+            kunci |= CacheRingkasan.kunciTerdampak(user_id, bulan, kategori_id)
+            kunci |= CacheRingkasan.kunciTerdampak(user_id, bulan, None)
+        CacheRingkasan.hapus(kunci)
+
+    @staticmethod
+    def bangunUlangRingkasan(batch_size=1000):
+        """Rebuild both rollup tables from the Transaksi ledger and its archive tables"""
+        with transaction.atomic():
+            RingkasanHarian.objects.all().delete()
+            RingkasanBulanan.objects.all().delete()
+            for model, periode in ((RingkasanHarian, F('tanggal')), (RingkasanBulanan, TruncMonth('tanggal'))):
+                baris = (
+                    Transaksi.objects
+                    .values('user_id', 'tipe', 'kategori_id', periode=periode)
+                    .annotate(total=Sum('jumlah'), jumlah_transaksi=Count('id'))
+                    .order_by()
+                )
+                model.objects.bulk_create(
+                    (
+                        model(
+                            user_id=r['user_id'],
+                            tipe=r['tipe'],
+                            kategori_id=r['kategori_id'],
+                            total=r['total'],
+                            jumlah_transaksi=r['jumlah_transaksi'],
+                            **{model.KOLOM_PERIODE: r['periode']},
+                        )
+                        for r in baris.iterator(chunk_size=batch_size)
+                    ),
+                    batch_size=batch_size,
+                )
+            LayananRingkasan._lipatArsip(batch_size)
+            # Every cached figure may have changed; the alias holds nothing else
+            CacheRingkasan.hapusSemua()
+
+    @staticmethod
+    def _lipatArsip(batch_size):
+        """Add the archived rows' daily totals to both rollups, batch_size keys at a time"""
+        kategori = set(Kategori.objects.values_list('pk', flat=True))
+        for model in ArsipTahun.semuaModel():
+            baris = (
+                model.objects.filter(user_id__in=User.objects.values('pk'))
+                .values_list('user_id', 'tanggal', 'tipe', 'kategori_id')
+                .annotate(total=Sum('jumlah'), jumlah_transaksi=Count('id'))
+                .order_by()
+            )
+            daftar = []
+            for user_id, tanggal, tipe, kategori_id, total, banyak in baris.iterator(chunk_size=batch_size):
+                daftar.append((user_id, tanggal, tipe, kategori_id if kategori_id in kategori else None, total, banyak))
+                if len(daftar) >= batch_size:
+                    RingkasanHarian.catat(daftar)
+                    RingkasanBulanan.catat(daftar)
+                    daftar = []
+            if daftar:
+                RingkasanHarian.catat(daftar)
+                RingkasanBulanan.catat(daftar)
     
     @staticmethod
-    def hitungTotalBerdasarkanTanggal(tanggal):
-        """Calculate total amount by date"""
-        result = Transaksi.objects.filter(tanggal=tanggal).aggregate(total=Sum('jumlah'))
-        return result['total'] or Decimal('0.00')
+    def _ringkasan(model, user_id):
+        """Rollup rows of one user (on the user-first unique index), or of everyone"""
+        baris = model.objects.all()
+        return baris if user_id is None else baris.filter(user_id=user_id)
 
     @staticmethod
-    def hitungTotalBerdasarkanBulan(bulan, tahun):
-        """Calculate total amount by month and year"""
-        result = Transaksi.objects.filter(
-            tanggal__month=bulan, 
-            tanggal__year=tahun
-        ).aggregate(total=Sum('jumlah'))
-        return result['total'] or Decimal('0.00')
+    def hitungTotalBerdasarkanTanggal(tanggal, user=None):
+        """Calculate total amount by date, of one user when given"""
+        user_id = getattr(user, 'pk', user)
+        def hitung():
+            result = LayananRingkasan._ringkasan(RingkasanHarian, user_id).filter(tanggal=tanggal).aggregate(
+                total=Sum('total'))
+            return result['total'] or Decimal('0.00')
+        return CacheRingkasan.ambil(CacheRingkasan.kunci(user_id, 'hari', tanggal.isoformat()), hitung)
 
     @staticmethod
-    def hitungTotalBerdasarkanKategori(kategori):
-        """Calculate total amount by category"""
-        result = Transaksi.objects.filter(kategori=kategori).aggregate(total=Sum('jumlah'))
-        return result['total'] or Decimal('0.00')
+    def hitungTotalBerdasarkanBulan(bulan, tahun, user=None):
+        """Calculate total amount by month and year, of one user when given"""
+        return LayananRingkasan.ringkasanBulanan(bulan, tahun, user)['total']
+
+    @staticmethod
+    def hitungTotalPerTipe(user=None):
+        """Calculate income and expense totals in one aggregate, of one user when given"""
+        user_id = getattr(user, 'pk', user)
+        def hitung():
+            result = LayananRingkasan._ringkasan(RingkasanBulanan, user_id).aggregate(
+                pemasukan=Sum('total', filter=Q(tipe=TipeTransaksi.PEMASUKAN), default=Decimal('0.00')),
+                pengeluaran=Sum('total', filter=Q(tipe=TipeTransaksi.PENGELUARAN), default=Decimal('0.00')),
+            )
+            return result['pemasukan'], result['pengeluaran']
+        return CacheRingkasan.ambil(CacheRingkasan.kunci(user_id, 'tipe'), hitung)
+
+    @staticmethod
+    def ringkasanBulanan(bulan, tahun, user=None):
+        """Per-kategori income/expense totals and counts of a month in one GROUP BY, of one user when given"""
+        awal = date(tahun, bulan, 1)
+        user_id = getattr(user, 'pk', user)
+        return CacheRingkasan.ambil(
+            CacheRingkasan.kunci(user_id, 'bulan', f"{awal:%Y-%m}"),
+            lambda: LayananRingkasan._hitungRingkasanBulanan(awal, user_id),
+        )
+
+    @staticmethod
+    def _hitungRingkasanBulanan(awal, user_id=None):
+        pemasukan = Q(tipe=TipeTransaksi.PEMASUKAN)
+        pengeluaran = Q(tipe=TipeTransaksi.PENGELUARAN)
+        per_kategori = list(
+            LayananRingkasan._ringkasan(RingkasanBulanan, user_id).filter(bulan=awal)
+            .values('kategori_id', nama=F('kategori__nama'), ikon=F('kategori__ikon'), warna=F('kategori__warna'))
+            .annotate(
+                pemasukan=Sum('total', filter=pemasukan, default=Decimal('0.00')),
+                pengeluaran=Sum('total', filter=pengeluaran, default=Decimal('0.00')),
+                jumlah_pemasukan=Sum('jumlah_transaksi', filter=pemasukan, default=0),
+                jumlah_pengeluaran=Sum('jumlah_transaksi', filter=pengeluaran, default=0),
+            )
+            .filter(Q(jumlah_pemasukan__gt=0) | Q(jumlah_pengeluaran__gt=0))
+            .order_by('nama')
+        )
+        total_pemasukan = sum((k['pemasukan'] for k in per_kategori), Decimal('0.00'))
+        total_pengeluaran = sum((k['pengeluaran'] for k in per_kategori), Decimal('0.00'))
+        return {
+            'kategori': per_kategori,
+            'pemasukan': total_pemasukan,
+            'pengeluaran': total_pengeluaran,
+            'total': total_pemasukan + total_pengeluaran,
+            'jumlah_transaksi': sum(k['jumlah_pemasukan'] + k['jumlah_pengeluaran'] for k in per_kategori),
+        }
+
+    @staticmethod
+    def hitungTotalBerdasarkanKategori(kategori, user=None):
+        """Calculate total amount by category, of one user when given"""
+        kategori_id = getattr(kategori, 'pk', kategori)
+        user_id = getattr(user, 'pk', user)
+        def hitung():
+            result = LayananRingkasan._ringkasan(RingkasanBulanan, user_id).filter(
+                kategori_id=kategori_id).aggregate(total=Sum('total'))
+            return result['total'] or Decimal('0.00')
+        return CacheRingkasan.ambil(CacheRingkasan.kunci(user_id, 'kategori', kategori_id), hitung)
     
     @staticmethod
     def ringkasanSaldoUser(user):
         """Get user balance summary"""
-        total_pemasukan = Transaksi.objects.filter(
-            user=user, 
-            tipe=TipeTransaksi.PEMASUKAN
-        ).aggregate(total=Sum('jumlah'))['total'] or Decimal('0.00')
-        
-        total_pengeluaran = Transaksi.objects.filter(
-            user=user, 
-            tipe=TipeTransaksi.PENGELUARAN
-        ).aggregate(total=Sum('jumlah'))['total'] or Decimal('0.00')
+        total = CacheRingkasan.ambil(
+            CacheRingkasan.kunci(user.pk, 'saldo'),
+            lambda: dict(
+                RingkasanBulanan.objects.filter(user=user)
+                .values('tipe')
+                .annotate(total=Sum('total'))
+                .values_list('tipe', 'total')
+            ),
+        )
+        total_pemasukan = total.get(TipeTransaksi.PEMASUKAN) or Decimal('0.00')
+        total_pengeluaran = total.get(TipeTransaksi.PENGELUARAN) or Decimal('0.00')
         
         return {
             'saldo_saat_ini': user.getSaldo(),
@@ -397,19 +1423,11 @@ class LayananRingkasan:
         }
     
     @staticmethod
-    def hitungPemasukanBerdasarkanBulan(bulan, tahun):
+    def hitungPemasukanBerdasarkanBulan(bulan, tahun, user=None):
         """Menghitung total pemasukan pada bulan dan tahun tertentu"""
-        return sum(t.jumlah for t in Transaksi.objects.filter(
-            tanggal__month=bulan,
-            tanggal__year=tahun,
-            tipe=TipeTransaksi.PEMASUKAN
-        ))
+        return LayananRingkasan.ringkasanBulanan(bulan, tahun, user)['pemasukan']
     
     @staticmethod
-    def hitungPengeluaranBerdasarkanBulan(bulan, tahun):
+    def hitungPengeluaranBerdasarkanBulan(bulan, tahun, user=None):
         """Menghitung total pengeluaran pada bulan dan tahun tertentu"""
-        return sum(t.jumlah for t in Transaksi.objects.filter(
-            tanggal__month=bulan,
-            tanggal__year=tahun,
-            tipe=TipeTransaksi.PENGELUARAN
-        ))
\ No newline at end of file
+        return LayananRingkasan.ringkasanBulanan(bulan, tahun, user)['pengeluaran']
@@ -0,0 +1,188 @@
+"""Full-text search over transaction notes, backed by an SQLite FTS5 index"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import PengelolaTransaksi, Transaksi
+
+TABEL = 'main_transaksi_fts'
+ISI = 'main_transaksi_fts_isi'
+KOLOM = ('catatan', 'sumber_pemasukan', 'metode_pembayaran')
+
+
+KUNCI = 'main_transaksi_fts_kunci'
+
+
+def _nilai(baris):
+    return ', '.join([*(f'{baris}.{k}' for k in KOLOM), f"'u' || {baris}.user_id"])
+
+
+def _kunci(baris):
+    return f"FROM {KUNCI} WHERE transaksi_id = {baris}.id"
+
+
+def _keTransaksi(baris):
+    return f"JOIN {KUNCI} k ON k.baris = {baris} JOIN main_transaksi t ON t.id = k.transaksi_id"
+
+
+# External-content index: it stores only the inverted index and reads the
+# text back through a view over main_transaksi. Index rows are keyed on
+# main_transaksi_fts_kunci.baris, an INTEGER PRIMARY KEY mapped to the
+# transaction id, because the implicit rowid of main_transaksi is renumbered
+# by VACUUM and by table remakes. The view adds the owner as a 'u<id>'
+# token, so per-user searches are narrowed inside the index instead of by
+# joining every match back to the ledger. The triggers keep it in step with
+# every write, including bulk_create and cascades that never call
+# Transaksi.save/delete.
+_BUAT = [
+    f"""CREATE TABLE IF NOT EXISTS {KUNCI} (
+        baris INTEGER PRIMARY KEY AUTOINCREMENT,
+        transaksi_id varchar(255) NOT NULL UNIQUE
+    )""",
+    f"""CREATE VIEW IF NOT EXISTS {ISI} AS
+        SELECT k.baris, {', '.join(f't.{k}' for k in KOLOM)}, 'u' || t.user_id AS pemilik
+        FROM {KUNCI} k JOIN main_transaksi t ON t.id = k.transaksi_id""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABEL} USING fts5(
+        {', '.join(KOLOM)}, pemilik, content='{ISI}', content_rowid='baris',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # OR IGNORE: a key left behind while the triggers were missing must not
+    # block the ledger write; rebuild_pencarian reconciles it
+    f"""CREATE TRIGGER IF NOT EXISTS {TABEL}_ai AFTER INSERT ON main_transaksi BEGIN
+        INSERT OR IGNORE INTO {KUNCI}(transaksi_id) VALUES (new.id);
+        INSERT INTO {TABEL}(rowid, {', '.join(KOLOM)}, pemilik) SELECT baris, {_nilai('new')} {_kunci('new')};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABEL}_ad AFTER DELETE ON main_transaksi BEGIN
+        INSERT INTO {TABEL}({TABEL}, rowid, {', '.join(KOLOM)}, pemilik)
+            SELECT 'delete', baris, {_nilai('old')} {_kunci('old')};
+        DELETE {_kunci('old')};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABEL}_au
+        AFTER UPDATE OF id, {', '.join(KOLOM)}, user_id ON main_transaksi BEGIN
+        INSERT INTO {TABEL}({TABEL}, rowid, {', '.join(KOLOM)}, pemilik)
+            SELECT 'delete', baris, {_nilai('old')} {_kunci('old')};
+        UPDATE {KUNCI} SET transaksi_id = new.id WHERE transaksi_id = old.id AND old.id <> new.id;
+        INSERT INTO {TABEL}(rowid, {', '.join(KOLOM)}, pemilik) SELECT baris, {_nilai('new')} {_kunci('new')};
+    END""",
+]
+# Brings the key table in line with the ledger before a rebuild: drops keys
+# of rows that are gone and numbers new rows in id (creation) order
+_SELARASKAN = [
+    f"DELETE FROM {KUNCI} WHERE transaksi_id NOT IN (SELECT id FROM main_transaksi)",
+    f"""INSERT INTO {KUNCI}(transaksi_id)
+        SELECT id FROM main_transaksi WHERE id NOT IN (SELECT transaksi_id FROM {KUNCI}) ORDER BY id""",
+]
+_HAPUS = [
+    f"DROP TRIGGER IF EXISTS {TABEL}_ai",
+    f"DROP TRIGGER IF EXISTS {TABEL}_ad",
+    f"DROP TRIGGER IF EXISTS {TABEL}_au",
+    f"DROP TABLE IF EXISTS {TABEL}",
+    f"DROP VIEW IF EXISTS {ISI}",
+    f"DROP TABLE IF EXISTS {KUNCI}",
+]
+
+
+def didukung(koneksi=connection):
+    return koneksi.vendor == 'sqlite'
+
+
+def pasangIndeks(koneksi=connection, bangun_ulang=True):
+    """Create the index and its triggers if missing, then reindex the whole ledger.
+
+    Run again after anything that rebuilds main_transaksi: an ALTER that
+    copies the table drops its triggers. The index is keyed on transaction
+    ids, so VACUUM leaves it valid.
+    """
+    if not didukung(koneksi):
+        return False
+    with koneksi.cursor() as cursor:
+        for pernyataan in _BUAT:
+            cursor.execute(pernyataan)
+        if bangun_ulang:
+            for pernyataan in _SELARASKAN:
+                cursor.execute(pernyataan)
+            cursor.execute(f"INSERT INTO {TABEL}({TABEL}) VALUES ('rebuild')")
+    return True
+
+
+def lepasIndeks(koneksi=connection):
+    if didukung(koneksi):
+        with koneksi.cursor() as cursor:
+            for pernyataan in _HAPUS:
+                cursor.execute(pernyataan)
+
+
+def kueriFts(teks):
+    """Free text as an FTS5 query: every word must match, the last one as a prefix.
+
+    Words are quoted so user input can never be parsed as FTS syntax.
+    """
+    kata = ['"' + k.replace('"', '""') + '"' for k in teks.split()]
+    if not kata:
+        return None
+    return f"{{{' '.join(KOLOM)}}} : ({' '.join(kata)}*)"
+
+
+class PengelolaPencarian:
+    """Service class for ranked transaction search"""
+
+    @staticmethod
+    def cariTransaksi(teks, user=None, dari=None, sampai=None, tipe=None, kategori=None, batas=50):
+        """Transactions matching teks, best match first, with the same filters as saringTransaksi.
+
+        On SQLite the match comes from the FTS5 index, narrowed to the owner
+        inside the index. Only the newest PENCARIAN_KANDIDAT matches are
+        scored, so a very common word costs the same as a rare one; each
+        result carries its bm25 score as skor (lower is better). Other
+        databases fall back to icontains, newest first.
+        """
+        kueri = kueriFts(teks)
+        if kueri is None:
+            return []
+        if not didukung():
+            return PengelolaPencarian._cariTanpaIndeks(teks, user, dari, sampai, tipe, kategori, batas)
+
+        user_id = getattr(user, 'pk', user)
+        pemilik, parameter_pemilik = "", []
+        if user_id is not None:
+            kueri = f'pemilik : "u{int(user_id)}" AND {kueri}'
+            # The index narrows by owner, but a stale one (triggers lost in a
+            # table remake) must never surface another user's rows
+            pemilik, parameter_pemilik = "WHERE t.user_id = %s", [int(user_id)]
+        syarat, parameter = [f"{TABEL} MATCH %s"], [kueri]
+        for kolom, operator, nilai in (
+            ('tanggal', '>=', dari and dari.isoformat()),
+            ('tanggal', '<', sampai and (sampai + timedelta(days=1)).isoformat()),
+            ('tipe', '=', tipe),
+            ('kategori_id', '=', getattr(kategori, 'pk', kategori)),
+        ):
+            if nilai is not None:
+                syarat.append(f"t.{kolom} {operator} %s")
+                parameter.append(nilai)
+        gabung = _keTransaksi(f"{TABEL}.rowid") if len(syarat) > 1 else ""
+        # The owner column carries no weight in the score
+        bobot = ', '.join(['1.0'] * len(KOLOM) + ['0.0'])
+        return list(Transaksi.objects.raw(
+            f"""SELECT t.*, kandidat.skor FROM (
+                    SELECT {TABEL}.rowid AS baris, bm25({TABEL}, {bobot}) AS skor
+                    FROM {TABEL} {gabung}
+                    WHERE {' AND '.join(syarat)}
+                    ORDER BY {TABEL}.rowid DESC
+                    LIMIT %s
+                ) kandidat {_keTransaksi('kandidat.baris')}
+                {pemilik}
+                ORDER BY kandidat.skor, t.tanggal DESC
+                LIMIT %s""",
+            parameter + [getattr(settings, 'PENCARIAN_KANDIDAT', 1000)] + parameter_pemilik + [batas],
+        ))
+
+    @staticmethod
+    def _cariTanpaIndeks(teks, user, dari, sampai, tipe, kategori, batas):
+        transaksi = PengelolaTransaksi.saringTransaksi(user, dari, sampai, tipe, kategori)
+        for kata in teks.split():
+            transaksi = transaksi.filter(
+                Q(catatan__icontains=kata) | Q(sumber_pemasukan__icontains=kata) | Q(metode_pembayaran__icontains=kata)
+            )
+        return list(transaksi.order_by('-tanggal', '-id')[:batas])
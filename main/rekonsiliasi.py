@@ -0,0 +1,139 @@
+"""Check User.saldo against the Transaksi ledger, in parallel over user-id ranges"""
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, DecimalField, F, Max, Min, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ArsipTahun, User, Transaksi, TipeTransaksi, RiwayatRekonsiliasi
+
+NOL = Decimal('0.00')
+
+
+def saldoLedger(prefix=''):
+    """Income minus expense of the ledger rows reachable through prefix"""
+    jumlah = F(f'{prefix}jumlah')
+    tipe = f'{prefix}tipe'
+    return Coalesce(
+        Sum(Case(
+            When(**{tipe: TipeTransaksi.PEMASUKAN}, then=jumlah),
+            When(**{tipe: TipeTransaksi.PENGELUARAN}, then=-jumlah),
+            output_field=DecimalField(max_digits=25, decimal_places=2),
+        )),
+        Value(NOL),
+        output_field=DecimalField(max_digits=25, decimal_places=2),
+    )
+
+
+def saldoArsip(awal, akhir):
+    """Income minus expense of archived rows per user, for awal <= user_id < akhir"""
+    saldo = defaultdict(lambda: NOL)
+    for model in ArsipTahun.semuaModel():
+        baris = (
+            model.objects.filter(user_id__gte=awal, user_id__lt=akhir)
+            .values('user_id').annotate(saldo=saldoLedger()).values_list('user_id', 'saldo')
+        )
+        for user_id, nilai in baris:
+            saldo[user_id] += nilai
+    return saldo
+
+
+def periksaRentang(awal, akhir, sejak=None, ukuran_chunk=1000):
+    """Compare saldo and ledger for users with awal <= id < akhir.
+
+    Users are read ukuran_chunk ids at a time; each chunk is read in one
+    transaction, so its saldo, ledger and archive sums come from the same
+    snapshot. With sejak, only users whose saldo or ledger rows moved after
+    it are checked; on SQLite triggers move diubah_pada for writes that
+    bypass the models too. Returns
+    (users checked, [(user_id, nama, saldo, ledger), ...] mismatches).
+    """
+    diperiksa, selisih = 0, []
+    for mulai in range(awal, akhir, ukuran_chunk):
+        selesai = min(mulai + ukuran_chunk, akhir)
+        users = User.objects.filter(pk__gte=mulai, pk__lt=selesai)
+        if sejak is not None:
+            users = users.filter(diubah_pada__gt=sejak)
+        with transaction.atomic():
+            arsip = saldoArsip(mulai, selesai)
+            baris = list(users.annotate(ledger=saldoLedger('transaksi__')).values_list('pk', 'nama', 'saldo', 'ledger'))
+        for user_id, nama, saldo, ledger in baris:
+            diperiksa += 1
+            ledger += arsip.get(user_id, NOL)
+            if saldo != ledger:
+                selisih.append((user_id, nama, saldo, ledger))
+    return diperiksa, selisih
+
+
+def _siapkanWorker():
+    import django
+    django.setup()
+
+
+class RekonsiliasiSaldo:
+    """Report, and optionally repair, users whose saldo disagrees with their ledger"""
+
+    def __init__(self, workers=1, ukuran_chunk=1000):
+        self.workers = max(1, workers)
+        self.ukuran_chunk = ukuran_chunk
+
+    def rentang(self, awal, akhir):
+        """Split [awal, akhir) into a few ranges per worker so slow ranges even out"""
+        bagian = self.workers * 4 if self.workers > 1 else 1
+        langkah = max(1, -(-(akhir - awal) // bagian))
+        return [(a, min(a + langkah, akhir)) for a in range(awal, akhir, langkah)]
+
+    def jalankan(self, penuh=False, perbaiki=False):
+        """Run one reconciliation and record it; returns (RiwayatRekonsiliasi, mismatches)"""
+        mulai = timezone.now()
+        sejak = None if penuh else RiwayatRekonsiliasi.watermarkTerakhir()
+        if sejak is not None:
+            # Cover writes that were still uncommitted when the last run read them
+            sejak -= timedelta(seconds=getattr(settings, 'REKONSILIASI_JEDA_DETIK', 300))
+
+        batas = User.objects.aggregate(awal=Min('pk'), akhir=Max('pk'))
+        diperiksa, selisih = 0, []
+        if batas['awal'] is not None:
+            rentang = self.rentang(batas['awal'], batas['akhir'] + 1)
+            if self.workers == 1:
+                hasil = [periksaRentang(a, b, sejak, self.ukuran_chunk) for a, b in rentang]
+            else:
+                # Children must not inherit the parent's open database connections
+                connections.close_all()
+                with ProcessPoolExecutor(self.workers, initializer=_siapkanWorker) as pool:
+                    hasil = list(pool.map(
+                        periksaRentang, *zip(*rentang),
+                        [sejak] * len(rentang), [self.ukuran_chunk] * len(rentang),
+                    ))
+            for n, s in hasil:
+                diperiksa += n
+                selisih.extend(s)
+
+        if perbaiki:
+            for user_id, *_ in selisih:
+                self.perbaikiUser(user_id)
+
+        # Unrepaired drift forces the next run to be a full one
+        riwayat = RiwayatRekonsiliasi.objects.create(
+            mulai=mulai,
+            selesai=timezone.now(),
+            watermark=mulai if perbaiki or not selisih else None,
+            penuh=sejak is None,
+            perbaiki=perbaiki,
+            user_diperiksa=diperiksa,
+            selisih_ditemukan=len(selisih),
+        )
+        return riwayat, selisih
+
+    @staticmethod
+    def perbaikiUser(user_id):
+        """Set one user's saldo to their ledger balance, recomputed under the write lock"""
+        with transaction.atomic():
+            ledger = Transaksi.objects.filter(user_id=user_id).aggregate(saldo=saldoLedger())['saldo']
+            ledger += saldoArsip(user_id, user_id + 1).get(user_id, NOL)
+            User.objects.filter(pk=user_id).update(saldo=ledger, diubah_pada=timezone.now())
@@ -0,0 +1,110 @@
+"""Synthetic ledger generator for benchmarks"""
+import math
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from .models import User, Kategori, Transaksi, TipeTransaksi, PengelolaTransaksi, buatId
+
+IKON = (
+    'fa-solid fa-utensils', 'fa-solid fa-car', 'fa-solid fa-house', 'fa-solid fa-bolt',
+    'fa-solid fa-bus', 'fa-solid fa-heart', 'fa-solid fa-book', 'fa-solid fa-gift',
+    'fa-solid fa-music', 'fa-solid fa-money-bill-transfer',
+)
+METODE = ('Tunai', 'Debit', 'Kartu Kredit', 'E-Wallet', 'Transfer')
+SUMBER = ('Gaji', 'Bonus', 'Freelance', 'Bunga', 'Penjualan')
+
+
+def buatLedgerSintetis(jumlah_user=20, jumlah_kategori=10, jumlah_transaksi=50000,
+                       hari=730, seed=1, batch_size=5000, akhir=None):
+    """Seed users, kategori and transactions with realistic shapes.
+
+    Dates are spread over the last `hari` days with more spending on
+    weekends; expenses follow a log-normal amount distribution per
+    kategori, and about one row in eight is income clustered around
+    payday. Each user starts with an opening deposit so no batch can
+    overdraw. Rows go through tambahTransaksiMassal, so balances and
+    rollups are consistent. Returns (users, kategori).
+    """
+    acak = random.Random(seed)
+    akhir = akhir or date.today()
+    awal = akhir - timedelta(days=hari - 1)
+    penanda = f"{seed}-{acak.getrandbits(32):08x}"
+
+    users = User.objects.bulk_create(
+        User(nama=f"Sintetis {i}", email=f"sintetis-{penanda}-{i}@example.com")
+        for i in range(jumlah_user)
+    )
+    kategori = Kategori.objects.bulk_create(
+        Kategori(
+            id=f"sin-{penanda}-{i}", nama=f"Kategori {i}",
+            ikon=IKON[i % len(IKON)], warna=f"#{acak.randrange(0x1000000):06x}",
+        )
+        for i in range(jumlah_kategori)
+    )
+    # Typical spend per kategori, from coffee-sized to rent-sized
+    median = [math.exp(acak.uniform(math.log(15000), math.log(1500000))) for _ in kategori]
+    # A few users and kategori are much busier than the rest
+    bobot_user = [1 / (i + 1) ** 0.8 for i in range(jumlah_user)]
+    bobot_kategori = [1 / (i + 1) ** 0.6 for i in range(jumlah_kategori)]
+
+    PengelolaTransaksi.tambahTransaksiMassal(
+        (
+            Transaksi(
+                id=buatId(), jumlah=Decimal('1000000000.00'), tanggal=awal,
+                tipe=TipeTransaksi.PEMASUKAN, user=user, catatan="Saldo awal", sumber_pemasukan="Saldo Awal",
+            )
+            for user in users
+        ),
+        batch_size=batch_size,
+    )
+
+    def tanggalAcak(gajian=False):
+        while True:
+            hari_ke = acak.randrange(hari)
+            tanggal = awal + timedelta(days=hari_ke)
+            if gajian:
+                # Income lands around the 25th
+                tanggal = tanggal.replace(day=min(28, max(1, int(acak.gauss(25, 2)))))
+                if tanggal > akhir:
+                    continue
+                return tanggal
+            if tanggal.weekday() >= 5 or acak.random() < 0.7:
+                return tanggal
+
+    def baris():
+        for _ in range(jumlah_transaksi):
+            user = acak.choices(users, bobot_user)[0]
+            if acak.random() < 0.125:
+                yield Transaksi(
+                    id=buatId(),
+                    jumlah=Decimal(round(acak.lognormvariate(math.log(6000000), 0.4), -3)).quantize(Decimal('0.01')),
+                    tanggal=tanggalAcak(gajian=True),
+                    tipe=TipeTransaksi.PEMASUKAN,
+                    user=user,
+                    kategori=None,
+                    catatan="Pemasukan bulanan",
+                    sumber_pemasukan=acak.choice(SUMBER),
+                )
+            else:
+                i = acak.choices(range(jumlah_kategori), bobot_kategori)[0] if kategori else None
+                jumlah = acak.lognormvariate(math.log(median[i] if i is not None else 50000), 0.6)
+                yield Transaksi(
+                    id=buatId(),
+                    jumlah=Decimal(max(1000, round(jumlah, -2))).quantize(Decimal('0.01')),
+                    tanggal=tanggalAcak(),
+                    tipe=TipeTransaksi.PENGELUARAN,
+                    user=user,
+                    kategori=kategori[i] if i is not None else None,
+                    catatan=f"Belanja {acak.randrange(1000)}",
+                    metode_pembayaran=acak.choice(METODE),
+                )
+
+    batch = []
+    for trx in baris():
+        batch.append(trx)
+        if len(batch) >= batch_size:
+            PengelolaTransaksi.tambahTransaksiMassal(batch, batch_size=batch_size)
+            batch = []
+    PengelolaTransaksi.tambahTransaksiMassal(batch, batch_size=batch_size)
+    return users, kategori
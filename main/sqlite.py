@@ -0,0 +1,27 @@
+"""Connection setup for SQLite databases, configured by settings.SQLITE_PRAGMA"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+_NAMA = re.compile(r'^[a-z_]+$')
+_NILAI = re.compile(r'^-?[A-Za-z0-9_]+$')
+
+
+def pernyataanPragma(pragma):
+    """PRAGMA statements for a {name: value} mapping, rejecting anything that is not a plain token"""
+    pernyataan = []
+    for nama, nilai in pragma.items():
+        if not _NAMA.match(nama) or not _NILAI.match(str(nilai)):
+            raise ImproperlyConfigured(f"SQLITE_PRAGMA tidak valid: {nama}={nilai!r}")
+        pernyataan.append(f"PRAGMA {nama} = {nilai}")
+    return pernyataan
+
+
+def terapkanPragma(sender, connection, **kwargs):
+    """connection_created receiver: run the configured PRAGMAs on every new SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pernyataan in pernyataanPragma(getattr(settings, 'SQLITE_PRAGMA', {})):
+            cursor.execute(pernyataan)
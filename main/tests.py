@@ -1,6 +1,40 @@
-from django.test import TestCase, Client
-from django.utils import timezone
-from .models import MoodEntry
+import csv
+import json
+import random
+import threading
+from importlib import import_module
+from types import SimpleNamespace
+from datetime import date
+from io import BytesIO, StringIO
+from decimal import Decimal
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.apps import apps
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.db.models import Q, Sum
+from django.template import engines
+from django.test import TestCase, TransactionTestCase, AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import skipUnless
+
+from .analitik import LayananAnalitik, np, rataBergerak
+from .arsip import PengelolaArsip
+from .cache import CacheRingkasan
+from .impor import ImporTransaksi
+from .middleware import CatatanPermintaan, InstrumentasiMiddleware, StatistikView, _catatan_aktif
+from .sqlite import pernyataanPragma
+from .rekonsiliasi import RekonsiliasiSaldo
+from .sintetis import buatLedgerSintetis
+from .ulid import adalahId, buatId
+from .models import (
+    User, Kategori, Transaksi, TransaksiPemasukan, TransaksiPengeluaran,
+    PengelolaTransaksi, PengelolaSaldo, PengelolaAnggaran, PengelolaBerulang, LayananRingkasan, Penghitung, RingkasanHarian, RingkasanBulanan, TipeTransaksi,
+    TransaksiBerulang, ArsipTahun,
+)
 # Create your tests here.
 
 class mainTest(TestCase):
@@ -10,20 +44,929 @@ class mainTest(TestCase):
 
     def test_main_using_main_template(self):
         response = Client().get('')
-        self.assertTemplateUsed(response, 'main.html')
+        self.assertTemplateUsed(response, 'main/dashboard.html')
 
     def test_nonexistent_page(self):
         response = Client().get('/skibidi/')
         self.assertEqual(response.status_code, 404)
 
-    def test_strong_mood_user(self):
-        now = timezone.now()
-        mood = MoodEntry.objects.create(
-          mood="LUMAYAN SENANG",
-          time = now,
-          feelings = "senang sih, cuman tadi baju aku basah kena hujan :(",
-          mood_intensity = 8,
+
+class RingkasanTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(nama="Budi", email="budi@example.com")
+        self.makan = Kategori.objects.create(id="makan", nama="Makan")
+        self.gaji = Kategori.objects.create(id="gaji", nama="Gaji")
+
+    def buat_transaksi(self):
+        TransaksiPemasukan(
+            id="in1", jumlah=Decimal('500.00'), tanggal=date(2025, 5, 1),
+            kategori=self.gaji, user=self.user, sumber_pemasukan="Kantor"
+        ).save()
+        TransaksiPengeluaran(
+            id="out1", jumlah=Decimal('120.00'), tanggal=date(2025, 5, 3),
+            kategori=self.makan, user=self.user, metode_pembayaran="Tunai"
+        ).save()
+        TransaksiPengeluaran(
+            id="out2", jumlah=Decimal('30.00'), tanggal=date(2025, 6, 3),
+            kategori=self.makan, user=self.user, metode_pembayaran="Tunai"
+        ).save()
+
+    def test_rollup_follows_save_and_delete(self):
+        self.buat_transaksi()
+        self.assertEqual(LayananRingkasan.hitungTotalBerdasarkanTanggal(date(2025, 5, 3)), Decimal('120.00'))
+        self.assertEqual(LayananRingkasan.hitungTotalBerdasarkanBulan(5, 2025), Decimal('620.00'))
+        self.assertEqual(LayananRingkasan.hitungPemasukanBerdasarkanBulan(5, 2025), Decimal('500.00'))
+        self.assertEqual(LayananRingkasan.hitungPengeluaranBerdasarkanBulan(5, 2025), Decimal('120.00'))
+
+        out1 = TransaksiPengeluaran.objects.get(id="out1")
+        out1.tanggal = date(2025, 6, 10)
+        out1.save()
+        self.assertEqual(LayananRingkasan.hitungPengeluaranBerdasarkanBulan(5, 2025), Decimal('0.00'))
+        self.assertEqual(LayananRingkasan.hitungPengeluaranBerdasarkanBulan(6, 2025), Decimal('150.00'))
+
+        Transaksi.objects.get(id="out2").delete()
+        self.assertEqual(LayananRingkasan.hitungPengeluaranBerdasarkanBulan(6, 2025), Decimal('120.00'))
+        self.assertEqual(
+            PengelolaTransaksi.hitungTotalBerdasarkanTipe(TipeTransaksi.PENGELUARAN), Decimal('120.00')
+        )
+
+    def test_subtype_proxies_share_one_table(self):
+        self.buat_transaksi()
+        self.assertEqual(list(TransaksiPemasukan.objects.values_list('id', flat=True)), ["in1"])
+        self.assertEqual(sorted(TransaksiPengeluaran.objects.values_list('id', flat=True)), ["out1", "out2"])
+        self.assertEqual(Transaksi.objects.get(id="in1").sumber_pemasukan, "Kantor")
+        self.assertEqual(TransaksiPengeluaran.objects.get(id="out1").getMetodePembayaran(), "Tunai")
+
+        # Saving through a proxy enforces its tipe
+        trx = TransaksiPemasukan.objects.get(id="in1")
+        trx.tipe = TipeTransaksi.PENGELUARAN
+        trx.save()
+        self.assertEqual(Transaksi.objects.get(id="in1").tipe, TipeTransaksi.PEMASUKAN)
+
+    def test_kategori_delete_moves_rollup_to_uncategorised(self):
+        self.buat_transaksi()
+        self.makan.delete()
+        self.assertEqual(LayananRingkasan.hitungPengeluaranBerdasarkanBulan(5, 2025), Decimal('120.00'))
+        self.assertFalse(RingkasanBulanan.objects.filter(kategori_id="makan").exists())
+
+    def test_rebuild_matches_incremental(self):
+        self.buat_transaksi()
+        sebelum = sorted(RingkasanHarian.objects.values_list('user_id', 'tanggal', 'tipe', 'kategori_id', 'total', 'jumlah_transaksi'))
+        call_command('rebuild_ringkasan', stdout=StringIO())
+        sesudah = sorted(RingkasanHarian.objects.values_list('user_id', 'tanggal', 'tipe', 'kategori_id', 'total', 'jumlah_transaksi'))
+        self.assertEqual(sebelum, sesudah)
+        self.assertEqual(RingkasanBulanan.objects.count(), 3)
+
+    def test_batched_apply_matches_rebuild(self):
+        kolom = ('user_id', 'tanggal', 'tipe', 'kategori_id', 'total', 'jumlah_transaksi')
+        for putaran in range(2):  # The second round updates the rows the first one created
+            PengelolaTransaksi.tambahTransaksiMassal([
+                Transaksi(id=f"b{putaran}_{i}", jumlah=Decimal('10.00'), tanggal=date(2025, 1, 1 + i % 28),
+                          tipe=TipeTransaksi.PEMASUKAN, kategori=self.makan if i % 3 else None, user=self.user)
+                for i in range(90)
+            ], batch_size=40)
+        sebelum = sorted(RingkasanHarian.objects.values_list(*kolom), key=str)
+        call_command('rebuild_ringkasan', stdout=StringIO())
+        self.assertEqual(sebelum, sorted(RingkasanHarian.objects.values_list(*kolom), key=str))
+
+
+class TransaksiListTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(nama="Budi", email="budi@example.com", saldo=Decimal('1000.00'))
+        kategori = Kategori.objects.create(id="makan", nama="Makan")
+        for i in range(25):
+            model = TransaksiPemasukan if i % 2 else TransaksiPengeluaran
+            model(
+                id=f"t{i:03d}", jumlah=Decimal('1.00'), tanggal=date(2025, 1, 1 + i % 5),
+                kategori=kategori, user=user
+            ).save()
+
+    def test_keyset_pages_cover_ledger_once(self):
+        client = Client()
+        dilihat = []
+        cursor = None
+        while True:
+            url = '/transaksi/?ukuran=10' + (f'&cursor={cursor}' if cursor else '')
+            # The user, the page, then the archive bound
+            with self.assertNumQueries(3):
+                response = client.get(url)
+            dilihat += [trx.id for trx in response.context['transaksi_list']]
+            cursor = response.context['cursor_berikutnya']
+            if not cursor:
+                break
+        self.assertEqual(len(dilihat), 25)
+        self.assertEqual(len(set(dilihat)), 25)
+        urutan = list(Transaksi.objects.order_by('-tanggal', '-id').values_list('id', flat=True))
+        self.assertEqual(dilihat, urutan)
+
+    def test_invalid_cursor(self):
+        response = Client().get('/transaksi/?cursor=%%%')
+        self.assertEqual(response.status_code, 400)
+
+    def test_delete_that_would_overdraw_keeps_the_row_with_a_message(self):
+        User.objects.update(saldo=Decimal('0.50'))
+        response = Client().post('/transaksi/delete/t001/', follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Saldo tidak mencukupi", [str(m) for m in response.context['messages']][0])
+        self.assertTrue(Transaksi.objects.filter(pk="t001").exists())
+
+    def test_save_validates_only_changed_fields(self):
+        trx = Transaksi.objects.get(pk="t001")
+        trx.catatan = "Diubah"
+        with CaptureQueriesContext(connection) as kueri:
+            trx.save()
+        # Unchanged user and kategori are not looked up again
+        self.assertFalse([q for q in kueri if 'FROM "main_kategori"' in q['sql'] or 'FROM "main_user"' in q['sql']])
+        trx.kategori_id = "tidak-ada"
+        with self.assertRaises(ValidationError):
+            trx.save()
+
+
+class SaldoKonkurenTest(TransactionTestCase):
+    JUMLAH_THREAD = 8
+    OPERASI_PER_THREAD = 250
+
+    def setUp(self):
+        self.user = User.objects.create(nama="Budi", email="budi@example.com")
+        Kategori.objects.create(id="makan", nama="Makan")
+
+    def pekerja(self, nomor, gagal):
+        acak = random.Random(nomor)
+        milik = []
+        try:
+            for i in range(self.OPERASI_PER_THREAD):
+                pilihan = acak.random()
+                try:
+                    if pilihan < 0.1 and milik:
+                        Transaksi.objects.get(id=milik.pop()).delete()
+                    elif pilihan < 0.5:
+                        model = TransaksiPengeluaran
+                        trx = model(
+                            id=f"w{nomor}-{i}", jumlah=Decimal(acak.randint(1, 50)),
+                            tanggal=date(2025, 1, 1 + i % 28), kategori_id="makan", user_id=self.user.pk
+                        )
+                        trx.save()
+                        milik.append(trx.id)
+                    else:
+                        trx = TransaksiPemasukan(
+                            id=f"w{nomor}-{i}", jumlah=Decimal(acak.randint(1, 50)),
+                            tanggal=date(2025, 1, 1 + i % 28), kategori_id="makan", user_id=self.user.pk
+                        )
+                        trx.save()
+                        milik.append(trx.id)
+                except ValidationError:
+                    # Insufficient funds is an expected outcome under contention
+                    pass
+        except Exception as e:
+            gagal.append(e)
+        finally:
+            connection.close()
+
+    def test_saldo_matches_ledger_after_concurrent_writes(self):
+        gagal = []
+        thread = [
+            threading.Thread(target=self.pekerja, args=(n, gagal))
+            for n in range(self.JUMLAH_THREAD)
+        ]
+        for t in thread:
+            t.start()
+        for t in thread:
+            t.join()
+        self.assertEqual(gagal, [])
+
+        self.user.refresh_from_db()
+        ledger = Transaksi.objects.aggregate(
+            pemasukan=Sum('jumlah', filter=Q(tipe=TipeTransaksi.PEMASUKAN), default=Decimal('0.00')),
+            pengeluaran=Sum('jumlah', filter=Q(tipe=TipeTransaksi.PENGELUARAN), default=Decimal('0.00')),
+        )
+        self.assertGreater(Transaksi.objects.count(), self.JUMLAH_THREAD * self.OPERASI_PER_THREAD // 2)
+        self.assertEqual(self.user.saldo, ledger['pemasukan'] - ledger['pengeluaran'])
+        self.assertGreaterEqual(self.user.saldo, 0)
+        self.assertEqual(
+            LayananRingkasan.ringkasanSaldoUser(self.user)['selisih'], self.user.saldo
+        )
+
+
+class ImporTransaksiTest(TestCase):
+    CSV = (
+        "tanggal,jumlah,tipe,kategori,catatan,sumber_pemasukan,metode_pembayaran\n"
+        "2025-03-01,1000,PEMASUKAN,gaji,Gaji Maret,Kantor,\n"
+        "2025-03-02,150.50,PENGELUARAN,makan,Makan siang,,Tunai\n"
+        "2025-03-02,150.50,PENGELUARAN,makan,Makan siang,,Tunai\n"
+        "2025-03-03,20,PENGELUARAN,tidak-ada,,,Tunai\n"
+        "bukan-tanggal,20,PENGELUARAN,makan,,,Tunai\n"
+    )
+
+    def setUp(self):
+        self.user = User.objects.create(nama="Budi", email="budi@example.com")
+        Kategori.objects.create(id="makan", nama="Makan")
+        Kategori.objects.create(id="gaji", nama="Gaji")
+
+    def test_import_applies_balance_and_skips_duplicates(self):
+        hasil = ImporTransaksi(user_bawaan=self.user, batch_size=2).dariBerkas(BytesIO(self.CSV.encode()))
+        self.assertEqual(hasil['dibaca'], 5)
+        self.assertEqual(hasil['ditambahkan'], 2)
+        self.assertEqual(hasil['duplikat'], 1)
+        self.assertEqual(hasil['gagal'], 2)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.saldo, Decimal('849.50'))
+        self.assertEqual(LayananRingkasan.hitungPengeluaranBerdasarkanBulan(3, 2025), Decimal('150.50'))
+
+        # Re-importing the same file adds nothing
+        hasil = ImporTransaksi(user_bawaan=self.user).dariBerkas(BytesIO(self.CSV.encode()))
+        self.assertEqual(hasil['ditambahkan'], 0)
+        self.assertEqual(hasil['duplikat'], 3)
+        self.assertEqual(Transaksi.objects.count(), 2)
+
+    def test_ndjson_batch_without_funds_is_rejected(self):
+        ndjson = (
+            '{"tanggal": "2025-03-01", "jumlah": "10", "tipe": "PEMASUKAN"}\n'
+            '{"tanggal": "2025-03-01", "jumlah": "50", "tipe": "PENGELUARAN"}\n'
+        )
+        hasil = ImporTransaksi(user_bawaan=self.user).dariBerkas(BytesIO(ndjson.encode()), 'ndjson')
+        self.assertEqual(hasil['ditambahkan'], 0)
+        self.assertEqual(hasil['gagal'], 2)
+        self.assertFalse(Transaksi.objects.exists())
+
+    def test_upload_endpoint(self):
+        berkas = SimpleUploadedFile("data.csv", self.CSV.encode(), content_type="text/csv")
+        response = Client().post('/transaksi/import/', {'berkas': berkas}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['ditambahkan'], 2)
+
+    def test_unreadable_remainder_keeps_earlier_rows(self):
+        csv_rusak = (
+            "tanggal,jumlah,tipe\n2025-03-01,10,PEMASUKAN\n2025-03-02,20,PEMASUKAN\n"
+            f"2025-03-03,\"{'x' * (csv.field_size_limit() + 1)}\",PEMASUKAN\n2025-03-04,40,PEMASUKAN\n"
+        )
+        hasil = ImporTransaksi(user_bawaan=self.user, batch_size=1).dariBerkas(BytesIO(csv_rusak.encode()))
+        self.assertEqual((hasil['ditambahkan'], hasil['gagal']), (2, 1))
+        self.assertEqual(hasil['galat'][0]['baris'], 4)
+        self.assertIn("CSV tidak valid", hasil['galat'][0]['pesan'])
+
+        # Bad bytes past the first decoded chunk: the rows before it are kept
+        isi = ''.join(f"2025-04-01,{i + 1},PEMASUKAN\n" for i in range(1000)).encode()
+        berkas = SimpleUploadedFile("data.csv", b"tanggal,jumlah,tipe\n" + isi + b"2025-04-02,\xff,PEMASUKAN\n")
+        response = Client().post('/transaksi/import/', {'berkas': berkas}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        hasil = response.json()
+        self.assertGreater(hasil['ditambahkan'], 0)
+        self.assertEqual(hasil['galat'][-1]['pesan'], "Berkas bukan UTF-8 yang valid; sisa berkas tidak dibaca")
+
+    def test_upload_cannot_write_another_users_ledger(self):
+        lain = User.objects.create(nama="Sari", email="sari@example.com")
+        isi = (
+            "tanggal,jumlah,tipe,user_id\n"
+            f"2025-03-01,1000,PEMASUKAN,{lain.pk}\n"
+            f"2025-03-01,5,PEMASUKAN,{self.user.pk}\n"
+        )
+        berkas = SimpleUploadedFile("data.csv", isi.encode(), content_type="text/csv")
+        hasil = Client().post('/transaksi/import/', {'berkas': berkas}, HTTP_ACCEPT='application/json').json()
+        self.assertEqual((hasil['ditambahkan'], hasil['gagal']), (1, 1))
+        self.assertEqual(hasil['galat'], [{'baris': 2, 'pesan': f"Baris untuk user lain: {lain.pk}"}])
+        self.assertFalse(Transaksi.objects.filter(user=lain).exists())
+
+
+class EksporTransaksiTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(nama="Budi", email="budi@example.com")
+        Kategori.objects.create(id="makan", nama="Makan")
+        TransaksiPemasukan(
+            id="in1", jumlah=Decimal('500.00'), tanggal=date(2025, 5, 1),
+            user=self.user, sumber_pemasukan="Kantor"
+        ).save()
+        TransaksiPengeluaran(
+            id="out1", jumlah=Decimal('120.00'), tanggal=date(2025, 5, 3),
+            kategori_id="makan", user=self.user, metode_pembayaran="Tunai"
+        ).save()
+
+    def test_csv_export_streams_and_round_trips(self):
+        # The user, the archive bound, then the rows
+        with self.assertNumQueries(3):
+            response = Client().get('/transaksi/export/?format=csv')
+            isi = b''.join(response.streaming_content)
+        self.assertTrue(response.streaming)
+        baris = list(csv.DictReader(StringIO(isi.decode())))
+        self.assertEqual([b['id'] for b in baris], ["in1", "out1"])
+        self.assertEqual(baris[0]['sumber_pemasukan'], "Kantor")
+        self.assertEqual(baris[1]['kategori_nama'], "Makan")
+
+        # The export is valid import input; every row is recognised as already present
+        hasil = ImporTransaksi(user_bawaan=self.user).dariBerkas(BytesIO(isi))
+        self.assertEqual(hasil['duplikat'], 2)
+
+    def test_ndjson_export_filters(self):
+        response = Client().get('/transaksi/export/?format=ndjson&tipe=PENGELUARAN&dari=2025-05-02')
+        baris = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(baris), 1)
+        self.assertEqual(baris[0]['metode_pembayaran'], "Tunai")
+        self.assertEqual(Client().get('/transaksi/export/?dari=kemarin').status_code, 400)
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN is SQLite syntax")
+class IndeksTransaksiTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(nama="Budi", email="budi@example.com")
+        Kategori.objects.create(id="makan", nama="Makan")
+
+    def rencana(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return ' | '.join(str(baris[-1]) for baris in cursor.fetchall())
+
+    def test_month_lookup_is_a_range_on_tanggal(self):
+        queryset = PengelolaTransaksi.ambilTransaksiBerdasarkanBulan(2, 2025)
+        self.assertNotIn('strftime', str(queryset.query).lower())
+        self.assertIn('INDEX transaksi_tanggal_id_idx (tanggal>? AND tanggal<?)', self.rencana(queryset))
+
+    def test_user_date_range_uses_user_tanggal_id_index(self):
+        queryset = PengelolaTransaksi.saringTransaksi(
+            user=self.user, dari=date(2025, 1, 1), sampai=date(2025, 1, 31)
         )
-        self.assertTrue(mood.is_mood_strong)
+        self.assertIn('INDEX transaksi_user_tgl_id_idx (user_id=? AND tanggal>? AND tanggal<?)', self.rencana(queryset))
+
+    def test_user_tipe_range_uses_user_tipe_index(self):
+        queryset = PengelolaTransaksi.saringTransaksi(
+            user=self.user, tipe=TipeTransaksi.PENGELUARAN, dari=date(2025, 1, 1)
+        )
+        self.assertIn('INDEX transaksi_user_tipe_tgl_idx (user_id=? AND tipe=? AND tanggal>?)', self.rencana(queryset))
+
+    def test_kategori_range_uses_kategori_index(self):
+        queryset = PengelolaTransaksi.saringTransaksi(kategori="makan", sampai=date(2025, 1, 31))
+        self.assertIn('INDEX transaksi_kategori_tgl_idx (kategori_id=? AND tanggal<?)', self.rencana(queryset))
+
+
+class SummaryViewTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(nama="Budi", email="budi@example.com")
+        Kategori.objects.create(id="makan", nama="Makan")
+        Kategori.objects.create(id="gaji", nama="Gaji")
+        for i in range(20):
+            TransaksiPemasukan(
+                id=f"in{i}", jumlah=Decimal('100.00'), tanggal=date(2025, 4, 1 + i),
+                kategori_id="gaji", user=user
+            ).save()
+            TransaksiPengeluaran(
+                id=f"out{i}", jumlah=Decimal('10.00'), tanggal=date(2025, 4, 1 + i),
+                kategori_id="makan" if i % 2 else None, user=user
+            ).save()
+
+    def test_month_summary_is_one_group_by(self):
+        with self.assertNumQueries(1):
+            ringkasan = LayananRingkasan.ringkasanBulanan(4, 2025)
+        self.assertEqual(ringkasan['pemasukan'], Decimal('2000.00'))
+        self.assertEqual(ringkasan['pengeluaran'], Decimal('200.00'))
+        self.assertEqual(ringkasan['jumlah_transaksi'], 40)
+        per_kategori = {k['kategori_id']: k for k in ringkasan['kategori']}
+        self.assertEqual(per_kategori['makan']['pengeluaran'], Decimal('100.00'))
+        self.assertEqual(per_kategori[None]['jumlah_pengeluaran'], 10)
+        self.assertEqual(per_kategori['gaji']['jumlah_pemasukan'], 20)
+
+    def test_summary_page_query_count_is_independent_of_rows(self):
+        with self.assertNumQueries(4):
+            response = Client().get('/summary/?bulan=4&tahun=2025')
+        self.assertEqual(response.context['monthly_income'], Decimal('2000.00'))
+        self.assertNotIn('transactions', response.context)
+
+        response = Client().get('/summary/?bulan=4&tahun=2025&detail=1&ukuran=15')
+        self.assertEqual(len(response.context['transactions']), 15)
+        self.assertIsNotNone(response.context['cursor_berikutnya'])
+
+
+@override_settings(RINGKASAN_CACHE_ALIAS='ringkasan')
+class CacheRingkasanTest(TestCase):
+    def setUp(self):
+        CacheRingkasan.cache().clear()
+        self.user = User.objects.create(nama="Budi", email="budi@example.com")
+        self.lain = User.objects.create(nama="Sari", email="sari@example.com")
+        Kategori.objects.create(id="makan", nama="Makan")
+        TransaksiPemasukan(
+            id="in1", jumlah=Decimal('500.00'), tanggal=date(2025, 5, 1), user=self.user
+        ).save()
+
+    def test_reads_hit_cache_until_a_write(self):
+        LayananRingkasan.hitungTotalPerTipe()
+        LayananRingkasan.ringkasanBulanan(5, 2025)
+        LayananRingkasan.ringkasanSaldoUser(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(LayananRingkasan.hitungTotalPerTipe(), (Decimal('500.00'), Decimal('0.00')))
+            self.assertEqual(LayananRingkasan.hitungPemasukanBerdasarkanBulan(5, 2025), Decimal('500.00'))
+            self.assertEqual(LayananRingkasan.ringkasanSaldoUser(self.user)['total_pemasukan'], Decimal('500.00'))
+        self.assertEqual(CacheRingkasan.statistik()['hit'], 3)
+
+        TransaksiPengeluaran(
+            id="out1", jumlah=Decimal('20.00'), tanggal=date(2025, 5, 2), kategori_id="makan", user=self.user
+        ).save()
+        self.assertEqual(LayananRingkasan.hitungTotalPerTipe(), (Decimal('500.00'), Decimal('20.00')))
+        self.assertEqual(LayananRingkasan.hitungPengeluaranBerdasarkanBulan(5, 2025), Decimal('20.00'))
+        self.assertEqual(LayananRingkasan.ringkasanSaldoUser(self.user)['total_pengeluaran'], Decimal('20.00'))
+
+    def test_invalidation_is_scoped(self):
+        LayananRingkasan.ringkasanSaldoUser(self.lain)
+        LayananRingkasan.ringkasanBulanan(4, 2025)
+        TransaksiPemasukan(
+            id="in2", jumlah=Decimal('5.00'), tanggal=date(2025, 5, 9), user=self.user
+        ).save()
+        # Another user's figures and other months stay cached
+        with self.assertNumQueries(0):
+            LayananRingkasan.ringkasanSaldoUser(self.lain)
+            LayananRingkasan.ringkasanBulanan(4, 2025)
+
+    def test_kategori_rename_refreshes_month_summary(self):
+        TransaksiPengeluaran(
+            id="out1", jumlah=Decimal('20.00'), tanggal=date(2025, 5, 2), kategori_id="makan", user=self.user
+        ).save()
+        LayananRingkasan.ringkasanBulanan(5, 2025)
+        Kategori.objects.get(id="makan").setNama("Kuliner")
+        nama = [k['nama'] for k in LayananRingkasan.ringkasanBulanan(5, 2025)['kategori']]
+        self.assertIn("Kuliner", nama)
+
+    def test_stats_endpoint(self):
+        response = Client().get('/api/cache/stats/')
+        self.assertEqual(set(response.json()), {'hit', 'miss', 'invalidasi', 'rasio_hit'})
+
+
+class UlidTest(TestCase):
+    def test_ids_are_ulids_and_strictly_ascending(self):
+        daftar = [buatId() for _ in range(2000)]
+        self.assertTrue(all(adalahId(i) for i in daftar))
+        self.assertEqual(daftar, sorted(set(daftar)))
+        self.assertEqual(buatId(date(2024, 1, 1), kunci="x"), buatId(date(2024, 1, 1), kunci="x"))
+        self.assertLess(buatId(date(2024, 1, 1)), buatId(date(2024, 1, 2)))
+
+    def test_deposits_on_the_same_day_do_not_collide(self):
+        user = User.objects.create(nama="A", email="a@example.com")
+        PengelolaSaldo.depositSaldo(user, Decimal('10.00'))
+        PengelolaSaldo.depositSaldo(User.objects.create(nama="A2", email="a2@example.com"), Decimal('10.00'))
+        PengelolaSaldo.depositSaldo(user, Decimal('10.00'))
+        self.assertEqual(Transaksi.objects.filter(user=user).count(), 2)
+        self.assertTrue(all(adalahId(i) for i in Transaksi.objects.values_list('id', flat=True)))
+
+    def test_migration_rewrites_legacy_ids(self):
+        user = User.objects.create(nama="A", email="a@example.com")
+        for id in ("aB3xYz", "DEP_1_20240105_0", "REC_7_20240105"):
+            TransaksiPemasukan(id=id, jumlah=Decimal('1.00'), tanggal=date(2024, 1, 5), user=user,
+                               catatan=f"lama {id}").save()
+        baru = TransaksiPemasukan(id=buatId(), jumlah=Decimal('1.00'), tanggal=date(2024, 1, 5), user=user)
+        baru.save()
+        versi = User.objects.get(pk=user.pk).versi_ledger
+
+        import_module('main.migrations.0014_transaksi_ulid').ulidkan(apps, SimpleNamespace(connection=connection))
+        ids = set(Transaksi.objects.values_list('id', flat=True))
+        self.assertEqual(len(ids), 4)
+        self.assertTrue(all(adalahId(i) for i in ids))
+        self.assertIn(baru.pk, ids)
+        self.assertIn(buatId(date(2024, 1, 5), kunci="REC_7_20240105"), ids)
+        self.assertGreater(User.objects.get(pk=user.pk).versi_ledger, versi)
+
+
+class TransferMassalTest(TestCase):
+    def setUp(self):
+        self.a = User.objects.create(nama="A", email="a@example.com", saldo=Decimal('100.00'))
+        self.b = User.objects.create(nama="B", email="b@example.com", saldo=Decimal('0.00'))
+        self.c = User.objects.create(nama="C", email="c@example.com", saldo=Decimal('0.00'))
+
+    def test_same_amount_same_day_transfers_do_not_collide(self):
+        PengelolaSaldo.transferSaldo(self.a, self.b, Decimal('10.00'))
+        PengelolaSaldo.transferSaldo(self.a, self.b, Decimal('10.00'))
+        self.assertEqual(Transaksi.objects.count(), 4)
+        self.b.refresh_from_db()
+        self.assertEqual(self.b.saldo, Decimal('20.00'))
+
+    def test_batch_applies_net_deltas(self):
+        # B can forward money it receives within the same batch
+        hasil = PengelolaSaldo.transferMassal([
+            (self.a, self.b, Decimal('60.00')),
+            (self.b.pk, self.c.pk, Decimal('50.00'), "Bayar"),
+        ])
+        self.assertEqual(len(hasil), 2)
+        saldo = dict(User.objects.values_list('nama', 'saldo'))
+        self.assertEqual(saldo, {"A": Decimal('40.00'), "B": Decimal('10.00'), "C": Decimal('50.00')})
+        self.assertEqual(hasil[1]['masuk'].catatan, "Bayar - dari B")
+
+    def test_overdrawn_batch_writes_nothing(self):
+        with self.assertRaises(ValidationError):
+            PengelolaSaldo.transferMassal([
+                (self.a, self.b, Decimal('60.00')),
+                (self.c, self.b, Decimal('1.00')),
+            ])
+        self.assertFalse(Transaksi.objects.exists())
+        self.assertEqual(User.objects.get(pk=self.a.pk).saldo, Decimal('100.00'))
+
+
+class LedgerSintetisTest(TestCase):
+    def test_seeded_ledger_is_consistent(self):
+        users, kategori = buatLedgerSintetis(jumlah_user=3, jumlah_kategori=4, jumlah_transaksi=300, hari=90)
+        self.assertEqual(Transaksi.objects.count(), 303)
+        for user in User.objects.filter(pk__in=[u.pk for u in users]):
+            pemasukan, pengeluaran = (
+                Transaksi.objects.filter(user=user, tipe=tipe).aggregate(t=Sum('jumlah'))['t'] or 0
+                for tipe in (TipeTransaksi.PEMASUKAN, TipeTransaksi.PENGELUARAN)
+            )
+            self.assertEqual(user.saldo, pemasukan - pengeluaran)
+        self.assertEqual(RingkasanHarian.objects.aggregate(n=Sum('jumlah_transaksi'))['n'], 303)
+
+    def test_bench_command_runs_and_rolls_back(self):
+        keluaran = StringIO()
+        call_command('bench', transaksi=50, ulang=1, saring='LayananRingkasan.hitung', stdout=keluaran)
+        self.assertIn('LayananRingkasan.hitungTotalPerTipe', keluaran.getvalue())
+        self.assertFalse(Transaksi.objects.exists())
+
+
+class InstrumentasiTest(TestCase):
+    def setUp(self):
+        StatistikView.reset()
+        self.user = User.objects.create(nama="A", email="a@example.com")
+        TransaksiPemasukan(
+            id="p1", jumlah=Decimal('100.00'), tanggal=date(2024, 3, 5), user=self.user, sumber_pemasukan="Gaji"
+        ).save()
+
+    @override_settings(INSTRUMENTASI_AKTIF=True)
+    def test_server_timing_header_and_view_stats(self):
+        response = Client().get('/saldo/')
+        header = response['Server-Timing']
+        self.assertRegex(header, r'sql;dur=[\d.]+;desc="2 kueri"')
+        self.assertIn('render;dur=', header)
+        self.assertIn('total;dur=', header)
+
+        stats = Client().get('/api/instrumentasi/').json()
+        self.assertEqual(stats['saldo']['permintaan'], 1)
+        self.assertEqual(stats['saldo']['rata_kueri'], 2)
+        self.assertEqual(sum(stats['saldo']['histogram'].values()), 1)
+
+    @override_settings(INSTRUMENTASI_AKTIF=True)
+    async def test_async_views_stay_async_and_are_measured(self):
+        response = await AsyncClient().get('/saldo/')
+        self.assertRegex(response['Server-Timing'], r'sql;dur=[\d.]+;desc="2 kueri"')
+        # A sync-only middleware would be wrapped in SyncToAsync, sending async views back to a thread
+        rantai = ASGIHandler()._middleware_chain.__wrapped__
+        self.assertIsInstance(rantai, InstrumentasiMiddleware)
+        self.assertTrue(rantai.asinkron)
+
+    @override_settings(INSTRUMENTASI_AKTIF=True, INSTRUMENTASI_AMBANG_LAMBAT_MS=0)
+    def test_slow_request_log_names_statements_and_call_sites(self):
+        with self.assertLogs('main.instrumentasi', 'WARNING') as log:
+            Client().get('/saldo/')
+        self.assertIn('main_ringkasanbulanan', log.output[0])
+        self.assertIn('main/models.py:', log.output[0])
+
+    def test_render_time_is_charged_by_the_template_backend(self):
+        catatan = CatatanPermintaan(tumpukan=False)
+        token = _catatan_aktif.set(catatan)
+        try:
+            engines['django'].from_string("{% for i in n %}{{ i }}{% endfor %}").render({'n': range(10000)})
+        finally:
+            _catatan_aktif.reset(token)
+        self.assertGreater(catatan.render_ms, 0)
+        self.assertEqual(catatan.kedalaman_render, 0)
+
+    @override_settings(INSTRUMENTASI_AKTIF=False)
+    def test_disabled_middleware_is_not_loaded(self):
+        response = Client().get('/saldo/')
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(Client().get('/api/instrumentasi/').status_code, 404)
+
+
+class RekonsiliasiSaldoTest(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create(nama=f"U{i}", email=f"u{i}@example.com") for i in range(5)]
+        for i, user in enumerate(self.users):
+            TransaksiPemasukan(
+                id=f"p{i}", jumlah=Decimal('100.00'), tanggal=date(2024, 3, 5), user=user, sumber_pemasukan="Gaji"
+            ).save()
+            TransaksiPengeluaran(
+                id=f"k{i}", jumlah=Decimal('30.00'), tanggal=date(2024, 3, 6), user=user, metode_pembayaran="Tunai"
+            ).save()
+
+    def test_full_run_reports_then_repairs_drift(self):
+        User.objects.filter(pk=self.users[2].pk).update(saldo=Decimal('75.00'))
+        riwayat, selisih = RekonsiliasiSaldo().jalankan()
+        self.assertTrue(riwayat.penuh)
+        self.assertEqual(riwayat.user_diperiksa, 5)
+        self.assertEqual(selisih, [(self.users[2].pk, "U2", Decimal('75.00'), Decimal('70.00'))])
+        self.assertIsNone(riwayat.watermark)
+
+        with self.assertRaises(CommandError):
+            call_command('reconcile_saldo', stdout=StringIO())
+        call_command('reconcile_saldo', perbaiki=True, stdout=StringIO())
+        self.assertEqual(User.objects.get(pk=self.users[2].pk).saldo, Decimal('70.00'))
+        self.assertEqual(RekonsiliasiSaldo().jalankan()[1], [])
+
+    def test_incremental_run_only_checks_users_touched_since_watermark(self):
+        with override_settings(REKONSILIASI_JEDA_DETIK=0):
+            RekonsiliasiSaldo().jalankan()
+            TransaksiPengeluaran(
+                id="baru", jumlah=Decimal('5.00'), tanggal=date(2024, 3, 7), user=self.users[0]
+            ).save()
+            riwayat, selisih = RekonsiliasiSaldo(ukuran_chunk=2).jalankan()
+        self.assertFalse(riwayat.penuh)
+        self.assertEqual(riwayat.user_diperiksa, 1)
+        self.assertEqual(selisih, [])
+
+
+    def test_incremental_run_sees_drift_written_around_the_models(self):
+        with override_settings(REKONSILIASI_JEDA_DETIK=0):
+            RekonsiliasiSaldo().jalankan()
+            Transaksi.objects.filter(pk="k1").update(jumlah=Decimal('40.00'))
+            User.objects.filter(pk=self.users[3].pk).update(saldo=Decimal('1.00'))
+            with connection.cursor() as cursor:
+                cursor.execute("DELETE FROM main_transaksi WHERE id = 'p4'")
+            riwayat, selisih = RekonsiliasiSaldo().jalankan()
+        self.assertFalse(riwayat.penuh)
+        self.assertEqual(riwayat.user_diperiksa, 3)
+        self.assertEqual(sorted(s[0] for s in selisih), [self.users[1].pk, self.users[3].pk, self.users[4].pk])
+
+
+class RekonsiliasiParalelTest(TransactionTestCase):
+    def test_process_pool_matches_inline_run(self):
+        users = User.objects.bulk_create(User(nama=f"U{i}", email=f"u{i}@example.com") for i in range(12))
+        PengelolaTransaksi.tambahTransaksiMassal(
+            Transaksi(id=f"p{u.pk}", jumlah=Decimal('10.00'), tanggal=date(2024, 1, 1),
+                      tipe=TipeTransaksi.PEMASUKAN, user=u)
+            for u in users
+        )
+        User.objects.filter(pk__in=[users[1].pk, users[10].pk]).update(saldo=Decimal('1.00'))
+        riwayat, selisih = RekonsiliasiSaldo(workers=2, ukuran_chunk=3).jalankan(penuh=True)
+        self.assertEqual(riwayat.user_diperiksa, 12)
+        self.assertEqual(sorted(s[0] for s in selisih), [users[1].pk, users[10].pk])
+
+
+class ArsipTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(nama="Budi", email="budi@example.com")
+        self.makan = Kategori.objects.create(id="makan", nama="Makan")
+        TransaksiPemasukan(id="in23", jumlah=Decimal('1000.00'), tanggal=date(2023, 3, 1),
+                           user=self.user, sumber_pemasukan="Gaji").save()
+        TransaksiPengeluaran(id="out23", jumlah=Decimal('100.00'), tanggal=date(2023, 3, 9),
+                             kategori=self.makan, user=self.user, metode_pembayaran="Tunai").save()
+        TransaksiPengeluaran(id="out24", jumlah=Decimal('50.00'), tanggal=date(2024, 7, 2),
+                             kategori=self.makan, user=self.user, metode_pembayaran="Tunai").save()
+        TransaksiPengeluaran(id="out25", jumlah=Decimal('20.00'), tanggal=date(2025, 2, 2),
+                             kategori=self.makan, user=self.user, metode_pembayaran="Tunai").save()
+
+    def test_archived_rows_still_count_and_read_back(self):
+        sebelum = LayananRingkasan.ringkasanBulanan(3, 2023, self.user)
+        call_command('archive_transaksi', sebelum='2025-01-01', stdout=StringIO())
+        self.assertEqual(dict(ArsipTahun.objects.values_list('tahun', 'jumlah_transaksi')), {2023: 2, 2024: 1})
+        self.assertEqual(list(Transaksi.objects.values_list('id', flat=True)), ["out25"])
+
+        # Rollups, counters and balances keep the archived rows, also when rebuilt
+        self.assertEqual(LayananRingkasan.ringkasanBulanan(3, 2023, self.user), sebelum)
+        LayananRingkasan.bangunUlangRingkasan()
+        self.assertEqual(LayananRingkasan.ringkasanBulanan(3, 2023, self.user), sebelum)
+        self.assertEqual(LayananRingkasan.hitungTotalPerTipe(self.user), (Decimal('1000.00'), Decimal('170.00')))
+        self.assertEqual(Penghitung.bangunUlang()[Penghitung.TRANSAKSI], 4)
+        self.assertEqual(RekonsiliasiSaldo().jalankan(penuh=True)[1], [])
+
+        # Pages continue from the ledger into the archive; exports cover both
+        dilihat, cursor = [], None
+        while True:
+            halaman = PengelolaArsip.ambilHalaman(cursor=cursor, ukuran=2, user=self.user)
+            dilihat += [trx.id for trx in halaman['transaksi']]
+            cursor = halaman['cursor_berikutnya']
+            if not cursor:
+                break
+        self.assertEqual(dilihat, ["out25", "out24", "out23", "in23"])
+        self.assertEqual([trx.kategori for trx in halaman['transaksi']], [self.makan, None])
+        # Archived rows are listed without a delete action, which only reaches main_transaksi
+        isi = Client().get('/transaksi/', {'ukuran': 4}).content.decode()
+        self.assertIn('/transaksi/delete/out25/', isi)
+        self.assertNotIn('/transaksi/delete/out24/', isi)
+        self.assertEqual(isi.count('Archived'), 3)
+        hasil = Client().get('/api/transaksi/', {'fields': 'id,kategori', 'dari': '2023-03-05'}).json()['hasil']
+        self.assertEqual(hasil, [{'id': "out25", 'kategori': "makan"}, {'id': "out24", 'kategori': "makan"},
+                                 {'id': "out23", 'kategori': "makan"}])
+        isi = b''.join(Client().get('/transaksi/export/?format=csv').streaming_content).decode()
+        self.assertEqual([b['id'] for b in csv.DictReader(StringIO(isi))], ["in23", "out23", "out24", "out25"])
+
+        self.assertEqual(PengelolaArsip.pulihkan(2023), 2)
+        self.assertEqual(Transaksi.objects.count(), 3)
+        self.assertNotIn('main_transaksi_arsip_2023', connection.introspection.table_names())
+
+    def test_user_delete_clears_archive(self):
+        PengelolaArsip.arsipkan(date(2025, 1, 1))
+        self.user.delete()
+        self.assertEqual(ArsipTahun.modelTahun(2023).objects.count(), 0)
+        self.assertEqual(sum(ArsipTahun.objects.values_list('jumlah_transaksi', flat=True)), 0)
+        self.assertEqual(Penghitung.baca()[Penghitung.TRANSAKSI], 0)
+
+
+class AsyncViewTest(TestCase):
+    async def test_api_test_under_async_client(self):
+        data = (await AsyncClient().get('/api/test/')).json()
+        self.assertEqual((data['status'], data['users'], data['categories']), ('success', 1, 1))
+
+    async def test_read_views_render_under_async_client(self):
+        await User.objects.acreate(nama="A", email="a@example.com")
+        for path in ('/', '/saldo/', '/summary/?bulan=3&tahun=2024&detail=1'):
+            response = await AsyncClient().get(path)
+            self.assertEqual(response.status_code, 200, path)
+        self.assertEqual((await AsyncClient().get('/summary/?bulan=13')).status_code, 400)
+
+
+class SqlitePragmaTest(TestCase):
+    @skipUnless(connection.vendor == 'sqlite', "SQLite only")
+    def test_pragmas_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA temp_store")
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+
+    def test_rejects_non_token_values(self):
+        self.assertEqual(pernyataanPragma({'cache_size': -2000}), ["PRAGMA cache_size = -2000"])
+        with self.assertRaises(ImproperlyConfigured):
+            pernyataanPragma({'journal_mode': "WAL; DROP TABLE main_user"})
+
+
+class PenghitungTest(TestCase):
+    def hitungan(self):
+        return {
+            Penghitung.USER: User.objects.count(),
+            Penghitung.KATEGORI: Kategori.objects.count(),
+            Penghitung.TRANSAKSI: Transaksi.objects.count(),
+        }
+
+    def test_counters_follow_creates_and_deletes(self):
+        users, kategori = buatLedgerSintetis(jumlah_user=3, jumlah_kategori=2, jumlah_transaksi=40, hari=10)
+        user = User.objects.create(nama="A", email="a@example.com", saldo=Decimal('100.00'))
+        Kategori.objects.create(id="k", nama="K")
+        PengelolaTransaksi.tambahTransaksi(TransaksiPengeluaran(
+            id="t1", jumlah=Decimal('10.00'), tanggal=date(2024, 1, 1), user=user, metode_pembayaran="Cash",
+        ))
+        self.assertEqual(Penghitung.baca(), self.hitungan())
+
+        Transaksi.objects.get(pk="t1").delete()
+        kategori[0].delete()
+        users[0].delete()
+        self.assertEqual(Penghitung.baca(), self.hitungan())
+
+    def test_dashboard_reads_counters_in_one_query(self):
+        User.objects.create(nama="A", email="a@example.com")
+        # The user, the counters and the user's total for today
+        with self.assertNumQueries(3):
+            response = Client().get('/')
+        self.assertEqual(response.context['user_count'], 1)
+
+    def test_rebuild_command_fixes_drift(self):
+        User.objects.create(nama="A", email="a@example.com")
+        Penghitung.objects.filter(nama=Penghitung.USER).update(nilai=42)
+        call_command('rebuild_penghitung', stdout=StringIO())
+        self.assertEqual(Penghitung.baca(), self.hitungan())
+
+
+class AnggaranTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(nama="A", email="a@example.com", saldo=Decimal('1000.00'))
+        self.makan = Kategori.objects.create(id="makan", nama="Makan")
+        Kategori.objects.create(id="lain", nama="Lain")
+
+    def belanja(self, id, jumlah, tanggal=date(2024, 3, 5)):
+        trx = TransaksiPengeluaran(id=id, jumlah=Decimal(jumlah), tanggal=tanggal,
+                                   kategori=self.makan, user=self.user, metode_pembayaran="Cash")
+        return PengelolaTransaksi.tambahTransaksi(trx)
+
+    def test_soft_budget_warns(self):
+        PengelolaAnggaran.aturAnggaran(self.user, self.makan, '100.00')
+        self.assertEqual(self.belanja("t1", '60.00').peringatan_anggaran, [])
+        self.assertEqual(len(self.belanja("t2", '60.00').peringatan_anggaran), 1)
+        # A new month starts from zero
+        self.assertEqual(self.belanja("t3", '60.00', date(2024, 4, 1)).peringatan_anggaran, [])
+
+    def test_hard_budget_blocks_and_rolls_back(self):
+        PengelolaAnggaran.aturAnggaran(self.user, self.makan, '100.00', blokir=True)
+        self.belanja("t1", '60.00')
+        with self.assertRaises(ValidationError):
+            self.belanja("t2", '60.00')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.saldo, Decimal('940.00'))
+        self.assertFalse(Transaksi.objects.filter(pk="t2").exists())
+        with self.assertRaises(ValidationError):
+            PengelolaTransaksi.tambahTransaksiMassal([
+                Transaksi(id=f"m{i}", jumlah=Decimal('30.00'), tanggal=date(2024, 3, 6),
+                          tipe=TipeTransaksi.PENGELUARAN, kategori=self.makan, user=self.user)
+                for i in range(2)
+            ])
+
+    def test_check_reads_rollup_not_ledger(self):
+        PengelolaAnggaran.aturAnggaran(self.user, self.makan, '100.00')
+        kueri = []
+        with connection.execute_wrapper(lambda execute, sql, *args: kueri.append(sql) or execute(sql, *args)):
+            PengelolaAnggaran.periksaAnggaran([(self.user.pk, date(2024, 3, 5), TipeTransaksi.PENGELUARAN, "makan",
+                                                Decimal('1.00'), 1)])
+        self.assertEqual(len(kueri), 2)
+        self.assertFalse(any('main_transaksi' in sql for sql in kueri))
+
+    def test_status_lists_every_kategori_in_one_query(self):
+        PengelolaAnggaran.aturAnggaran(self.user, self.makan, '100.00')
+        self.belanja("t1", '120.00')
+        with self.assertNumQueries(1):
+            status = {s['id']: s for s in PengelolaAnggaran.statusAnggaran(self.user, 3, 2024)}
+        self.assertEqual((status['makan']['terpakai'], status['makan']['sisa']), (Decimal('120.00'), Decimal('-20.00')))
+        self.assertTrue(status['makan']['terlampaui'])
+        self.assertIsNone(status['lain']['batas'])
+        response = Client().get('/anggaran/', {'bulan': 3, 'tahun': 2024})
+        self.assertContains(response, 'Makan')
+
+
+class BerulangTest(TestCase):
+    def setUp(self):
+        self.a = User.objects.create(nama="A", email="a@example.com", saldo=Decimal('1000.00'))
+        self.b = User.objects.create(nama="B", email="b@example.com", saldo=Decimal('50.00'))
+        self.sewa = Kategori.objects.create(id="sewa", nama="Sewa")
+
+    def aturan(self, user, jumlah, tanggal, **kwargs):
+        templat = TransaksiPengeluaran(jumlah=Decimal(jumlah), tanggal=tanggal, kategori=self.sewa, user=user,
+                                       metode_pembayaran="Transfer")
+        return PengelolaBerulang.buatAturan(templat, **kwargs)
+
+    def test_catch_up_clamps_to_month_end_and_stops_at_end_date(self):
+        aturan = self.aturan(self.a, '100.00', date(2024, 1, 31), berakhir=date(2024, 4, 30))
+        hasil = PengelolaBerulang.jalankanJatuhTempo(date(2024, 6, 1))
+        self.assertEqual((hasil['aturan'], hasil['transaksi']), (1, 4))
+        self.assertEqual(
+            sorted(Transaksi.objects.values_list('tanggal', flat=True)),
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)],
+        )
+        aturan.refresh_from_db()
+        self.assertEqual(aturan.terakhir, date(2024, 4, 30))
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.saldo, Decimal('600.00'))
+        self.assertEqual(LayananRingkasan.hitungPengeluaranBerdasarkanBulan(2, 2024), Decimal('100.00'))
+
+    def test_rerun_is_idempotent_and_saved_template_is_not_repeated(self):
+        templat = PengelolaTransaksi.tambahTransaksi(TransaksiPengeluaran(
+            id="sewa1", jumlah=Decimal('100.00'), tanggal=date(2024, 1, 15), kategori=self.sewa, user=self.a,
+            metode_pembayaran="Transfer"))
+        PengelolaBerulang.buatAturan(templat, interval_bulan=2)
+        PengelolaBerulang.jalankanJatuhTempo(date(2024, 5, 20))
+        self.assertEqual(PengelolaBerulang.jalankanJatuhTempo(date(2024, 5, 20))['transaksi'], 0)
+        self.assertEqual(
+            sorted(Transaksi.objects.values_list('tanggal', flat=True)),
+            [date(2024, 1, 15), date(2024, 3, 15), date(2024, 5, 15)],
+        )
+        self.assertEqual(Penghitung.baca()[Penghitung.TRANSAKSI], 3)
+
+    def test_one_users_shortfall_does_not_block_others(self):
+        self.aturan(self.a, '100.00', date(2024, 1, 1))
+        gagal = self.aturan(self.b, '40.00', date(2024, 1, 1))
+        hasil = PengelolaBerulang.jalankanJatuhTempo(date(2024, 2, 1))
+        self.assertEqual(list(hasil['gagal']), [self.b.pk])
+        self.assertEqual(Transaksi.objects.filter(user=self.a).count(), 2)
+        self.assertFalse(Transaksi.objects.filter(user=self.b).exists())
+        gagal.refresh_from_db()
+        self.assertIsNone(gagal.terakhir)
+
+        out = StringIO()
+        call_command('run_recurring', '--sampai', '2024-02-01', stdout=out, stderr=StringIO())
+        self.assertIn("0 transaksi", out.getvalue())
+        self.assertEqual(TransaksiBerulang.objects.filter(terakhir__isnull=False).count(), 1)
+
+
+@skipUnless(np is not None, "NumPy not installed")
+class AnalitikTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(nama="A", email="a@example.com", saldo=Decimal('10000.00'))
+        Kategori.objects.create(id="makan", nama="Makan")
+        PengelolaTransaksi.tambahTransaksiMassal(
+            Transaksi(id=f"t{i}", jumlah=Decimal(jumlah), tanggal=tanggal, tipe=TipeTransaksi.PENGELUARAN,
+                      kategori_id=kategori, user=self.user)
+            for i, (tanggal, jumlah, kategori) in enumerate([
+                (date(2024, 1, 15), '100.00', "makan"),
+                (date(2024, 2, 15), '200.00', "makan"),
+                (date(2024, 2, 20), '200.00', None),
+                (date(2024, 3, 1), '300.00', "makan"),
+                (date(2024, 3, 4), '50.00', "makan"),
+            ])
+        )
+
+    def test_moving_average_of_short_prefix(self):
+        self.assertEqual(rataBergerak(np.array([2.0, 4.0, 6.0, 8.0]), 2).tolist(), [2.0, 3.0, 5.0, 7.0])
+
+    def test_series_shares_and_forecast(self):
+        hasil = LayananAnalitik.analisis(self.user.pk, date(2024, 3, 4), hari=64)
+        self.assertEqual(hasil['dari'], '2024-01-01')
+        self.assertEqual(sum(hasil['harian']['pengeluaran']), 850.0)
+        self.assertEqual(sum(hasil['mingguan']['pengeluaran']), 850.0)
+        kategori = hasil['kategori']
+        self.assertEqual(kategori['bulan'], ['2024-01', '2024-02', '2024-03'])
+        makan = [k['id'] for k in kategori['kategori']].index("makan")
+        self.assertEqual([p[makan] for p in kategori['porsi']], [1.0, 0.5, 1.0])
+        prakiraan = hasil['prakiraan']
+        self.assertEqual((prakiraan['bulan'], prakiraan['terpakai'], prakiraan['sisa_hari']), ('2024-03', 350.0, 27))
+        self.assertGreaterEqual(prakiraan['musiman'], 350.0)
+        # January and February are the complete months: 100 then 400
+        self.assertEqual(prakiraan['linear'], 700.0)
 
+    def test_empty_ledger(self):
+        # bincount over no rows is an int matrix; shares must still come out as floats
+        kosong = User.objects.create(nama="B", email="b@example.com")
+        hasil = LayananAnalitik.analisis(kosong.pk, date(2024, 3, 4), hari=64)
+        self.assertEqual((hasil['kategori']['bulan'], hasil['kategori']['porsi']), ([], []))
+        self.assertEqual(sum(hasil['harian']['pengeluaran']), 0.0)
 
+    def test_endpoint(self):
+        response = Client().get('/api/analitik/', {'user': self.user.pk, 'sampai': '2024-03-04', 'hari': 64})
+        self.assertEqual(response.json()['prakiraan']['terpakai'], 350.0)
+        self.assertEqual(Client().get('/api/analitik/', {'sampai': 'kemarin'}).status_code, 400)
@@ -0,0 +1,60 @@
+"""Time-ordered primary keys in the ULID format: 48-bit millisecond timestamp, 80 random bits, Crockford base32"""
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+ALFABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+POLA = re.compile(r'^[0-7][0-9A-HJKMNP-TV-Z]{25}$')
+_ACAK_MAKS = (1 << 80) - 1
+
+_kunci = threading.Lock()
+_terakhir = (0, 0)
+
+
+def _milidetik(waktu):
+    if not isinstance(waktu, datetime):
+        waktu = datetime(waktu.year, waktu.month, waktu.day, tzinfo=timezone.utc)
+    elif waktu.tzinfo is None:
+        waktu = waktu.replace(tzinfo=timezone.utc)
+    return int(waktu.timestamp() * 1000)
+
+
+def _enkode(milidetik, acak):
+    nilai = milidetik << 80 | acak
+    return ''.join(ALFABET[(nilai >> geser) & 31] for geser in range(125, -1, -5))
+
+
+def buatId(waktu=None, kunci=None):
+    """Generate a 26-character ULID primary key.
+
+    Ids sort by creation time, so inserts land at the right edge of the
+    primary key index instead of on random pages, and within one
+    millisecond the random part counts up, keeping ids from this process
+    strictly ascending. waktu (a date or datetime) sets the timestamp;
+    kunci derives the random part from a string, so the same (waktu,
+    kunci) always gives the same id.
+    """
+    global _terakhir
+    if kunci is not None:
+        acak = int.from_bytes(hashlib.blake2b(kunci.encode(), digest_size=10).digest(), 'big')
+        return _enkode(_milidetik(waktu) if waktu is not None else time.time_ns() // 1_000_000, acak)
+    if waktu is not None:
+        return _enkode(_milidetik(waktu), int.from_bytes(os.urandom(10), 'big'))
+    with _kunci:
+        milidetik = time.time_ns() // 1_000_000
+        if milidetik > _terakhir[0]:
+            acak = int.from_bytes(os.urandom(10), 'big')
+        else:
+            # Same millisecond (or the clock stepped back): continue the previous sequence
+            milidetik, acak = _terakhir[0], _terakhir[1] + 1
+            if acak > _ACAK_MAKS:
+                milidetik, acak = milidetik + 1, 0
+        _terakhir = (milidetik, acak)
+    return _enkode(milidetik, acak)
+
+
+def adalahId(teks):
+    return bool(POLA.match(teks))
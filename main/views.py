@@ -1,13 +1,24 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.conf import settings
 from django.contrib import messages
-from datetime import date, datetime
-import random
-import string
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections, connection
+from datetime import date, datetime, timedelta
+import asyncio
 import json
+from .analitik import LayananAnalitik
+from .arsip import PengelolaArsip
+from .cache import CacheRingkasan
+from .ekspor import FORMAT_EKSPOR, eksporCsv, eksporNdjson
+from .impor import FORMAT_DIDUKUNG, ImporTransaksi, tebakFormat
+from .middleware import StatistikView
+from profiles.pengguna import PenggunaTidakValid, penggunaRequest
 from .models import (
     User, Kategori, Transaksi, TransaksiPemasukan, TransaksiPengeluaran,
-    PengelolaKategori, PengelolaTransaksi, LayananRingkasan, TipeTransaksi
+    PengelolaKategori, PengelolaTransaksi, PengelolaAnggaran, LayananRingkasan, Penghitung, TipeTransaksi, buatId,
+    rentangBulan,
 )
 
 
@@ -19,21 +30,58 @@ def rp(value):
         return f"Rp 0"
 
 
-def show_main(request):
+def pengguna_atau_bawaan(request):
+    """The request's user, creating the default user on an empty database"""
+    user = penggunaRequest(request)
+    if user is None and not request.GET.get('user'):
+        user = User.objects.create(nama="Default User", email="user@example.com")
+        request._pengguna = user
+    return user
+
+def _baca_di_worker(fungsi, *args):
+    try:
+        return fungsi(*args)
+    finally:
+        # Worker threads see no request_finished; apply CONN_MAX_AGE here
+        close_old_connections()
+
+async def baca_serentak(*panggilan):
+    """Await independent read-only calls, each given as (fungsi, *args), together.
+
+    Outside a transaction every call runs on a worker thread with its own
+    connection, so SQLite's WAL readers really overlap. Inside one (a
+    TestCase, ATOMIC_REQUESTS) other connections cannot see its uncommitted
+    rows, so the calls then share the request's thread one after another.
+    """
+    if await sync_to_async(lambda: connection.in_atomic_block)():
+        return await asyncio.gather(*(sync_to_async(fungsi)(*args) for fungsi, *args in panggilan))
+    return await asyncio.gather(*(
+        sync_to_async(_baca_di_worker, thread_sensitive=False)(fungsi, *args) for fungsi, *args in panggilan
+    ))
+
+async def show_main(request):
     """Main dashboard view"""
+    try:
+        user = await sync_to_async(penggunaRequest)(request)
+    except PenggunaTidakValid:
+        return HttpResponseBadRequest("User tidak valid")
+    # Maintained counters rather than COUNT(*) scans; the figures are awaited together
+    jumlah, today_total = await baca_serentak(
+        (Penghitung.baca,),
+        (LayananRingkasan.hitungTotalBerdasarkanTanggal, date.today(), user),
+    )
     context = {
         'title': 'Spending Tracker Dashboard',
-        'user_count': User.objects.count(),
-        'kategori_count': Kategori.objects.count(),
-        'transaksi_count': Transaksi.objects.count(),
+        'user_count': jumlah[Penghitung.USER],
+        'kategori_count': jumlah[Penghitung.KATEGORI],
+        'transaksi_count': jumlah[Penghitung.TRANSAKSI],
     }
     
-    if Transaksi.objects.exists():
-        today = date.today()
-        today_total = LayananRingkasan.hitungTotalBerdasarkanTanggal(today)
+    if jumlah[Penghitung.TRANSAKSI]:
         context['today_total'] = today_total
     
-    return render(request, 'main/dashboard.html', context)
+    # Templates read messages from the session, which is sync-only
+    return await sync_to_async(render)(request, 'main/dashboard.html', context)
 
 def kategori_list(request):
     """Display all categories"""
@@ -48,7 +96,7 @@ def kategori_create(request):
     ]
 
     if request.method == 'POST':
-        id = request.POST.get('id')
+        id = request.POST.get('id') or buatId()
         nama = request.POST.get('nama')
         ikon = request.POST.get('ikon')
         warna = request.POST.get('warna')
@@ -70,7 +118,7 @@ def kategori_create(request):
         return redirect('kategori_list')
     
     else:
-        random_id = ''.join(random.choices(string.ascii_letters + string.digits, k=6))
+        random_id = buatId()
         context = {
             'random_id': random_id,
             'ikon_list': ikon_list
@@ -79,8 +127,14 @@ def kategori_create(request):
 
     
 def transaksi_delete(request, transaksi_id):
-    transaksi = get_object_or_404(Transaksi, id=transaksi_id)
-    transaksi.delete()
+    try:
+        transaksi = get_object_or_404(Transaksi.objects.milik(penggunaRequest(request)), id=transaksi_id)
+    except PenggunaTidakValid:
+        return HttpResponseBadRequest("User tidak valid")
+    try:
+        transaksi.delete()
+    except ValidationError as e:
+        messages.error(request, ' '.join(e.messages))
     return redirect('transaksi_list')
 
 def kategori_delete(request, kategori_id):
@@ -91,29 +145,52 @@ def kategori_delete(request, kategori_id):
         messages.error(request, 'Category not found!')
     return redirect('kategori_list')
 
+def ukuran_halaman(request):
+    """Page size from ?ukuran=, bounded by the TRANSAKSI_PER_HALAMAN settings"""
+    bawaan = getattr(settings, 'TRANSAKSI_PER_HALAMAN', 50)
+    maksimum = getattr(settings, 'TRANSAKSI_PER_HALAMAN_MAKS', 500)
+    try:
+        ukuran = int(request.GET.get('ukuran', bawaan))
+    except ValueError:
+        ukuran = bawaan
+    return max(1, min(ukuran, maksimum))
+
 def transaksi_list(request):
-    transaksi_list = Transaksi.objects.all().order_by('-tanggal')
+    ukuran = ukuran_halaman(request)
+    try:
+        pengguna = penggunaRequest(request)
+        halaman = {'transaksi': [], 'cursor_berikutnya': None}
+        if pengguna is not None:
+            halaman = PengelolaArsip.ambilHalaman(cursor=request.GET.get('cursor'), ukuran=ukuran, user=pengguna)
+    except PenggunaTidakValid:
+        return HttpResponseBadRequest("User tidak valid")
+    except ValidationError:
+        return HttpResponseBadRequest("Cursor tidak valid")
     return render(request, 'main/transaksi_list.html', {
-        'transaksi_list': transaksi_list
+        'transaksi_list': halaman['transaksi'],
+        'cursor_berikutnya': halaman['cursor_berikutnya'],
+        'halaman_pertama': not request.GET.get('cursor'),
+        'ukuran': ukuran,
     })
 
 
 def transaksi_create(request):
-    random_id = ''.join(random.choices(string.ascii_letters + string.digits, k=6))
+    random_id = buatId()
+    try:
+        user = pengguna_atau_bawaan(request)
+    except PenggunaTidakValid:
+        return HttpResponseBadRequest("User tidak valid")
+    if user is None:
+        return HttpResponseBadRequest("User tidak ditemukan")
 
     if request.method == 'POST':
-        id = request.POST.get('id')
+        id = request.POST.get('id') or buatId()
         jumlah = request.POST.get('jumlah')
         tanggal = request.POST.get('tanggal')
         kategori_id = request.POST.get('kategori')
         catatan = request.POST.get('catatan', '')
         tipe = request.POST.get('tipe')
 
-
-        user = User.objects.first()
-        if not user:
-            user = User.objects.create(nama="Default User", email="user@example.com")
-
         kategori = get_object_or_404(Kategori, id=kategori_id) if kategori_id else None
 
         if tipe == TipeTransaksi.PEMASUKAN:
@@ -131,17 +208,18 @@ def transaksi_create(request):
                 metode_pembayaran=metode
             )
 
-        PengelolaTransaksi.tambahTransaksi(transaksi)
+        try:
+            PengelolaTransaksi.tambahTransaksi(transaksi)
+        except ValidationError as e:
+            messages.error(request, ' '.join(e.messages))
+            return redirect('transaksi_create')
+        for peringatan in transaksi.peringatan_anggaran:
+            messages.warning(request, peringatan)
         messages.success(request, 'Transaction created successfully!')
         return redirect('transaksi_list')
 
     categories = PengelolaKategori.ambilSemuaKategori()
-    pemasukan_total = PengelolaTransaksi.hitungTotalBerdasarkanTipe(
-        TipeTransaksi.PEMASUKAN
-    )
-    pengeluaran_total = PengelolaTransaksi.hitungTotalBerdasarkanTipe(
-        TipeTransaksi.PENGELUARAN
-    )
+    pemasukan_total, pengeluaran_total = LayananRingkasan.hitungTotalPerTipe(user)
     saldo_akhir = pemasukan_total - pengeluaran_total
     context = {
         'categories': categories,
@@ -155,81 +233,171 @@ def transaksi_create(request):
     return render(request, 'main/transaksi_form.html', context)
 
 
-def summary_view(request):
+def transaksi_import(request):
+    """Upload a CSV/NDJSON file and stream it through the bulk importer"""
+    context = {'format_choices': FORMAT_DIDUKUNG}
+    if request.method == 'POST':
+        berkas = request.FILES.get('berkas')
+        if berkas is None:
+            messages.error(request, 'Please choose a file to import.')
+            return render(request, 'main/transaksi_import.html', context)
+
+        format = request.POST.get('format') or tebakFormat(berkas.name)
+        if format not in FORMAT_DIDUKUNG:
+            return HttpResponseBadRequest("Format tidak didukung")
+        try:
+            user = pengguna_atau_bawaan(request)
+        except PenggunaTidakValid:
+            return HttpResponseBadRequest("User tidak valid")
+        if user is None:
+            return HttpResponseBadRequest("User tidak ditemukan")
+
+        # The upload acts for the request's user only, whatever user_id the rows carry
+        hasil = ImporTransaksi(
+            user_bawaan=user, batch_size=getattr(settings, 'IMPOR_BATCH_SIZE', 1000), batasi_user=True,
+        ).dariBerkas(berkas.file, format)
+        if 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse(hasil)
+        context['hasil'] = hasil
+
+    return render(request, 'main/transaksi_import.html', context)
+
+
+def transaksi_export(request):
+    """Stream the request user's ledger as CSV or NDJSON, filtered by ?dari=&sampai=&tipe=&kategori="""
+    format = request.GET.get('format', 'csv')
+    if format not in FORMAT_EKSPOR:
+        return HttpResponseBadRequest("Format tidak didukung")
+
+    filter = {}
+    try:
+        user = penggunaRequest(request)
+        for kunci in ('dari', 'sampai'):
+            if request.GET.get(kunci):
+                filter[kunci] = date.fromisoformat(request.GET[kunci])
+    except ValueError:
+        return HttpResponseBadRequest("Parameter filter tidak valid")
+    if user is None:
+        return HttpResponseBadRequest("User tidak ditemukan")
+    filter['user'] = user.pk
+    if request.GET.get('tipe'):
+        if request.GET['tipe'] not in TipeTransaksi.values:
+            return HttpResponseBadRequest("Tipe tidak valid")
+        filter['tipe'] = request.GET['tipe']
+    if request.GET.get('kategori'):
+        filter['kategori'] = request.GET['kategori']
+
+    chunk_size = getattr(settings, 'EKSPOR_CHUNK_SIZE', 2000)
+    baris = eksporCsv(filter, chunk_size) if format == 'csv' else eksporNdjson(filter, chunk_size)
+    response = StreamingHttpResponse(baris, content_type=FORMAT_EKSPOR[format])
+    response['Content-Disposition'] = f'attachment; filename="transaksi.{format}"'
+    return response
+
+
+async def summary_view(request):
     """Display financial summary"""
     context = {}
+    data = request.POST if request.method == 'POST' else request.GET
     
     today = date.today()
-    context['today_total'] = LayananRingkasan.hitungTotalBerdasarkanTanggal(today)
-    selected_month = today.month
-    selected_year = today.year
-    
-    if request.method == 'POST':
-        selected_month = int(request.POST.get('bulan', selected_month))
-        selected_year = int(request.POST.get('tahun', selected_year))
+    try:
+        user = await sync_to_async(penggunaRequest)(request)
+    except PenggunaTidakValid:
+        return HttpResponseBadRequest("User tidak valid")
+    try:
+        selected_month = int(data.get('bulan') or today.month)
+        selected_year = int(data.get('tahun') or today.year)
+        context['today_total'], ringkasan, (context['pemasukan_total'], context['pengeluaran_total']) = \
+            await baca_serentak(
+                (LayananRingkasan.hitungTotalBerdasarkanTanggal, today, user),
+                (LayananRingkasan.ringkasanBulanan, selected_month, selected_year, user),
+                (LayananRingkasan.hitungTotalPerTipe, user),
+            )
+    except ValueError:
+        return HttpResponseBadRequest("Bulan atau tahun tidak valid")
     
     context['selected_month'] = selected_month
     context['selected_year'] = selected_year
-    context['month_total'] = LayananRingkasan.hitungTotalBerdasarkanBulan(
-        selected_month, selected_year
-    )
+    context['month_total'] = ringkasan['total']
     current_year = today.year
     context['range_years'] = range(current_year - 5, current_year + 1)
-    context['pemasukan_total'] = PengelolaTransaksi.hitungTotalBerdasarkanTipe(
-        TipeTransaksi.PEMASUKAN
-    )
-    context['pengeluaran_total'] = PengelolaTransaksi.hitungTotalBerdasarkanTipe(
-        TipeTransaksi.PENGELUARAN
-    )
     context['net_balance'] = context['pemasukan_total'] - context['pengeluaran_total']
     
-    transactions = Transaksi.objects.filter(
-        tanggal__month=selected_month,
-        tanggal__year=selected_year
-    ).order_by('tanggal')
-    
-    # Add to context
-    context['transactions'] = transactions
-    
-    monthly_income = sum(t.jumlah for t in transactions if t.tipe == TipeTransaksi.PEMASUKAN)
-    monthly_expense = sum(t.jumlah for t in transactions if t.tipe == TipeTransaksi.PENGELUARAN)
+    context['monthly_income'] = ringkasan['pemasukan']
+    context['monthly_expense'] = ringkasan['pengeluaran']
+    context['ringkasan_kategori'] = ringkasan['kategori']
+    context['jumlah_transaksi'] = ringkasan['jumlah_transaksi']
     
-    context['monthly_income'] = monthly_income
-    context['monthly_expense'] = monthly_expense
-    
-    transactions_by_category = {}
-    for transaction in transactions:
-        category = transaction.kategori
-        if category not in transactions_by_category:
-            transactions_by_category[category] = []
-        transactions_by_category[category].append(transaction)
-    
-    for category, cat_transactions in transactions_by_category.items():
-        total = sum(t.jumlah for t in cat_transactions)
-        if cat_transactions:
-            cat_transactions[0].total = total
-            cat_transactions[0].tipe = cat_transactions[0].tipe
-    
-    context['transactions_by_category'] = transactions_by_category
+    # The raw transaction list is opt-in and paginated
+    if data.get('detail'):
+        try:
+            awal, akhir = rentangBulan(selected_month, selected_year)
+            halaman = await sync_to_async(PengelolaArsip.ambilHalaman)(
+                cursor=request.GET.get('cursor'),
+                ukuran=ukuran_halaman(request),
+                user=user, dari=awal, sampai=akhir - timedelta(days=1),
+            )
+        except ValidationError:
+            return HttpResponseBadRequest("Cursor tidak valid")
+        context['transactions'] = halaman['transaksi']
+        context['cursor_berikutnya'] = halaman['cursor_berikutnya']
     
-    return render(request, 'main/summary.html', context)
+    return await sync_to_async(render)(request, 'main/summary.html', context)
 
-def api_test(request):
+def anggaran_view(request):
+    """Budget status of every kategori for one user and month; POST sets a budget"""
+    try:
+        user = penggunaRequest(request)
+    except PenggunaTidakValid:
+        return HttpResponseBadRequest("User tidak valid")
+    if user is None:
+        messages.error(request, 'No user found.')
+        return redirect('show_main')
+
+    if request.method == 'POST':
+        kategori = get_object_or_404(Kategori, id=request.POST.get('kategori'))
+        try:
+            if request.POST.get('batas'):
+                PengelolaAnggaran.aturAnggaran(user, kategori, request.POST['batas'], bool(request.POST.get('blokir')))
+            else:
+                PengelolaAnggaran.hapusAnggaran(user, kategori)
+        except (ValidationError, ArithmeticError, ValueError):
+            messages.error(request, 'Invalid budget amount.')
+        else:
+            messages.success(request, 'Budget saved.')
+        return redirect(request.get_full_path())
+
+    today = date.today()
+    try:
+        bulan = int(request.GET.get('bulan') or today.month)
+        tahun = int(request.GET.get('tahun') or today.year)
+        status = PengelolaAnggaran.statusAnggaran(user, bulan, tahun)
+    except ValueError:
+        return HttpResponseBadRequest("Bulan atau tahun tidak valid")
+    return render(request, 'main/anggaran.html', {
+        'pengguna': user,
+        'status': status,
+        'selected_month': bulan,
+        'selected_year': tahun,
+    })
+
+async def api_test(request):
     """Test API endpoint for your models"""
     try:
-        if not User.objects.exists():
-            user = User.objects.create(nama="Test User", email="test@example.com")
+        if not await User.objects.aexists():
+            await User.objects.acreate(nama="Test User", email="test@example.com")
         
-        if not Kategori.objects.filter(id="test").exists():
+        if not await Kategori.objects.filter(id="test").aexists():
             kategori = Kategori(id="test", nama="Test Category", ikon="🧪", warna="#FF5733")
-            PengelolaKategori.tambahKategori(kategori)
+            await sync_to_async(PengelolaKategori.tambahKategori)(kategori)
         
+        jumlah = await sync_to_async(Penghitung.baca)()
         data = {
             'status': 'success',
             'message': 'API working correctly!',
-            'users': User.objects.count(),
-            'categories': Kategori.objects.count(),
-            'transactions': Transaksi.objects.count(),
+            'users': jumlah[Penghitung.USER],
+            'categories': jumlah[Penghitung.KATEGORI],
+            'transactions': jumlah[Penghitung.TRANSAKSI],
         }
         
     except Exception as e:
@@ -240,15 +408,39 @@ def api_test(request):
     
     return JsonResponse(data)
 
-def saldo_view(request):
+def api_analitik(request):
+    """Spending trends, moving averages, kategori shares and a month-end forecast of one user"""
+    if not LayananAnalitik.tersedia():
+        return JsonResponse({'status': 'error', 'message': "NumPy tidak terpasang"}, status=503)
+    try:
+        user = penggunaRequest(request, sesi=False)
+        sampai = date.fromisoformat(request.GET['sampai']) if request.GET.get('sampai') else date.today()
+        hari = int(request.GET.get('hari') or getattr(settings, 'ANALITIK_HARI', 365))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': "Parameter tidak valid"}, status=400)
+    hari = max(1, min(hari, getattr(settings, 'ANALITIK_HARI_MAKS', 5 * 366)))
+    if user is None:
+        return JsonResponse({'status': 'error', 'message': "User tidak ditemukan"}, status=404)
+    return JsonResponse(LayananAnalitik.analisis(user.pk, sampai, hari))
+
+def api_cache_stats(request):
+    """Hit/miss counters of the summary cache"""
+    return JsonResponse(CacheRingkasan.statistik())
+
+def api_instrumentasi(request):
+    """Rolling per-view timings recorded by InstrumentasiMiddleware, local requests only"""
+    if not getattr(settings, 'INSTRUMENTASI_AKTIF', False) or \
+            request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        return JsonResponse({'status': 'error', 'message': 'Tidak tersedia'}, status=404)
+    return JsonResponse(StatistikView.ringkasan())
+
+async def saldo_view(request):
     """Display current balance summary"""
-    
-    pemasukan_total = PengelolaTransaksi.hitungTotalBerdasarkanTipe(
-        TipeTransaksi.PEMASUKAN
-    )
-    pengeluaran_total = PengelolaTransaksi.hitungTotalBerdasarkanTipe(
-        TipeTransaksi.PENGELUARAN
-    )
+    try:
+        user = await sync_to_async(penggunaRequest)(request)
+    except PenggunaTidakValid:
+        return HttpResponseBadRequest("User tidak valid")
+    pemasukan_total, pengeluaran_total = await sync_to_async(LayananRingkasan.hitungTotalPerTipe)(user)
     saldo_akhir = pemasukan_total - pengeluaran_total
     context = {
         "saldo_akhir" : rp(saldo_akhir),
@@ -256,4 +448,4 @@ def saldo_view(request):
         "pengeluaran_total" : rp(pengeluaran_total),
     }
     
-    return render(request, 'main/saldo.html', context)
\ No newline at end of file
+    return await sync_to_async(render)(request, 'main/saldo.html', context)
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""Which ledger User a request acts for"""
+from main.models import User
+
+# Session key remembering the user chosen with ?user=
+KUNCI_SESI = 'pengguna_id'
+
+
+class PenggunaTidakValid(ValueError):
+    pass
+
+
+def penggunaRequest(request, sesi=True):
+    """The User the request acts for, resolved with one query and memoized on the request.
+
+    ?user=<id> picks the user and, with sesi, is remembered in the session
+    so later pages stay on that user; without it the session's choice
+    applies, then the first user. Returns None when the chosen user does
+    not exist or there are none; raises PenggunaTidakValid for a
+    non-numeric ?user=.
+    """
+    if not hasattr(request, '_pengguna'):
+        sesi = getattr(request, 'session', None) if sesi else None
+        diminta = request.GET.get('user')
+        if diminta:
+            try:
+                user_id = int(diminta)
+            except ValueError:
+                raise PenggunaTidakValid("User tidak valid")
+            pengguna = User.objects.filter(pk=user_id).first()
+            if pengguna is not None and sesi is not None and sesi.get(KUNCI_SESI) != user_id:
+                sesi[KUNCI_SESI] = user_id
+        else:
+            pengguna = None
+            if sesi is not None and sesi.get(KUNCI_SESI) is not None:
+                pengguna = User.objects.filter(pk=sesi[KUNCI_SESI]).first()
+            if pengguna is None:
+                pengguna = User.objects.order_by('pk').first()
+        request._pengguna = pengguna
+    return request._pengguna
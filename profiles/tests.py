@@ -1,3 +1,42 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import Client, RequestFactory, TestCase
+
+from main.models import Transaksi, TransaksiPemasukan, User
+
+from .pengguna import PenggunaTidakValid, penggunaRequest
+
+
+class PenggunaRequestTest(TestCase):
+    def setUp(self):
+        self.a = User.objects.create(nama="A", email="a@example.com")
+        self.b = User.objects.create(nama="B", email="b@example.com")
+        for user, jumlah in ((self.a, '100.00'), (self.b, '7.00')):
+            TransaksiPemasukan(id=f"gaji-{user.nama}", jumlah=Decimal(jumlah), tanggal=date(2025, 5, 1),
+                               user=user, sumber_pemasukan="Gaji").save()
+
+    def test_resolves_once_per_request(self):
+        request = RequestFactory().get('/', {'user': self.b.pk})
+        with self.assertNumQueries(1):
+            self.assertEqual(penggunaRequest(request), self.b)
+            self.assertEqual(penggunaRequest(request), self.b)
+        self.assertEqual(penggunaRequest(RequestFactory().get('/')), self.a)
+        self.assertIsNone(penggunaRequest(RequestFactory().get('/', {'user': 999})))
+        with self.assertRaises(PenggunaTidakValid):
+            penggunaRequest(RequestFactory().get('/', {'user': 'b'}))
+
+    def test_choice_sticks_in_session_and_scopes_pages(self):
+        client = Client()
+        response = client.get('/summary/', {'bulan': 5, 'tahun': 2025, 'user': self.b.pk})
+        self.assertEqual(response.context['monthly_income'], Decimal('7.00'))
+        # Later pages stay on B without ?user=
+        response = client.get('/summary/', {'bulan': 5, 'tahun': 2025})
+        self.assertEqual(response.context['monthly_income'], Decimal('7.00'))
+        self.assertEqual([t.id for t in client.get('/transaksi/').context['transaksi_list']], ["gaji-B"])
+
+        # Another user's transaction is out of reach
+        client.get('/transaksi/delete/gaji-A/')
+        self.assertTrue(Transaksi.objects.filter(pk="gaji-A").exists())
+        self.assertEqual(Client().get('/summary/', {'bulan': 5, 'tahun': 2025}).context['monthly_income'],
+                         Decimal('100.00'))
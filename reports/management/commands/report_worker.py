@@ -0,0 +1,53 @@
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from reports.models import PengelolaLaporan
+
+
+def _kerjakanDiThread(sekali, jeda, berhenti):
+    try:
+        return PengelolaLaporan.kerjakan(sekali=sekali, jeda=jeda, berhenti=berhenti, kelola_koneksi=True)
+    finally:
+        connections.close_all()
+
+
+def _kerjakanDiProses(sekali, jeda):
+    import django
+    django.setup()
+    berhenti = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: berhenti.set())
+    return _kerjakanDiThread(sekali, jeda, berhenti)
+
+
+class Command(BaseCommand):
+    help = "Generate queued reports with a pool of worker threads or processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Parallel workers; 1 runs inline")
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--sekali', action='store_true', help="Exit once the queue is empty")
+        parser.add_argument('--jeda', type=float, default=2.0, help="Seconds to wait when the queue is empty")
+
+    def handle(self, *args, **options):
+        sekali, jeda, workers = options['sekali'], options['jeda'], max(1, options['workers'])
+        if workers == 1:
+            diproses = PengelolaLaporan.kerjakan(sekali=sekali, jeda=jeda)
+        elif options['mode'] == 'thread':
+            berhenti = threading.Event()
+            with ThreadPoolExecutor(workers) as pool:
+                hasil = [pool.submit(_kerjakanDiThread, sekali, jeda, berhenti) for _ in range(workers)]
+                try:
+                    diproses = sum(h.result() for h in hasil)
+                except KeyboardInterrupt:
+                    berhenti.set()
+                    diproses = sum(h.result() for h in hasil)
+        else:
+            # Children must not inherit the parent's open database connections
+            connections.close_all()
+            with ProcessPoolExecutor(workers) as pool:
+                diproses = sum(pool.map(_kerjakanDiProses, [sekali] * workers, [jeda] * workers))
+        self.stdout.write(self.style.SUCCESS(f"{diproses} pekerjaan laporan diproses"))
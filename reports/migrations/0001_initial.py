@@ -0,0 +1,56 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('main', '0008_rekonsiliasi_saldo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LaporanBulanan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bulan', models.DateField()),
+                ('data', models.JSONField()),
+                ('dibuat_pada', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.user')),
+            ],
+            options={
+                'verbose_name_plural': 'Laporan Bulanan',
+            },
+        ),
+        migrations.CreateModel(
+            name='PekerjaanLaporan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bulan', models.DateField()),
+                ('status', models.CharField(choices=[('MENUNGGU', 'Menunggu'), ('BERJALAN', 'Berjalan'), ('SELESAI', 'Selesai'), ('GAGAL', 'Gagal')], default='MENUNGGU', max_length=10)),
+                ('dibuat_pada', models.DateTimeField(auto_now_add=True)),
+                ('mulai_pada', models.DateTimeField(blank=True, null=True)),
+                ('selesai_pada', models.DateTimeField(blank=True, null=True)),
+                ('pekerja', models.CharField(blank=True, default='', max_length=100)),
+                ('percobaan', models.IntegerField(default=0)),
+                ('galat', models.TextField(blank=True, null=True)),
+                ('laporan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='reports.laporanbulanan')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.user')),
+            ],
+            options={
+                'verbose_name_plural': 'Pekerjaan Laporan',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='laporanbulanan',
+            constraint=models.UniqueConstraint(fields=('user', 'bulan'), name='unik_laporan_bulanan'),
+        ),
+        migrations.AddIndex(
+            model_name='pekerjaanlaporan',
+            index=models.Index(fields=['status', 'dibuat_pada'], name='pekerjaan_status_idx'),
+        ),
+    ]
@@ -1,3 +1,204 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction, close_old_connections
+from django.db.models import F, Sum
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+import os
+import platform
+import threading
+import traceback
 
-# Create your models here.
+from main.models import User, RingkasanHarian, RingkasanBulanan, TipeTransaksi, rentangBulan
+
+
+def uang(nilai):
+    """Money as a fixed two-decimal string for JSON"""
+    return str(Decimal(nilai).quantize(Decimal('0.01')))
+
+class StatusPekerjaan(models.TextChoices):
+    MENUNGGU = 'MENUNGGU', 'Menunggu'
+    BERJALAN = 'BERJALAN', 'Berjalan'
+    SELESAI = 'SELESAI', 'Selesai'
+    GAGAL = 'GAGAL', 'Gagal'
+
+class LaporanBulanan(models.Model):
+    """Precomputed monthly statement of one user"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    bulan = models.DateField()  # First day of the month
+    data = models.JSONField()
+    dibuat_pada = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Laporan Bulanan"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'bulan'], name='unik_laporan_bulanan'),
+        ]
+
+class PekerjaanLaporan(models.Model):
+    """A queued request to (re)generate a LaporanBulanan"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    bulan = models.DateField()
+    status = models.CharField(max_length=10, choices=StatusPekerjaan.choices, default=StatusPekerjaan.MENUNGGU)
+    dibuat_pada = models.DateTimeField(auto_now_add=True)
+    mulai_pada = models.DateTimeField(null=True, blank=True)
+    selesai_pada = models.DateTimeField(null=True, blank=True)
+    pekerja = models.CharField(max_length=100, blank=True, default='')
+    percobaan = models.IntegerField(default=0)
+    galat = models.TextField(blank=True, null=True)
+    laporan = models.ForeignKey(LaporanBulanan, on_delete=models.SET_NULL, null=True, blank=True)
+
+    def keDict(self):
+        return {
+            'id': self.pk,
+            'user_id': self.user_id,
+            'bulan': self.bulan.month,
+            'tahun': self.bulan.year,
+            'status': self.status,
+            'dibuat_pada': self.dibuat_pada.isoformat(),
+            'selesai_pada': self.selesai_pada.isoformat() if self.selesai_pada else None,
+            'percobaan': self.percobaan,
+            'galat': self.galat,
+        }
+
+    class Meta:
+        verbose_name_plural = "Pekerjaan Laporan"
+        indexes = [
+            models.Index(fields=['status', 'dibuat_pada'], name='pekerjaan_status_idx'),
+        ]
+
+class PengelolaLaporan:
+    """Service class for the report job queue"""
+
+    @staticmethod
+    def ajukan(user, bulan, tahun):
+        """Queue a monthly statement, reusing a job for the same month still waiting or running"""
+        awal, _ = rentangBulan(bulan, tahun)
+        with transaction.atomic():
+            pekerjaan = PekerjaanLaporan.objects.filter(
+                user=user, bulan=awal, status__in=[StatusPekerjaan.MENUNGGU, StatusPekerjaan.BERJALAN]
+            ).first()
+            return pekerjaan or PekerjaanLaporan.objects.create(user=user, bulan=awal)
+
+    @staticmethod
+    def klaim(pekerja):
+        """Claim the oldest waiting job for pekerja, or None when the queue is empty.
+
+        The claim is a conditional UPDATE on status, so when several workers
+        race for the same row exactly one of them wins it.
+        """
+        PengelolaLaporan.pulihkanMacet()
+        while True:
+            kandidat = list(
+                PekerjaanLaporan.objects.filter(status=StatusPekerjaan.MENUNGGU)
+                .order_by('dibuat_pada', 'pk').values_list('pk', flat=True)[:5]
+            )
+            if not kandidat:
+                return None
+            for pk in kandidat:
+                if PekerjaanLaporan.objects.filter(pk=pk, status=StatusPekerjaan.MENUNGGU).update(
+                    status=StatusPekerjaan.BERJALAN, pekerja=pekerja,
+                    mulai_pada=timezone.now(), percobaan=F('percobaan') + 1,
+                ):
+                    return PekerjaanLaporan.objects.get(pk=pk)
+
+    @staticmethod
+    def pulihkanMacet():
+        """Requeue jobs whose worker died mid-run, giving up after LAPORAN_MAKS_PERCOBAAN tries"""
+        batas = timezone.now() - timedelta(seconds=getattr(settings, 'LAPORAN_BATAS_WAKTU_DETIK', 600))
+        macet = PekerjaanLaporan.objects.filter(status=StatusPekerjaan.BERJALAN, mulai_pada__lt=batas)
+        macet.filter(percobaan__gte=getattr(settings, 'LAPORAN_MAKS_PERCOBAAN', 3)).update(
+            status=StatusPekerjaan.GAGAL, selesai_pada=timezone.now(), galat="Waktu habis",
+        )
+        macet.update(status=StatusPekerjaan.MENUNGGU, pekerja='')
+
+    @staticmethod
+    def jalankan(pekerjaan):
+        """Generate the statement of a claimed job and record the outcome; False if it failed"""
+        try:
+            laporan = PengelolaLaporan.buatLaporanBulanan(pekerjaan.user_id, pekerjaan.bulan)
+        except Exception:
+            # Retry later unless the job has used up its attempts
+            gagal = pekerjaan.percobaan >= getattr(settings, 'LAPORAN_MAKS_PERCOBAAN', 3)
+            PekerjaanLaporan.objects.filter(pk=pekerjaan.pk).update(
+                status=StatusPekerjaan.GAGAL if gagal else StatusPekerjaan.MENUNGGU,
+                selesai_pada=timezone.now() if gagal else None,
+                pekerja='',
+                galat=traceback.format_exc(limit=5),
+            )
+            return False
+        PekerjaanLaporan.objects.filter(pk=pekerjaan.pk).update(
+            status=StatusPekerjaan.SELESAI, selesai_pada=timezone.now(), laporan=laporan, galat=None,
+        )
+        return True
+
+    @staticmethod
+    def buatLaporanBulanan(user_id, awal):
+        """Build and store the statement of one user for the month starting at awal"""
+        _, akhir = rentangBulan(awal.month, awal.year)
+        per_kategori = list(
+            RingkasanBulanan.objects.filter(user_id=user_id, bulan=awal)
+            .values('kategori_id', 'kategori__nama', 'tipe')
+            .annotate(total=Sum('total'), jumlah_transaksi=Sum('jumlah_transaksi'))
+            .order_by('tipe', '-total')
+        )
+        per_hari = {}
+        for tanggal, tipe, total in (
+            RingkasanHarian.objects.filter(user_id=user_id, tanggal__gte=awal, tanggal__lt=akhir)
+            .values('tanggal', 'tipe').annotate(total=Sum('total'))
+            .order_by('tanggal').values_list('tanggal', 'tipe', 'total')
+        ):
+            hari = per_hari.setdefault(tanggal, {'pemasukan': Decimal('0.00'), 'pengeluaran': Decimal('0.00')})
+            hari['pemasukan' if tipe == TipeTransaksi.PEMASUKAN else 'pengeluaran'] += total
+
+        total = {TipeTransaksi.PEMASUKAN: Decimal('0.00'), TipeTransaksi.PENGELUARAN: Decimal('0.00')}
+        for k in per_kategori:
+            total[k['tipe']] += k['total']
+        pemasukan, pengeluaran = total[TipeTransaksi.PEMASUKAN], total[TipeTransaksi.PENGELUARAN]
+        data = {
+            'bulan': awal.month,
+            'tahun': awal.year,
+            'pemasukan': uang(pemasukan),
+            'pengeluaran': uang(pengeluaran),
+            'selisih': uang(pemasukan - pengeluaran),
+            'jumlah_transaksi': sum(k['jumlah_transaksi'] for k in per_kategori),
+            'kategori': [
+                {
+                    'kategori_id': k['kategori_id'],
+                    'nama': k['kategori__nama'] or "Tanpa kategori",
+                    'tipe': k['tipe'],
+                    'total': uang(k['total']),
+                    'jumlah_transaksi': k['jumlah_transaksi'],
+                }
+                for k in per_kategori
+            ],
+            'harian': [
+                {'tanggal': tanggal.isoformat(), 'pemasukan': uang(h['pemasukan']), 'pengeluaran': uang(h['pengeluaran'])}
+                for tanggal, h in per_hari.items()
+            ],
+        }
+        laporan, _ = LaporanBulanan.objects.update_or_create(user_id=user_id, bulan=awal, defaults={'data': data})
+        return laporan
+
+    @staticmethod
+    def kerjakan(sekali=True, jeda=2.0, berhenti=None, kelola_koneksi=False):
+        """Worker loop: claim and run jobs until the queue is empty (sekali) or berhenti is set.
+
+        Returns the number of jobs processed. Pool threads and processes pass
+        kelola_koneksi so broken or expired connections are dropped between jobs.
+        """
+        pekerja = f"{platform.node()}:{os.getpid()}:{threading.get_ident()}"
+        berhenti = berhenti or threading.Event()
+        diproses = 0
+        while not berhenti.is_set():
+            if kelola_koneksi:
+                close_old_connections()
+            pekerjaan = PengelolaLaporan.klaim(pekerja)
+            if pekerjaan is None:
+                if sekali:
+                    break
+                berhenti.wait(jeda)
+                continue
+            PengelolaLaporan.jalankan(pekerjaan)
+            diproses += 1
+        return diproses
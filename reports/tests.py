@@ -1,3 +1,94 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.utils import timezone
+
+from main.models import User, Kategori, TransaksiPemasukan, TransaksiPengeluaran
+from .models import LaporanBulanan, PekerjaanLaporan, PengelolaLaporan, StatusPekerjaan
+
+
+class LaporanBulananTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(nama="A", email="a@example.com")
+        self.makan = Kategori.objects.create(id="makan", nama="Makan")
+        TransaksiPemasukan(
+            id="p1", jumlah=Decimal('500.00'), tanggal=date(2024, 3, 1), user=self.user, sumber_pemasukan="Gaji"
+        ).save()
+        for i, (hari, jumlah) in enumerate([(2, '20.00'), (2, '15.50'), (9, '30.00')]):
+            TransaksiPengeluaran(
+                id=f"k{i}", jumlah=Decimal(jumlah), tanggal=date(2024, 3, hari),
+                kategori=self.makan, user=self.user, metode_pembayaran="Tunai",
+            ).save()
+        TransaksiPengeluaran(
+            id="april", jumlah=Decimal('99.00'), tanggal=date(2024, 4, 1), user=self.user
+        ).save()
+
+    def test_submit_work_and_poll(self):
+        # The session remembers ?user=, so the polls stay on the same ledger
+        client = Client()
+        response = client.post(f'/reports/bulanan/?user={self.user.pk}', {'bulan': 3, 'tahun': 2024})
+        self.assertEqual(response.status_code, 202)
+        status = client.get(response['Location']).json()
+        self.assertEqual(status['status'], StatusPekerjaan.MENUNGGU)
+
+        call_command('report_worker', workers=1, sekali=True, stdout=StringIO())
+
+        status = client.get(response['Location']).json()
+        self.assertEqual(status['status'], StatusPekerjaan.SELESAI)
+        laporan = client.get(status['laporan']).json()
+        self.assertEqual(laporan['pemasukan'], '500.00')
+        self.assertEqual(laporan['pengeluaran'], '65.50')
+        self.assertEqual(laporan['jumlah_transaksi'], 4)
+        self.assertEqual(
+            [(k['nama'], k['total']) for k in laporan['kategori'] if k['tipe'] == 'PENGELUARAN'],
+            [("Makan", '65.50')],
+        )
+        self.assertEqual(
+            laporan['harian'],
+            [
+                {'tanggal': '2024-03-01', 'pemasukan': '500.00', 'pengeluaran': '0.00'},
+                {'tanggal': '2024-03-02', 'pemasukan': '0.00', 'pengeluaran': '35.50'},
+                {'tanggal': '2024-03-09', 'pemasukan': '0.00', 'pengeluaran': '30.00'},
+            ],
+        )
+
+    def test_duplicate_submissions_share_a_job_and_claims_are_exclusive(self):
+        pertama = PengelolaLaporan.ajukan(self.user, 3, 2024)
+        self.assertEqual(PengelolaLaporan.ajukan(self.user, 3, 2024).pk, pertama.pk)
+        self.assertEqual(PengelolaLaporan.klaim("a").pk, pertama.pk)
+        self.assertIsNone(PengelolaLaporan.klaim("b"))
+
+    def test_orphaned_job_is_requeued_then_failed(self):
+        pekerjaan = PengelolaLaporan.ajukan(self.user, 3, 2024)
+        lama = timezone.now() - timedelta(hours=1)
+        PekerjaanLaporan.objects.filter(pk=pekerjaan.pk).update(status=StatusPekerjaan.BERJALAN, mulai_pada=lama)
+        self.assertEqual(PengelolaLaporan.klaim("b").pk, pekerjaan.pk)
+
+        with self.settings(LAPORAN_MAKS_PERCOBAAN=1):
+            PekerjaanLaporan.objects.filter(pk=pekerjaan.pk).update(mulai_pada=lama)
+            self.assertIsNone(PengelolaLaporan.klaim("c"))
+        self.assertEqual(PekerjaanLaporan.objects.get(pk=pekerjaan.pk).status, StatusPekerjaan.GAGAL)
+        self.assertFalse(LaporanBulanan.objects.exists())
+
+    def test_invalid_submission(self):
+        response = Client().post(f'/reports/bulanan/?user={self.user.pk}', {'bulan': 13, 'tahun': 2024})
+        self.assertEqual(response.status_code, 400)
+        response = Client(enforce_csrf_checks=True).post(
+            f'/reports/bulanan/?user={self.user.pk}', {'bulan': 3, 'tahun': 2024}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_jobs_and_statements_stay_with_their_user(self):
+        lain = User.objects.create(nama="B", email="b@example.com")
+        pekerjaan = PengelolaLaporan.ajukan(self.user, 3, 2024)
+        PengelolaLaporan.jalankan(pekerjaan)
+        # The submitter is the request's user; a user field in the body is ignored
+        response = Client().post(f'/reports/bulanan/?user={lain.pk}', {'user': self.user.pk, 'bulan': 3, 'tahun': 2024})
+        self.assertEqual(response.json()['user_id'], lain.pk)
+        client = Client()
+        self.assertEqual(client.get(f'/reports/pekerjaan/{pekerjaan.pk}/', {'user': lain.pk}).status_code, 404)
+        self.assertEqual(client.get('/reports/bulanan/2024/3/').status_code, 404)
+        self.assertEqual(client.get('/reports/bulanan/2024/3/', {'user': self.user.pk}).status_code, 200)
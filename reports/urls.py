@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'reports'
+
+urlpatterns = [
+    path('bulanan/', views.ajukan_laporan, name='ajukan_laporan'),
+    path('bulanan/<int:tahun>/<int:bulan>/', views.laporan_bulanan, name='laporan_bulanan'),
+    path('pekerjaan/<int:pekerjaan_id>/', views.status_pekerjaan, name='status_pekerjaan'),
+]
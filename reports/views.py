@@ -1,3 +1,58 @@
-from django.shortcuts import render
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
 
-# Create your views here.
+from main.models import rentangBulan
+from profiles.pengguna import penggunaRequest
+from .models import LaporanBulanan, PekerjaanLaporan, PengelolaLaporan, StatusPekerjaan
+
+
+def _galat(pesan, status=400):
+    return JsonResponse({'status': 'error', 'message': pesan}, status=status)
+
+@require_POST
+def ajukan_laporan(request):
+    """Queue a monthly statement of the request's user; answers 202 with the job to poll"""
+    try:
+        user = penggunaRequest(request)
+        bulan, tahun = int(request.POST.get('bulan', '')), int(request.POST.get('tahun', ''))
+        rentangBulan(bulan, tahun)
+    except ValueError:
+        return _galat("User, bulan atau tahun tidak valid")
+    if user is None:
+        return _galat("User tidak ditemukan", status=404)
+
+    pekerjaan = PengelolaLaporan.ajukan(user, bulan, tahun)
+    url = reverse('reports:status_pekerjaan', args=[pekerjaan.pk])
+    response = JsonResponse({**pekerjaan.keDict(), 'url': url}, status=202)
+    response['Location'] = url
+    return response
+
+@require_GET
+def status_pekerjaan(request, pekerjaan_id):
+    """Poll one of the request user's jobs; a finished job links to its statement"""
+    try:
+        user = penggunaRequest(request)
+    except ValueError:
+        return _galat("User tidak valid")
+    pekerjaan = get_object_or_404(PekerjaanLaporan, pk=pekerjaan_id, user=user)
+    data = pekerjaan.keDict()
+    if pekerjaan.status == StatusPekerjaan.SELESAI:
+        data['laporan'] = reverse('reports:laporan_bulanan', args=[pekerjaan.bulan.year, pekerjaan.bulan.month])
+    return JsonResponse(data)
+
+@require_GET
+def laporan_bulanan(request, tahun, bulan):
+    """The stored statement of the request's user for one month"""
+    try:
+        user = penggunaRequest(request)
+        awal, _ = rentangBulan(bulan, tahun)
+    except ValueError:
+        return _galat("User, bulan atau tahun tidak valid")
+    if user is None:
+        return _galat("User tidak ditemukan", status=404)
+    laporan = LaporanBulanan.objects.filter(user=user, bulan=awal).first()
+    if laporan is None:
+        return _galat("Laporan belum dibuat", status=404)
+    return JsonResponse({**laporan.data, 'user_id': laporan.user_id, 'dibuat_pada': laporan.dibuat_pada.isoformat()})
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.middleware.InstrumentasiMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,7 +61,9 @@ ROOT_URLCONF = 'spendingtracker.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also reports render time to the instrumentation middleware
+        'BACKEND': 'main.middleware.DjangoTemplatesTerukur',
+        'NAME': 'django',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -83,10 +86,42 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock at BEGIN so concurrent balance updates queue
+            # up behind each other instead of failing to upgrade their lock
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # Close connections at the end of each request. The app is served
+        # through ASGI, where every request runs in its own thread, so a kept
+        # connection would never be reused. Behind a threaded WSGI server,
+        # raise it (e.g. 600) to keep SQLite's page cache and mmap across
+        # requests.
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {
+            # On disk rather than shared-cache memory, so threaded tests get
+            # SQLite's real file locking and busy timeout
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# Applied to every new SQLite connection by main.sqlite.terapkanPragma.
+# WAL lets readers run alongside the single writer; with WAL, NORMAL only
+# syncs at checkpoints and stays crash-safe. cache_size is negative KiB.
+
+SQLITE_PRAGMA = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'cache_size': -65536,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -123,6 +158,103 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Balance and summary figures live in their own alias so a rollup rebuild
+# can clear it wholesale. Writes invalidate the alias only from the process
+# that made them, and the management commands (import_transaksi,
+# run_recurring, reconcile_saldo, archive_transaksi, report_worker) and
+# every extra web worker are other processes, so the figures default to
+# 'ringkasan-berkas', shared through the filesystem. The in-memory
+# 'ringkasan' alias is faster but only correct when one process does every
+# read and write.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'ringkasan': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ringkasan',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'ringkasan-berkas': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'ringkasan',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Used by the test runner: nothing computed from test data is kept
+    'ringkasan-uji': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+TEST_RUNNER = 'spendingtracker.test_runner.TestRunner'
+
+RINGKASAN_CACHE_ALIAS = 'ringkasan-berkas'
+
+# Upper bound on staleness if an invalidation is ever missed
+RINGKASAN_CACHE_TIMEOUT = 300
+
+# Transaction list pagination (keyset cursor, ?ukuran= overrides the default)
+
+TRANSAKSI_PER_HALAMAN = 50
+
+TRANSAKSI_PER_HALAMAN_MAKS = 500
+
+# Rows per bulk_create batch for transaction imports
+
+IMPOR_BATCH_SIZE = 1000
+
+# Rows fetched per round trip while streaming an export
+
+EKSPOR_CHUNK_SIZE = 2000
+
+# Matches scored per search, newest first; bounds the cost of very common words
+
+PENCARIAN_KANDIDAT = 1000
+
+# Days of history analysed by /api/analitik/ (?hari= overrides, up to the maximum)
+
+ANALITIK_HARI = 365
+
+ANALITIK_HARI_MAKS = 5 * 366
+
+# Per-request SQL/render timing (Server-Timing header, slow-request log and
+# /api/instrumentasi/). When off the middleware unloads itself at startup.
+
+INSTRUMENTASI_AKTIF = DEBUG
+
+INSTRUMENTASI_AMBANG_LAMBAT_MS = 500
+
+# Record the project call site of every query for the slow-request log
+
+INSTRUMENTASI_TUMPUKAN = True
+
+# Requests kept per view for the rolling percentiles and histogram
+
+INSTRUMENTASI_JENDELA = 1000
+
+INTERNAL_IPS = ['127.0.0.1']
+
+# reconcile_saldo rechecks users whose saldo moved up to this long before the
+# previous run started, to cover writes that had not committed yet
+
+REKONSILIASI_JEDA_DETIK = 300
+
+# Report jobs running longer than this are assumed orphaned and requeued,
+# up to LAPORAN_MAKS_PERCOBAAN attempts
+
+LAPORAN_BATAS_WAKTU_DETIK = 600
+
+LAPORAN_MAKS_PERCOBAAN = 3
+
+# archive_transaksi without --sebelum moves transactions dated before the
+# first day of the month this many months ago into the per-year archive
+
+ARSIP_BULAN_PANAS = 24
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,21 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner that keeps the suite out of the shared on-disk summary cache.
+
+    Test data is rolled back without ever running the on-commit
+    invalidation, so figures cached from it would outlive the test and be
+    served by a dev server on the same checkout. Tests that exercise the
+    cache itself switch back to the in-memory 'ringkasan' alias.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_uji = override_settings(RINGKASAN_CACHE_ALIAS='ringkasan-uji')
+        self._cache_uji.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_uji.disable()
+        super().teardown_test_environment(**kwargs)
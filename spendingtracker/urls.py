@@ -26,7 +26,15 @@ urlpatterns = [
     path('transaksi/', views.transaksi_list, name='transaksi_list'),
     path('transaksi/delete/<str:transaksi_id>/', views.transaksi_delete, name='transaksi_delete'),
     path('transaksi/create/', views.transaksi_create, name='transaksi_create'),
+    path('transaksi/import/', views.transaksi_import, name='transaksi_import'),
+    path('transaksi/export/', views.transaksi_export, name='transaksi_export'),
     path('summary/', views.summary_view, name='summary'),
+    path('anggaran/', views.anggaran_view, name='anggaran'),
     path('api/test/', views.api_test, name='api_test'),
+    path('api/analitik/', views.api_analitik, name='api_analitik'),
+    path('api/cache/stats/', views.api_cache_stats, name='api_cache_stats'),
+    path('api/instrumentasi/', views.api_instrumentasi, name='api_instrumentasi'),
     path('saldo/', views.saldo_view, name='saldo'),
+    path('reports/', include('reports.urls')),
+    path('api/transaksi/', include('transactions.urls')),
 ]
\ No newline at end of file
@@ -1,3 +1,157 @@
-from django.test import TestCase
+import gzip
+import json
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+
+from main.models import (
+    User, Kategori, Transaksi, TransaksiPemasukan, TransaksiPengeluaran, PengelolaTransaksi, TipeTransaksi,
+)
+
+
+class TransaksiApiTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create(nama="A", email="a@example.com")
+        self.lain = User.objects.create(nama="B", email="b@example.com")
+        self.makan = Kategori.objects.create(id="makan", nama="Makan")
+        TransaksiPemasukan(
+            id="gaji", jumlah=Decimal('1000.00'), tanggal=date(2024, 3, 1), user=self.user, sumber_pemasukan="Gaji"
+        ).save()
+        for i in range(5):
+            TransaksiPengeluaran(
+                id=f"k{i}", jumlah=Decimal('10.00'), tanggal=date(2024, 3, 2 + i),
+                kategori=self.makan, user=self.user, catatan=f"Makan {i}",
+            ).save()
+        TransaksiPemasukan(
+            id="lain", jumlah=Decimal('5.00'), tanggal=date(2024, 3, 9), user=self.lain
+        ).save()
+
+    def url(self, **kueri):
+        kueri.setdefault('user', self.user.pk)
+        return '/api/transaksi/?' + '&'.join(f"{k}={v}" for k, v in kueri.items())
+
+    def test_list_projection_filters_and_cursor(self):
+        data = self.client.get(self.url(fields='id,jumlah', tipe='PENGELUARAN', ukuran=3)).json()
+        self.assertEqual(data['hasil'], [
+            {'id': 'k4', 'jumlah': '10.00'}, {'id': 'k3', 'jumlah': '10.00'}, {'id': 'k2', 'jumlah': '10.00'},
+        ])
+        lanjut = self.client.get(data['berikutnya']).json()
+        self.assertEqual([t['id'] for t in lanjut['hasil']], ['k1', 'k0'])
+        self.assertIsNone(lanjut['cursor_berikutnya'])
+
+        semua = self.client.get(self.url(dari='2024-03-01', sampai='2024-03-02')).json()['hasil']
+        self.assertEqual([t['id'] for t in semua], ['k0', 'gaji'])
+        self.assertEqual(semua[0]['kategori'], 'makan')
+        self.assertEqual(self.client.get(self.url(fields='id,rahasia')).status_code, 400)
+
+    def test_conditional_get_skips_the_rows_until_the_ledger_changes(self):
+        response = self.client.get(self.url())
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+
+        with CaptureQueriesContext(connection) as kueri:
+            response = self.client.get(self.url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(kueri), 1)
+        self.assertNotIn('main_transaksi', kueri[0]['sql'])
+
+        # Other users' writes leave this ETag valid; an edit of a note does not
+        TransaksiPemasukan(id="lain2", jumlah=Decimal('1.00'), tanggal=date(2024, 3, 9), user=self.lain).save()
+        self.assertEqual(self.client.get(self.url(), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        trx = Transaksi.objects.get(pk='k0')
+        trx.catatan = "Diubah"
+        trx.save()
+        self.assertEqual(self.client.get(self.url(), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_create_and_delete(self):
+        response = self.client.post(self.url(), json.dumps({
+            'jumlah': '25.50', 'tanggal': '2024-03-10', 'tipe': 'PENGELUARAN',
+            'kategori': 'makan', 'metode_pembayaran': 'Tunai',
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        dibuat = response.json()
+        self.assertEqual((dibuat['jumlah'], dibuat['tanggal'], dibuat['user']), ('25.50', '2024-03-10', self.user.pk))
+        self.assertEqual(User.objects.get(pk=self.user.pk).saldo, Decimal('924.50'))
+        dibaca = self.client.get(response['Location'])
+        self.assertEqual(dibaca.status_code, 200)
+        self.assertEqual(dibaca.json(), {k: v for k, v in dibuat.items() if k != 'peringatan_anggaran'})
+        self.assertEqual(
+            self.client.get(response['Location'], HTTP_IF_NONE_MATCH=dibaca['ETag']).status_code, 304
+        )
+        self.assertEqual(self.client.get(f"{response['Location']}?user={self.lain.pk}").status_code, 404)
+
+        terlalu_besar = self.client.post(self.url(), json.dumps({
+            'jumlah': '99999', 'tanggal': '2024-03-10', 'tipe': 'PENGELUARAN',
+        }), content_type='application/json')
+        self.assertEqual(terlalu_besar.status_code, 400)
+
+        self.assertEqual(self.client.delete(response['Location']).status_code, 204)
+        self.assertEqual(self.client.delete(response['Location']).status_code, 404)
+        # Deleting the income would overdraw the user
+        self.assertEqual(self.client.delete('/api/transaksi/gaji/').status_code, 409)
+
+    def test_gzip(self):
+        response = self.client.get(self.url(), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['hasil']), 6)
+
+
+class PencarianApiTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(nama="A", email="a@example.com", saldo=Decimal('1000.00'))
+        self.makan = Kategori.objects.create(id="makan", nama="Makan")
+        TransaksiPengeluaran(id="kopi", jumlah=Decimal('5.00'), tanggal=date(2024, 3, 1), user=self.user,
+                             kategori=self.makan, catatan="Kopi susu di kafe", metode_pembayaran="QRIS").save()
+        TransaksiPengeluaran(id="kopi2", jumlah=Decimal('5.00'), tanggal=date(2024, 4, 1), user=self.user,
+                             catatan="Biji kopi", metode_pembayaran="Tunai").save()
+        TransaksiPemasukan(id="gaji", jumlah=Decimal('900.00'), tanggal=date(2024, 3, 1), user=self.user,
+                           catatan="Gaji bulanan", sumber_pemasukan="Kantor").save()
+
+    def cari(self, **kueri):
+        return [r['id'] for r in Client().get('/api/transaksi/cari/', {'user': self.user.pk, **kueri}).json()['hasil']]
+
+    def test_ranked_search_with_filters_and_prefix(self):
+        self.assertEqual(sorted(self.cari(q='kopi')), ['kopi', 'kopi2'])
+        self.assertEqual(self.cari(q='kop', kategori='makan'), ['kopi'])
+        self.assertEqual(self.cari(q='kopi', dari='2024-04-01'), ['kopi2'])
+        self.assertEqual(self.cari(q='qris'), ['kopi'])
+        self.assertEqual(self.cari(q='kantor'), ['gaji'])
+        # Quotes and operators are searched as text, never parsed as FTS syntax
+        self.assertEqual(self.cari(q='"kopi OR NEAR('), [])
+        # The indexed owner token is not searchable text
+        self.assertEqual(self.cari(q=f'u{self.user.pk}'), [])
+
+    def test_index_follows_updates_deletes_and_bulk_inserts(self):
+        trx = Transaksi.objects.get(pk="kopi2")
+        trx.catatan = "Teh tarik"
+        trx.save()
+        self.assertEqual(self.cari(q='teh'), ['kopi2'])
+        self.assertEqual(self.cari(q='biji'), [])
+        Transaksi.objects.get(pk="kopi").delete()
+        self.assertEqual(self.cari(q='susu'), [])
+        PengelolaTransaksi.tambahTransaksiMassal([
+            Transaksi(id="m1", jumlah=Decimal('1.00'), tanggal=date(2024, 5, 1), tipe=TipeTransaksi.PENGELUARAN,
+                      user=self.user, catatan="Parkir motor"),
+        ])
+        self.assertEqual(self.cari(q='parkir'), ['m1'])
+
+    def test_stale_index_never_returns_another_users_rows(self):
+        lain = User.objects.create(nama="B", email="b@example.com")
+        # As after a table remake: the triggers are gone and the index still names the old owner
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER main_transaksi_fts_au")
+        Transaksi.objects.filter(pk="kopi2").update(user=lain)
+        self.assertEqual(self.cari(q='biji'), [])
+        self.assertEqual(self.cari(q='biji', dari='2024-01-01'), [])
+
+    def test_index_survives_renumbered_rowids(self):
+        # VACUUM and table remakes are free to renumber the implicit rowid
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE main_transaksi SET rowid = rowid + 1000")
+        self.assertEqual(sorted(self.cari(q='kopi')), ['kopi', 'kopi2'])
+        self.assertEqual(self.cari(q='kopi', dari='2024-04-01'), ['kopi2'])
+        self.assertEqual(self.cari(q='kantor'), ['gaji'])
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'transactions'
+
+urlpatterns = [
+    path('', views.transaksi_koleksi, name='transaksi_koleksi'),
+    path('cari/', views.transaksi_cari, name='transaksi_cari'),
+    path('<str:transaksi_id>/', views.transaksi_item, name='transaksi_item'),
+]
@@ -1,3 +1,235 @@
-from django.shortcuts import render
+import json
+from datetime import date
+from decimal import Decimal
+from hashlib import sha1
 
-# Create your views here.
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_http_methods
+
+from main.arsip import PengelolaArsip
+from main.models import (
+    Kategori, Transaksi, TransaksiPemasukan, TransaksiPengeluaran,
+    PengelolaTransaksi, TipeTransaksi, buatId,
+)
+from main.pencarian import PengelolaPencarian
+from profiles.pengguna import PenggunaTidakValid, penggunaRequest
+
+# API field name -> Transaksi column
+FIELDS = {
+    'id': 'id',
+    'jumlah': 'jumlah',
+    'tanggal': 'tanggal',
+    'tipe': 'tipe',
+    'kategori': 'kategori_id',
+    'catatan': 'catatan',
+    'user': 'user_id',
+    'sumber_pemasukan': 'sumber_pemasukan',
+    'metode_pembayaran': 'metode_pembayaran',
+}
+
+
+class PermintaanTidakValid(Exception):
+    pass
+
+
+def _galat(pesan, status=400):
+    return JsonResponse({'status': 'error', 'message': pesan}, status=status)
+
+def _pengguna(request):
+    """The user of ?user=, or the first user; the API never touches the session"""
+    try:
+        return penggunaRequest(request, sesi=False)
+    except PenggunaTidakValid as e:
+        raise PermintaanTidakValid(str(e))
+
+def _etagDaftar(request):
+    """Weak ETag of a list response: the owner's ledger version plus the query string"""
+    try:
+        pengguna = _pengguna(request)
+    except PermintaanTidakValid:
+        return None
+    if pengguna is None:
+        return None
+    kueri = sha1(request.GET.urlencode().encode()).hexdigest()[:12]
+    return f'W/"{pengguna.pk}-{pengguna.versi_ledger}-{kueri}"'
+
+def _kolom(request):
+    if not request.GET.get('fields'):
+        return list(FIELDS)
+    diminta = [f.strip() for f in request.GET['fields'].split(',') if f.strip()]
+    tidak_dikenal = [f for f in diminta if f not in FIELDS]
+    if tidak_dikenal:
+        raise PermintaanTidakValid(f"Field tidak dikenal: {', '.join(tidak_dikenal)}")
+    return diminta
+
+def _filter(request):
+    filter = {}
+    try:
+        for kunci in ('dari', 'sampai'):
+            if request.GET.get(kunci):
+                filter[kunci] = date.fromisoformat(request.GET[kunci])
+    except ValueError:
+        raise PermintaanTidakValid("Tanggal tidak valid")
+    if request.GET.get('tipe'):
+        if request.GET['tipe'] not in TipeTransaksi.values:
+            raise PermintaanTidakValid("Tipe tidak valid")
+        filter['tipe'] = request.GET['tipe']
+    if request.GET.get('kategori'):
+        filter['kategori'] = request.GET['kategori']
+    return filter
+
+def _json(nilai):
+    if isinstance(nilai, Decimal):
+        return str(nilai)
+    if isinstance(nilai, date):
+        return nilai.isoformat()
+    return nilai
+
+def _baris(transaksi):
+    return {f: _json(getattr(transaksi, kolom)) for f, kolom in FIELDS.items()}
+
+def _ukuran(request):
+    bawaan = getattr(settings, 'TRANSAKSI_PER_HALAMAN', 50)
+    try:
+        ukuran = int(request.GET.get('ukuran', bawaan))
+    except ValueError:
+        raise PermintaanTidakValid("Ukuran tidak valid")
+    return max(1, min(ukuran, getattr(settings, 'TRANSAKSI_PER_HALAMAN_MAKS', 500)))
+
+@csrf_exempt
+@require_http_methods(['GET', 'HEAD', 'POST'])
+def transaksi_koleksi(request):
+    """GET lists one user's transactions, POST creates one"""
+    if request.method == 'POST':
+        return _buat(request)
+    return _daftar(request)
+
+@gzip_page
+@condition(etag_func=_etagDaftar)
+def _daftar(request):
+    """A page of transactions, newest first; ?fields=, ?cursor=, ?ukuran= and filters"""
+    try:
+        pengguna = _pengguna(request)
+        kolom = _kolom(request)
+        filter = _filter(request)
+        ukuran = _ukuran(request)
+    except PermintaanTidakValid as e:
+        return _galat(str(e))
+    if pengguna is None:
+        return _galat("User tidak ditemukan", status=404)
+
+    try:
+        halaman = PengelolaArsip.ambilHalaman(
+            cursor=request.GET.get('cursor'),
+            ukuran=ukuran,
+            kolom=[FIELDS[f] for f in kolom],
+            user=pengguna, **filter,
+        )
+    except ValidationError:
+        return _galat("Cursor tidak valid")
+
+    berikutnya = None
+    if halaman['cursor_berikutnya']:
+        kueri = request.GET.copy()
+        kueri['cursor'] = halaman['cursor_berikutnya']
+        berikutnya = f"{request.path}?{kueri.urlencode()}"
+    return JsonResponse({
+        'hasil': [{f: _json(baris[FIELDS[f]]) for f in kolom} for baris in halaman['transaksi']],
+        'cursor_berikutnya': halaman['cursor_berikutnya'],
+        'berikutnya': berikutnya,
+    })
+
+def _buat(request):
+    try:
+        data = json.loads(request.body or b'{}')
+        pengguna = _pengguna(request)
+    except (ValueError, PermintaanTidakValid):
+        return _galat("Body harus berupa objek JSON")
+    if not isinstance(data, dict):
+        return _galat("Body harus berupa objek JSON")
+    if pengguna is None:
+        return _galat("User tidak ditemukan", status=404)
+
+    tipe = data.get('tipe')
+    if tipe not in TipeTransaksi.values:
+        return _galat("Tipe tidak valid")
+    kategori_id = data.get('kategori') or None
+    if kategori_id is not None and not Kategori.objects.filter(pk=kategori_id).exists():
+        return _galat(f"Kategori tidak ditemukan: {kategori_id}")
+
+    kelas = TransaksiPemasukan if tipe == TipeTransaksi.PEMASUKAN else TransaksiPengeluaran
+    transaksi = kelas(
+        id=data.get('id') or buatId(),
+        jumlah=data.get('jumlah'),
+        tanggal=data.get('tanggal'),
+        kategori_id=kategori_id,
+        catatan=data.get('catatan'),
+        user=pengguna,
+    )
+    if tipe == TipeTransaksi.PEMASUKAN:
+        transaksi.sumber_pemasukan = data.get('sumber_pemasukan')
+    else:
+        transaksi.metode_pembayaran = data.get('metode_pembayaran')
+    try:
+        PengelolaTransaksi.tambahTransaksi(transaksi)
+    except ValidationError as e:
+        return _galat(' '.join(e.messages))
+
+    data = _baris(transaksi)
+    data['peringatan_anggaran'] = transaksi.peringatan_anggaran
+    response = JsonResponse(data, status=201)
+    response['Location'] = reverse('transactions:transaksi_item', args=[transaksi.pk])
+    return response
+
+@require_http_methods(['GET', 'HEAD'])
+def transaksi_cari(request):
+    """Ranked full-text search over notes, income sources and payment methods; ?q= plus list filters"""
+    teks = request.GET.get('q', '').strip()
+    if not teks:
+        return _galat("Parameter q wajib diisi")
+    try:
+        pengguna = _pengguna(request)
+        kolom = _kolom(request)
+        filter = _filter(request)
+        ukuran = _ukuran(request)
+    except PermintaanTidakValid as e:
+        return _galat(str(e))
+    if pengguna is None:
+        return _galat("User tidak ditemukan", status=404)
+
+    hasil = PengelolaPencarian.cariTransaksi(teks, user=pengguna, batas=ukuran, **filter)
+    return JsonResponse({
+        'hasil': [
+            {**{f: _json(getattr(trx, FIELDS[f])) for f in kolom}, 'skor': getattr(trx, 'skor', None)}
+            for trx in hasil
+        ],
+    })
+
+@csrf_exempt
+@require_http_methods(['GET', 'HEAD', 'DELETE'])
+def transaksi_item(request, transaksi_id):
+    """GET one of the user's transactions with its ETag, or DELETE it"""
+    try:
+        pengguna = _pengguna(request)
+    except PermintaanTidakValid as e:
+        return _galat(str(e))
+    transaksi = Transaksi.objects.milik(pengguna).filter(pk=transaksi_id).first() if pengguna else None
+    if transaksi is None:
+        return _galat("Transaksi tidak ditemukan", status=404)
+    if request.method != 'DELETE':
+        # Strong ETag: the content hash changes with every field the API returns
+        etag = f'"{transaksi.hitungHashKonten()}"'
+        response = get_conditional_response(request, etag=etag) or JsonResponse(_baris(transaksi))
+        response['ETag'] = etag
+        return response
+    try:
+        transaksi.delete()
+    except ValidationError as e:
+        return _galat(' '.join(e.messages), status=409)
+    return HttpResponse(status=204)